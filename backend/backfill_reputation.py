@@ -0,0 +1,103 @@
+"""
+Rebuild stored reputation and rating histograms from the reviews collection.
+
+Walks the users collection in _id order, recomputes each batch of users
+with one $group aggregation and corrects drifted users with one
+bulk_write. Progress is saved after every batch so an interrupted run can
+continue with --resume.
+
+    python backfill_reputation.py --report          # drift report only
+    python backfill_reputation.py                   # fix drifted users
+    python backfill_reputation.py --resume          # continue a stopped run
+    python backfill_reputation.py --user user_123   # one poster
+"""
+import argparse
+import asyncio
+import json
+import os
+import db
+from reputation import reconcile_users, recompute_poster_reputation
+
+DEFAULT_STATE_FILE = os.path.join(os.path.dirname(__file__), ".backfill_reputation.state")
+
+
+def load_checkpoint(state_file: str):
+    if not os.path.exists(state_file):
+        return None
+    with open(state_file) as f:
+        return json.load(f).get("last_user_id")
+
+
+def save_checkpoint(state_file: str, last_user_id: str):
+    with open(state_file, "w") as f:
+        json.dump({"last_user_id": last_user_id}, f)
+
+
+async def backfill(batch_size: int, pause: float, write: bool, state_file: str, resume: bool) -> dict:
+    """Reconcile every user, batch by batch; returns the run totals"""
+    last_user_id = load_checkpoint(state_file) if resume else None
+    if last_user_id:
+        print(f"Resuming after user {last_user_id}")
+    
+    totals = {"checked": 0, "drifted": 0, "updated": 0, "skipped": 0}
+    while True:
+        query = {"_id": {"$gt": last_user_id}} if last_user_id else {}
+        cursor = db.database.users.find(
+            query, {"reputation": 1, "review_count": 1, "rating_sum": 1, "rating_histogram": 1}
+        ).sort("_id", 1).limit(batch_size)
+        users = await cursor.to_list(length=batch_size)
+        if not users:
+            break
+        
+        report = await reconcile_users(users, write=write)
+        for entry in report["drifted"]:
+            print(json.dumps(entry, default=str))
+        totals["checked"] += report["checked"]
+        totals["drifted"] += len(report["drifted"])
+        totals["updated"] += report["updated"]
+        totals["skipped"] += report["skipped"]
+        
+        last_user_id = users[-1]["_id"]
+        if write:
+            save_checkpoint(state_file, last_user_id)
+        
+        # Leave room for live traffic between batches
+        await asyncio.sleep(pause)
+    
+    if write and os.path.exists(state_file):
+        os.remove(state_file)
+    return totals
+
+
+async def main():
+    parser = argparse.ArgumentParser(description="Rebuild user reputation and rating histograms from reviews")
+    parser.add_argument("--report", action="store_true", help="only report drift, change nothing")
+    parser.add_argument("--user", help="recompute a single poster")
+    parser.add_argument("--batch-size", type=int, default=500, help="users per batch (default 500)")
+    parser.add_argument("--pause", type=float, default=0.2, help="seconds to wait between batches (default 0.2)")
+    parser.add_argument("--resume", action="store_true", help="continue after the last saved batch")
+    parser.add_argument("--state-file", default=DEFAULT_STATE_FILE, help="where progress is saved")
+    args = parser.parse_args()
+    
+    await db.connect_db()
+    try:
+        if args.user:
+            if args.report:
+                user = await db.database.users.find_one({"_id": args.user}) or {"_id": args.user}
+                report = await reconcile_users([user], write=False)
+                print(json.dumps(report, default=str))
+            else:
+                fields = await recompute_poster_reputation(args.user)
+                print(json.dumps({"user_id": args.user, **fields}))
+            return
+        
+        totals = await backfill(
+            args.batch_size, args.pause, not args.report, args.state_file, args.resume
+        )
+        print(json.dumps(totals))
+    finally:
+        await db.close_db()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,152 @@
+"""
+In-process caching for read-heavy endpoints.
+"""
+import hashlib
+import time
+import uuid
+from collections import OrderedDict, defaultdict
+from typing import Any, Callable, Hashable
+from fastapi import Request, Response
+
+# Lets browsers and reverse proxies reuse a public read briefly and keep
+# serving it while revalidating with If-None-Match in the background
+PUBLIC_CACHE_CONTROL = "public, max-age=5, stale-while-revalidate=60"
+
+
+class TTLCache:
+    """
+    Bounded LRU cache whose entries also expire after ttl seconds.
+    Keeps hit/miss/eviction counters so its effectiveness can be monitored.
+    """
+
+    def __init__(self, maxsize: int = 512, ttl: float = 30.0):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._entries = OrderedDict()  # key -> (expires_at, value)
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        """Return the cached value, or default if missing or expired"""
+        entry = self._entries.get(key)
+        if entry is None or entry[0] <= time.monotonic():
+            if entry is not None:
+                del self._entries[key]
+                self.evictions += 1
+            self.misses += 1
+            return default
+
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return entry[1]
+
+    def set(self, key: Hashable, value: Any):
+        """Store a value, evicting the least recently used entry when full"""
+        self._entries[key] = (time.monotonic() + self.ttl, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def invalidate(self, key: Hashable) -> bool:
+        """Drop one entry, returning whether it was cached"""
+        if self._entries.pop(key, None) is None:
+            return False
+        self.invalidations += 1
+        return True
+
+    def invalidate_where(self, predicate: Callable[[Hashable], bool]) -> int:
+        """Drop every entry whose key matches the predicate"""
+        keys = [key for key in self._entries if predicate(key)]
+        for key in keys:
+            del self._entries[key]
+        self.invalidations += len(keys)
+        return len(keys)
+
+    def entries_where(self, predicate: Callable[[Hashable], bool]) -> list:
+        """
+        Live (key, value) pairs whose key matches the predicate, for callers
+        that update cached values in place. Does not count as hits.
+        """
+        now = time.monotonic()
+        return [
+            (key, value) for key, (expires_at, value) in self._entries.items()
+            if expires_at > now and predicate(key)
+        ]
+
+    def clear(self):
+        self._entries.clear()
+
+    def stats(self) -> dict:
+        return {
+            "size": len(self._entries),
+            "maxsize": self.maxsize,
+            "ttl": self.ttl,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "invalidations": self.invalidations,
+        }
+
+
+class CollectionVersions:
+    """
+    Per-collection write counters used to derive ETags.
+    The counters live in this process and start from a random epoch, so a
+    restart never reuses a previous ETag. Writes handled by another process
+    never move them, so the API must run as a single process (see README);
+    otherwise stale listings are answered with 304 indefinitely.
+    """
+
+    def __init__(self):
+        self.epoch = uuid.uuid4().hex[:8]
+        self._versions = defaultdict(int)
+
+    def bump(self, collection: str):
+        self._versions[collection] += 1
+
+    def get(self, collection: str) -> str:
+        return f"{self.epoch}-{self._versions[collection]}"
+
+    def snapshot(self, *collections: str) -> str:
+        """Combined version of several collections, e.g. for a read joining them"""
+        return "|".join(self.get(collection) for collection in collections)
+
+
+collection_versions = CollectionVersions()
+
+
+def make_etag(collection: str, request: Request, *dependencies: str) -> str:
+    """
+    Strong ETag for a read of a collection: changes whenever the collection,
+    or any dependency collection whose data is embedded in the response, is
+    written or the request asks for a different representation.
+    """
+    params = sorted(request.query_params.multi_items())
+    variant = request.headers.get("accept", "")
+    version = collection_versions.snapshot(collection, *dependencies)
+    raw = f"{version}|{request.url.path}|{params}|{variant}"
+    return '"' + hashlib.sha1(raw.encode("utf-8")).hexdigest() + '"'
+
+
+def etag_matches(request: Request, etag: str) -> bool:
+    """Whether the request's If-None-Match already names the current ETag"""
+    header = request.headers.get("if-none-match")
+    if not header:
+        return False
+    if header.strip() == "*":
+        return True
+    tags = [tag.strip() for tag in header.split(",")]
+    # If-None-Match uses weak comparison
+    return any(tag.removeprefix("W/") == etag for tag in tags)
+
+
+def cache_headers(etag: str) -> dict:
+    # JSON and NDJSON listings share a URL, so shared caches must key on Accept
+    return {"ETag": etag, "Cache-Control": PUBLIC_CACHE_CONTROL, "Vary": "Accept"}
+
+
+def not_modified(etag: str) -> Response:
+    return Response(status_code=304, headers=cache_headers(etag))
@@ -0,0 +1,186 @@
+"""
+Claim windows for contended posts.
+
+With a window enabled, the first claim on a post opens it and every claim
+that arrives before it closes joins the post's queue. When the window
+closes one winner is picked, FIFO or by lottery, and only the winner's
+claim is written to the database. The other claimants are rejected in
+memory and kept on a standby list, and the next one is promoted if the
+winner unclaims. Claims arriving after the winner is picked join the
+standby list straight away.
+
+Queues live in this process, like the read caches, so this assumes a
+single API process.
+"""
+import asyncio
+import random
+from typing import Awaitable, Callable, Optional
+from fastapi import HTTPException
+from cache import TTLCache
+
+FIFO = "fifo"
+LOTTERY = "lottery"
+CLAIM_MODES = (FIFO, LOTTERY)
+
+ALREADY_CLAIMED = "Post already claimed"
+
+
+class ClaimantIneligible(Exception):
+    """
+    Raised by a claim attempt when only this claimant is rejected (e.g. the
+    owner claiming their own post), so the next claimant can be tried.
+    """
+
+    def __init__(self, error: HTTPException):
+        super().__init__(error.detail)
+        self.error = error
+
+
+# attempt(user_id) writes the claim and returns the claimed post document.
+# It raises ClaimantIneligible to reject just that claimant, or an
+# HTTPException when the post cannot be claimed by anyone.
+ClaimAttempt = Callable[[str], Awaitable[dict]]
+
+
+class ClaimWindow:
+    """Claimants collected for one post while its window is open"""
+
+    def __init__(self):
+        self.claimants = []  # user IDs in arrival order
+        self.outcomes = {}  # user ID -> future resolved with the claimed post
+
+
+class ClaimQueue:
+    """Per-post claim windows and standby lists"""
+
+    def __init__(
+        self,
+        window_seconds: float = 0,
+        mode: str = FIFO,
+        max_standby: int = 50,
+        standby_ttl: float = 24 * 3600
+    ):
+        if mode not in CLAIM_MODES:
+            raise ValueError(f"Unknown claim window mode: {mode}")
+        self.window_seconds = window_seconds
+        self.mode = mode
+        self.max_standby = max_standby
+        self._windows = {}  # post ID -> open ClaimWindow
+        self._tasks = set()  # window closers, referenced until they finish
+        # post ID -> user IDs waiting to be promoted, present while the
+        # post is claimed by a window winner
+        self._standby = TTLCache(maxsize=4096, ttl=standby_ttl)
+        self.windows_opened = 0
+        self.rejected_in_memory = 0
+        self.promotions = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.window_seconds > 0
+
+    async def claim(self, post_id: str, user_id: str, attempt: ClaimAttempt) -> dict:
+        """Queue a claim and wait for its outcome"""
+        standby = self._standby.get(post_id)
+        if standby is not None:
+            # A winner already holds the post; no need to ask the database
+            if user_id not in standby and len(standby) < self.max_standby:
+                standby.append(user_id)
+            self.rejected_in_memory += 1
+            raise HTTPException(status_code=400, detail=ALREADY_CLAIMED)
+
+        window = self._windows.get(post_id)
+        if window is None:
+            window = self._windows[post_id] = ClaimWindow()
+            self.windows_opened += 1
+            task = asyncio.create_task(self._close(post_id, window, attempt))
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+
+        outcome = window.outcomes.get(user_id)
+        if outcome is None:
+            window.claimants.append(user_id)
+            outcome = window.outcomes[user_id] = asyncio.get_running_loop().create_future()
+        # A client disconnecting must not cancel the shared outcome
+        return await asyncio.shield(outcome)
+
+    async def _close(self, post_id: str, window: ClaimWindow, attempt: ClaimAttempt):
+        await asyncio.sleep(self.window_seconds)
+        del self._windows[post_id]
+
+        order = list(window.claimants)
+        if self.mode == LOTTERY:
+            random.shuffle(order)
+
+        try:
+            winner, standby = await self._first_eligible(order, attempt, window.outcomes)
+        except Exception as e:
+            # Nobody can claim the post, so every remaining claimant gets the same error
+            for outcome in window.outcomes.values():
+                if not outcome.done():
+                    outcome.set_exception(e)
+            return
+
+        self._standby.set(post_id, standby)
+        for user_id in standby:
+            self.rejected_in_memory += 1
+            window.outcomes[user_id].set_exception(
+                HTTPException(status_code=400, detail=ALREADY_CLAIMED)
+            )
+
+    async def _first_eligible(self, order: list, attempt: ClaimAttempt, outcomes: dict = None):
+        """
+        Try claimants in order until one claim is written. Returns the
+        winner's post and the claimants left behind it.
+        """
+        while order:
+            user_id = order.pop(0)
+            try:
+                post = await attempt(user_id)
+            except ClaimantIneligible as e:
+                if outcomes is not None:
+                    outcomes[user_id].set_exception(e.error)
+                continue
+            if outcomes is not None:
+                outcomes[user_id].set_result(post)
+            return post, order
+        raise HTTPException(status_code=400, detail="Post is not available to claim")
+
+    async def promote(self, post_id: str, attempt: ClaimAttempt) -> Optional[dict]:
+        """
+        Called after a window winner releases a post. Claims it for the next
+        eligible standby claimant and returns the claimed post, or returns
+        None when nobody is waiting.
+        """
+        standby = self._standby.get(post_id)
+        self._standby.invalidate(post_id)
+        if not standby:
+            return None
+
+        try:
+            post, standby = await self._first_eligible(list(standby), attempt)
+        except HTTPException:
+            return None
+
+        self._standby.set(post_id, standby)
+        self.promotions += 1
+        return post
+
+    def forget(self, post_id: str):
+        """Drop the standby list of a post that no longer exists"""
+        self._standby.invalidate(post_id)
+
+    def forget_all(self):
+        """Drop every standby list, e.g. after claims were released in bulk"""
+        self._standby.clear()
+
+    def stats(self) -> dict:
+        return {
+            "enabled": self.enabled,
+            "window_seconds": self.window_seconds,
+            "mode": self.mode,
+            "open_windows": len(self._windows),
+            "standby_posts": self._standby.stats()["size"],
+            "windows_opened": self.windows_opened,
+            "rejected_in_memory": self.rejected_in_memory,
+            "promotions": self.promotions,
+        }
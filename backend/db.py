@@ -10,7 +10,12 @@ load_dotenv(dotenv_path=ENV_PATH)
 db_client = None
 database = None
 
-async def connect_db():
+async def connect_db(require_unique_indexes: bool = True):
+    """
+    Connect to MongoDB and apply the INDEXES registry. Unless
+    require_unique_indexes is False (e.g. for maintenance commands that
+    repair the data first), fails when a unique index is not in place.
+    """
     global db_client, database
 
     mongodb_url = os.getenv("MONGODB_URL")
@@ -32,6 +37,220 @@ async def connect_db():
         print("✗ Failed to connect to MongoDB:", e)
         raise
 
+    check_transactions_supported(await database.command("hello"))
+
+    report = await ensure_indexes(dry_run=os.getenv("INDEX_MODE", "apply") == "report")
+    if require_unique_indexes:
+        check_unique_indexes(report)
+
+
+# Declared indexes, applied idempotently by ensure_indexes() at startup.
+# Each spec holds the index "keys" plus any create_index options.
+INDEXES = {
+    "posts": [
+        # Catalog listing: GET /posts with no filters, newest first
+        {
+            "name": "posts_created",
+            "keys": [("created_at", -1), ("_id", -1)]
+        },
+        # Catalog tabs: GET /posts filtered by category and status
+        {
+            "name": "posts_category_status_created",
+            "keys": [("category", 1), ("status", 1), ("created_at", -1), ("_id", -1)]
+        },
+        {
+            "name": "posts_status_created",
+            "keys": [("status", 1), ("created_at", -1), ("_id", -1)]
+        },
+        # Profile pages: a user's own and claimed posts
+        {
+            "name": "posts_owner_created",
+            "keys": [("owner_id", 1), ("created_at", -1), ("_id", -1)]
+        },
+        {
+            "name": "posts_claimer_created",
+            "keys": [("claimed_by", 1), ("created_at", -1), ("_id", -1)]
+        },
+        # Claim expiry sweep; only claimed posts are indexed
+        {
+            "name": "posts_claimed_at",
+            "keys": [("claimed_at", 1)],
+            "partialFilterExpression": {"status": "claimed"}
+        },
+        # GET /posts?near= proximity search; posts without coordinates are skipped
+        {
+            "name": "posts_geo",
+            "keys": [("coordinates", "2dsphere")]
+        },
+        # Full-text search, title matches rank highest
+        {
+            "name": "posts_text",
+            "keys": [("item_title", "text"), ("description", "text"), ("category", "text")],
+            "weights": {"item_title": 10, "category": 5, "description": 1}
+        },
+    ],
+    # Finished posts moved out of the hot collection by archive_post()
+    "posts_archive": [
+        # Archived posts are removed after ARCHIVE_RETENTION_DAYS
+        {
+            "name": "posts_archive_ttl",
+            "keys": [("archived_at", 1)],
+            "expireAfterSeconds": int(float(os.getenv("ARCHIVE_RETENTION_DAYS", "365")) * 86400)
+        },
+        # Owner and claimer history, most recently archived first
+        {
+            "name": "posts_archive_owner_archived",
+            "keys": [("owner_id", 1), ("archived_at", -1), ("_id", -1)]
+        },
+        {
+            "name": "posts_archive_claimer_archived",
+            "keys": [("claimed_by", 1), ("archived_at", -1), ("_id", -1)]
+        },
+    ],
+    "reviews": [
+        # Reviews received by a poster, newest first
+        {
+            "name": "reviews_poster_created",
+            "keys": [("poster_id", 1), ("created_at", -1), ("_id", -1)]
+        },
+        # One review per reviewer and post
+        {
+            "name": "reviews_reviewer_post",
+            "keys": [("reviewer_id", 1), ("post_id", 1)],
+            "unique": True
+        },
+    ],
+}
+
+
+# Index options compared against existing indexes, with the value an index
+# has when the option is not set
+COMPARED_OPTIONS = {
+    "unique": False,
+    "expireAfterSeconds": None,
+    "partialFilterExpression": None,
+    "weights": None,
+}
+
+
+def _same_keys(spec_keys: list, existing_keys: list) -> bool:
+    # Text indexes are stored under internal _fts/_ftsx keys, so only the
+    # name (and their weights option) can be compared for them
+    if any(direction == "text" for _, direction in spec_keys):
+        return True
+    return [(field, direction) for field, direction in spec_keys] == \
+        [(field, direction) for field, direction in existing_keys]
+
+
+def _changed_options(spec: dict, existing: dict) -> list:
+    """Names of the compared options whose existing value differs from the spec"""
+    return [
+        option for option, default in COMPARED_OPTIONS.items()
+        if spec.get(option, default) != existing.get(option, default)
+    ]
+
+
+async def ensure_indexes(dry_run: bool = False) -> list:
+    """
+    Apply the INDEXES registry to the database.
+
+    Indexes that already exist are left alone, so this is safe to run on
+    every startup. An existing index whose keys or options differ from its
+    spec is reported as a conflict, except that a changed TTL alone is
+    applied in place with collMod. With dry_run=True nothing is changed and
+    the returned report only lists what would change. Each report entry is
+    a dict with collection, name and action ("exists", "missing",
+    "created", "updated", "conflict" or "failed").
+    """
+    report = []
+
+    for collection_name, specs in INDEXES.items():
+        collection = database[collection_name]
+        existing = await collection.index_information()
+
+        for spec in specs:
+            options = {k: v for k, v in spec.items() if k != "keys"}
+            entry = {"collection": collection_name, "name": spec["name"]}
+
+            if spec["name"] in existing:
+                current = existing[spec["name"]]
+                changed = _changed_options(spec, current)
+                if not _same_keys(spec["keys"], current["key"]):
+                    entry["action"] = "conflict"
+                    entry["error"] = "keys differ"
+                elif not changed:
+                    entry["action"] = "exists"
+                elif changed == ["expireAfterSeconds"] and not dry_run:
+                    try:
+                        await database.command(
+                            "collMod", collection_name,
+                            index={"name": spec["name"], "expireAfterSeconds": spec["expireAfterSeconds"]}
+                        )
+                        entry["action"] = "updated"
+                    except Exception as e:
+                        entry["action"] = "failed"
+                        entry["error"] = str(e)
+                else:
+                    entry["action"] = "conflict"
+                    entry["error"] = f"{', '.join(changed)} differ"
+            elif dry_run:
+                entry["action"] = "missing"
+            else:
+                try:
+                    await collection.create_index(spec["keys"], **options)
+                    entry["action"] = "created"
+                except Exception as e:
+                    entry["action"] = "failed"
+                    entry["error"] = str(e)
+
+            report.append(entry)
+
+    for entry in report:
+        if entry["action"] != "exists":
+            print(f"Index {entry['collection']}.{entry['name']}: {entry['action']}"
+                  + (f" ({entry['error']})" if "error" in entry else ""))
+
+    return report
+
+
+def check_transactions_supported(hello: dict):
+    """
+    Raise unless the server is a replica set member or a mongos. Archiving
+    posts and writing reviews use transactions, which a standalone mongod
+    does not support, so every such request would fail.
+    """
+    if "setName" in hello or hello.get("msg") == "isdbgrid":
+        return
+    raise Exception(
+        "MongoDB must run as a replica set (transactions are required). "
+        "Atlas clusters already are; for a local server start mongod with "
+        "--replSet rs0 and run rs.initiate() once."
+    )
+
+
+def check_unique_indexes(report: list):
+    """
+    Raise when a unique index from the registry is not in place. Writes rely
+    on them instead of reading first (e.g. one review per reviewer and post),
+    so serving without them would silently drop the rule.
+    """
+    unique_names = {
+        (collection_name, spec["name"])
+        for collection_name, specs in INDEXES.items()
+        for spec in specs if spec.get("unique")
+    }
+    missing = [
+        entry for entry in report
+        if (entry["collection"], entry["name"]) in unique_names
+        and entry["action"] not in ("exists", "created", "updated")
+    ]
+    if missing:
+        names = ", ".join(f"{entry['collection']}.{entry['name']} ({entry['action']})" for entry in missing)
+        raise Exception(
+            f"Unique indexes are not in place: {names}. Remove duplicates first "
+            "(python dedupe_reviews.py) and start with INDEX_MODE=apply."
+        )
+
 
 async def close_db():
     global db_client
@@ -52,6 +271,16 @@ def get_posts_collection():
         raise Exception("Database is not initialized.")
     return database["posts"]
 
+def get_posts_archive_collection():
+    if database is None:
+        raise Exception("Database is not initialized.")
+    return database["posts_archive"]
+
+def get_db_client():
+    if db_client is None:
+        raise Exception("Database is not initialized.")
+    return db_client
+
 def get_reviews_collection():
     if database is None:
         raise Exception("Database is not initialized.")
@@ -0,0 +1,86 @@
+"""
+Remove duplicate reviews so the unique reviews_reviewer_post index can be
+built.
+
+Reviews submitted before the index existed may include several reviews by
+the same reviewer for the same post. The oldest one is kept and the rest
+are deleted. The posters whose reviews were removed then have their
+reputation recomputed, and the index is created.
+
+    python dedupe_reviews.py --report   # list duplicates only
+    python dedupe_reviews.py            # remove them and build the index
+"""
+import argparse
+import asyncio
+import json
+import db
+from reputation import recompute_poster_reputation
+
+# Review IDs removed per delete_many
+DELETE_BATCH_SIZE = 1000
+
+
+async def find_duplicates() -> list:
+    """
+    Reviews sharing a reviewer and post, grouped with one aggregation. Each
+    group lists its review IDs oldest first.
+    """
+    pipeline = [
+        {"$sort": {"created_at": 1, "_id": 1}},
+        {"$group": {
+            "_id": {"reviewer_id": "$reviewer_id", "post_id": "$post_id"},
+            "poster_id": {"$first": "$poster_id"},
+            "review_ids": {"$push": "$_id"}
+        }},
+        {"$match": {"review_ids.1": {"$exists": True}}}
+    ]
+    cursor = db.database.reviews.aggregate(pipeline, allowDiskUse=True)
+    return await cursor.to_list(length=None)
+
+
+async def dedupe(write: bool) -> dict:
+    """Keep the oldest review of every duplicate group; returns the run totals"""
+    groups = await find_duplicates()
+    extra_ids = []
+    for group in groups:
+        extra_ids.extend(group["review_ids"][1:])
+        print(json.dumps({
+            **group["_id"],
+            "kept": group["review_ids"][0],
+            "removed": group["review_ids"][1:]
+        }, default=str))
+
+    totals = {"duplicate_groups": len(groups), "duplicates": len(extra_ids), "removed": 0}
+    if not write or not extra_ids:
+        return totals
+
+    for start in range(0, len(extra_ids), DELETE_BATCH_SIZE):
+        batch = extra_ids[start:start + DELETE_BATCH_SIZE]
+        result = await db.database.reviews.delete_many({"_id": {"$in": batch}})
+        totals["removed"] += result.deleted_count
+
+    # The removed reviews were counted in their posters' reputation
+    for poster_id in sorted({group["poster_id"] for group in groups}):
+        await recompute_poster_reputation(poster_id)
+
+    return totals
+
+
+async def main():
+    parser = argparse.ArgumentParser(description="Remove duplicate reviews and build the unique review index")
+    parser.add_argument("--report", action="store_true", help="only list duplicates, change nothing")
+    args = parser.parse_args()
+
+    # The unique index cannot exist yet while duplicates remain
+    await db.connect_db(require_unique_indexes=False)
+    try:
+        totals = await dedupe(not args.report)
+        if not args.report:
+            db.check_unique_indexes(await db.ensure_indexes())
+        print(json.dumps(totals))
+    finally:
+        await db.close_db()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,107 @@
+"""
+In-process publish/subscribe for live catalog updates.
+"""
+import asyncio
+import json
+from typing import Iterable, Optional, Set
+
+# Events buffered per client before it is treated as a slow consumer
+DEFAULT_QUEUE_SIZE = 64
+
+# Seconds between SSE comments that keep idle connections open
+HEARTBEAT_SECONDS = 15
+
+
+class Subscription:
+    """One client's bounded event queue"""
+
+    def __init__(self, categories: Optional[Set[str]], queue_size: int):
+        self.categories = categories
+        self.queue = asyncio.Queue(maxsize=queue_size)
+        self.evicted = False
+
+
+class EventBroker:
+    """
+    Fans published events out to subscribers, optionally filtered by category.
+
+    Subscribers are indexed by category so a publish only touches clients
+    interested in it, and an idle client costs one empty queue. A client
+    whose queue is full is evicted instead of slowing down the publisher.
+    """
+
+    def __init__(self, queue_size: int = DEFAULT_QUEUE_SIZE):
+        self.queue_size = queue_size
+        self._all = set()  # subscribers to every category
+        self._by_category = {}  # category -> set of subscribers
+        self.published = 0
+        self.evictions = 0
+
+    def subscribe(self, categories: Optional[Iterable[str]] = None) -> Subscription:
+        categories = set(categories) if categories else None
+        subscription = Subscription(categories, self.queue_size)
+        if categories is None:
+            self._all.add(subscription)
+        else:
+            for category in categories:
+                self._by_category.setdefault(category, set()).add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription):
+        if subscription.categories is None:
+            self._all.discard(subscription)
+            return
+        for category in subscription.categories:
+            subscribers = self._by_category.get(category)
+            if subscribers is None:
+                continue
+            subscribers.discard(subscription)
+            if not subscribers:
+                del self._by_category[category]
+
+    def publish(self, event: dict, categories: Iterable[Optional[str]] = ()):
+        """Deliver an event to everyone subscribed to any of its categories"""
+        targets = set(self._all)
+        for category in categories:
+            targets |= self._by_category.get(category, set())
+
+        for subscription in targets:
+            try:
+                subscription.queue.put_nowait(event)
+            except asyncio.QueueFull:
+                self._evict(subscription)
+        self.published += 1
+
+    def _evict(self, subscription: Subscription):
+        self.unsubscribe(subscription)
+        subscription.evicted = True
+        self.evictions += 1
+        # Replace the backlog with a single end-of-stream marker
+        while not subscription.queue.empty():
+            subscription.queue.get_nowait()
+        subscription.queue.put_nowait(None)
+
+    @property
+    def subscriber_count(self) -> int:
+        unique = set(self._all)
+        for subscribers in self._by_category.values():
+            unique |= subscribers
+        return len(unique)
+
+    async def sse_stream(self, subscription: Subscription, heartbeat: float = HEARTBEAT_SECONDS):
+        """Yield a subscription's events in Server-Sent Events format"""
+        try:
+            yield "retry: 5000\n\n"
+            while True:
+                try:
+                    event = await asyncio.wait_for(subscription.queue.get(), timeout=heartbeat)
+                except asyncio.TimeoutError:
+                    yield ": keep-alive\n\n"
+                    continue
+                if event is None:
+                    # Evicted as a slow consumer; the client reconnects and refetches
+                    yield "event: evicted\ndata: {}\n\n"
+                    break
+                yield f"event: {event['type']}\ndata: {json.dumps(event, default=str)}\n\n"
+        finally:
+            self.unsubscribe(subscription)
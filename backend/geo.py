@@ -0,0 +1,61 @@
+"""
+Offline place-name lookup used to place posts on the map.
+"""
+import csv
+import os
+from functools import lru_cache
+from typing import Dict, Optional, Tuple
+
+GAZETTEER_PATH = os.getenv(
+    "GAZETTEER_PATH",
+    os.path.join(os.path.dirname(__file__), "data", "gazetteer.csv")
+)
+
+
+@lru_cache()
+def load_gazetteer(path: str = GAZETTEER_PATH) -> Dict[str, Tuple[float, float]]:
+    """Load the gazetteer CSV (name,lat,lng) into a name -> (lat, lng) map"""
+    places = {}
+    try:
+        with open(path, newline="", encoding="utf-8") as f:
+            for row in csv.DictReader(f):
+                places[row["name"].strip().lower()] = (float(row["lat"]), float(row["lng"]))
+    except FileNotFoundError:
+        print(f"Gazetteer not found at {path}, text locations will not be geocoded")
+    return places
+
+
+def resolve_location(location: str) -> Optional[Tuple[float, float]]:
+    """
+    Resolve free-text location to (lat, lng) using the gazetteer.
+    Tries the whole text first, then each comma-separated part, so
+    "12 Main St, Cambridge, Massachusetts" resolves to Cambridge.
+    """
+    if not location:
+        return None
+    places = load_gazetteer()
+    candidates = [location] + location.split(",")
+    for candidate in candidates:
+        point = places.get(candidate.strip().lower())
+        if point:
+            return point
+    return None
+
+
+def to_geojson(lat: float, lng: float) -> dict:
+    """GeoJSON point as stored on post documents (longitude first)"""
+    return {"type": "Point", "coordinates": [lng, lat]}
+
+
+def parse_point(value: str) -> Tuple[float, float]:
+    """
+    Parse a "lat,lng" query parameter.
+    Raises ValueError if it is malformed or out of range.
+    """
+    try:
+        lat, lng = (float(part) for part in value.split(","))
+    except Exception as e:
+        raise ValueError("near must be formatted as lat,lng") from e
+    if not -90 <= lat <= 90 or not -180 <= lng <= 180:
+        raise ValueError("near is out of range")
+    return lat, lng
@@ -15,17 +15,25 @@ load_dotenv(dotenv_path=ENV_PATH)
 import db
 
 # Import routers
-from routes.posts import router as posts_router
+from routes.posts import router as posts_router, release_stale_claims, start_legacy_claim_clocks
 from routes.reviews import router as reviews_router
 from routes.users import router as users_router
+from scheduler import PeriodicJob
+
+# Seconds between sweeps that release stale claims
+CLAIM_SWEEP_SECONDS = float(os.getenv("CLAIM_SWEEP_SECONDS", "600"))
 
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     print("Starting GoodFinds API...")
     await db.connect_db()
+    await start_legacy_claim_clocks()
+    claim_expiry = PeriodicJob("release_stale_claims", CLAIM_SWEEP_SECONDS, release_stale_claims)
+    claim_expiry.start()
     yield
     print("Shutting down GoodFinds API")
+    await claim_expiry.stop()
     await db.close_db()
 
 
@@ -49,6 +57,8 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    # Let browsers read the pagination cursor and cache validators
+    expose_headers=["X-Next-Cursor", "ETag"],
 )
 
 # Register routers
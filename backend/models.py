@@ -1,5 +1,5 @@
 from pydantic import BaseModel, Field, field_validator
-from typing import List, Optional
+from typing import Dict, List, Literal, Optional
 from datetime import datetime
 
 
@@ -9,6 +9,13 @@ class User(BaseModel):
     email: str
     reputation: float = 0.0
     review_count: int = 0
+    # Number of reviews per star rating, keyed "1" to "5"
+    rating_histogram: Dict[str, int] = {}
+
+
+class Coordinates(BaseModel):
+    lat: float = Field(..., ge=-90, le=90)
+    lng: float = Field(..., ge=-180, le=180)
 
 
 class Post(BaseModel):
@@ -22,7 +29,53 @@ class Post(BaseModel):
     condition: str
     location: str
     claimed_by: Optional[str] = None
+    # When the current claim was made; stale claims are released automatically
+    claimed_at: Optional[datetime] = None
     status: str
+    coordinates: Optional[Coordinates] = None
+    # Incremented on every change; send it in If-Match when updating
+    version: int = 0
+    # Only filled in for GET /posts?near= queries
+    distance_km: Optional[float] = None
+    # Only filled in when requested with include=owner_reputation
+    owner_reputation: Optional[float] = None
+    owner_review_count: Optional[int] = None
+
+
+class ArchivedPost(Post):
+    """A finished post kept in the archive"""
+    archived_at: datetime
+    # picked_up, missing or deleted
+    archive_reason: str
+
+
+class PartialPost(BaseModel):
+    """Post restricted to the fields requested with a sparse fieldset"""
+    id: str
+    item_title: Optional[str] = None
+    description: Optional[str] = None
+    owner_id: Optional[str] = None
+    created_at: Optional[datetime] = None
+    images: Optional[List[str]] = None
+    category: Optional[str] = None
+    condition: Optional[str] = None
+    location: Optional[str] = None
+    claimed_by: Optional[str] = None
+    claimed_at: Optional[datetime] = None
+    status: Optional[str] = None
+    coordinates: Optional[Coordinates] = None
+    version: Optional[int] = None
+    distance_km: Optional[float] = None
+    owner_reputation: Optional[float] = None
+    owner_review_count: Optional[int] = None
+
+
+class PostFacets(BaseModel):
+    """Post counts per category, status and condition for a filter"""
+    total: int
+    category: Dict[str, int]
+    status: Dict[str, int]
+    condition: Dict[str, int]
 
 
 class Review(BaseModel):
@@ -35,6 +88,17 @@ class Review(BaseModel):
     created_at: datetime
 
 
+class PartialReview(BaseModel):
+    """Review restricted to the fields requested with a sparse fieldset"""
+    id: str
+    reviewer_id: Optional[str] = None
+    poster_id: Optional[str] = None
+    post_id: Optional[str] = None
+    rating: Optional[float] = None
+    comment: Optional[str] = None
+    created_at: Optional[datetime] = None
+
+
 class CreatePostRequest(BaseModel):
     item_title: str = Field(..., min_length=1, max_length=100)
     description: Optional[str] = None
@@ -42,6 +106,7 @@ class CreatePostRequest(BaseModel):
     category: Optional[str] = None
     condition: str
     location: str
+    coordinates: Optional[Coordinates] = None
 
     @field_validator('item_title')
     @classmethod
@@ -72,6 +137,7 @@ class UpdatePostRequest(BaseModel):
     category: Optional[str] = None
     condition: Optional[str] = None
     location: Optional[str] = None
+    coordinates: Optional[Coordinates] = None
 
 
 class CreateReviewRequest(BaseModel):
@@ -79,3 +145,54 @@ class CreateReviewRequest(BaseModel):
     post_id: str
     rating: float = Field(..., ge=1.0, le=5.0)
     comment: Optional[str] = None
+
+
+class UserIdsRequest(BaseModel):
+    ids: List[str] = Field(..., min_length=1, max_length=500)
+
+
+class BulkCreatePostsRequest(BaseModel):
+    # Items are validated one by one so a bad item only fails itself
+    posts: List[dict] = Field(..., min_length=1, max_length=50)
+
+
+class BulkPostResult(BaseModel):
+    """Outcome of one item in a bulk request, in request order"""
+    index: int
+    post: Optional[Post] = None
+    error: Optional[str] = None
+
+
+class BulkCreatePostsResponse(BaseModel):
+    created: int
+    failed: int
+    results: List[BulkPostResult]
+
+
+class PostBatchOperation(BaseModel):
+    op: Literal["delete", "update"]
+    post_id: str
+    # Fields to change, as in PUT /posts/{id}; only used by updates
+    fields: Optional[dict] = None
+    # Only apply the operation if the post still has this version
+    version: Optional[int] = None
+
+
+class PostBatchRequest(BaseModel):
+    operations: List[PostBatchOperation] = Field(..., min_length=1, max_length=100)
+
+
+class PostBatchResult(BaseModel):
+    """Outcome of one operation in a batch, in request order"""
+    index: int
+    op: str
+    post_id: str
+    ok: bool = False
+    post: Optional[Post] = None
+    error: Optional[str] = None
+
+
+class PostBatchResponse(BaseModel):
+    succeeded: int
+    failed: int
+    results: List[PostBatchResult]
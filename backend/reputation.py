@@ -0,0 +1,151 @@
+"""
+Poster reputation: the incremental update applied with each new review,
+and full recomputes from the reviews collection for repairs and backfills.
+"""
+from typing import Dict, Iterable, List
+from pymongo import UpdateOne
+import db
+from utils import full_histogram
+
+# Star bucket of a review's rating in aggregation expressions; ratings are
+# rounded half up, matching rating_bucket()
+RATING_BUCKET_EXPR = {"$toString": {"$toInt": {"$floor": {"$add": ["$rating", 0.5]}}}}
+
+
+def rating_bucket(rating: float) -> str:
+    """The rating_histogram bucket ("1" to "5") a rating is counted in"""
+    return str(min(5, max(1, int(rating + 0.5))))
+
+
+def reputation_update(rating: float) -> list:
+    """
+    Update pipeline adding one rating to a user's running totals and
+    deriving reputation from them, so a new review costs the same however
+    many reviews the poster already has.
+    
+    Users written before the totals existed only have reputation and
+    review_count; their rating_sum is seeded from those first. Their
+    rating_histogram only counts new reviews until the backfill rebuilds it.
+    """
+    bucket = rating_bucket(rating)
+    return [
+        {"$set": {
+            "rating_sum": {"$add": [
+                {"$ifNull": [
+                    "$rating_sum",
+                    {"$multiply": [{"$ifNull": ["$reputation", 0]}, {"$ifNull": ["$review_count", 0]}]}
+                ]},
+                rating
+            ]},
+            "review_count": {"$add": [{"$ifNull": ["$review_count", 0]}, 1]},
+            "rating_histogram": {"$mergeObjects": [
+                {"$ifNull": ["$rating_histogram", {}]},
+                {bucket: {"$add": [{"$ifNull": [f"$rating_histogram.{bucket}", 0]}, 1]}}
+            ]}
+        }},
+        {"$set": {
+            "reputation": {"$round": [{"$divide": ["$rating_sum", "$review_count"]}, 2]}
+        }}
+    ]
+
+
+def reputation_pipeline(poster_ids: List[str]) -> list:
+    """
+    Aggregation totalling the reviews of the given posters on the server,
+    served by the reviews_poster_created index. Posters without reviews
+    are absent from the output.
+    """
+    return [
+        {"$match": {"poster_id": {"$in": poster_ids}}},
+        {"$group": {
+            "_id": {"poster_id": "$poster_id", "bucket": RATING_BUCKET_EXPR},
+            "rating_sum": {"$sum": "$rating"},
+            "review_count": {"$sum": 1}
+        }},
+        {"$group": {
+            "_id": "$_id.poster_id",
+            "rating_sum": {"$sum": "$rating_sum"},
+            "review_count": {"$sum": "$review_count"},
+            "rating_histogram": {"$push": {"k": "$_id.bucket", "v": "$review_count"}}
+        }},
+        {"$set": {"rating_histogram": {"$arrayToObject": "$rating_histogram"}}}
+    ]
+
+
+def reputation_fields(totals: dict = None) -> dict:
+    """The stored reputation fields for a poster's review totals"""
+    rating_sum = totals["rating_sum"] if totals else 0
+    review_count = totals["review_count"] if totals else 0
+    return {
+        "rating_sum": rating_sum,
+        "review_count": review_count,
+        "reputation": round(rating_sum / review_count, 2) if review_count else 0.0,
+        "rating_histogram": full_histogram(totals.get("rating_histogram") if totals else None)
+    }
+
+
+async def compute_reputations(poster_ids: Iterable[str]) -> Dict[str, dict]:
+    """Recompute the reputation fields of several posters with one aggregation"""
+    ids = list(dict.fromkeys(poster_ids))
+    if not ids:
+        return {}
+    
+    cursor = db.database.reviews.aggregate(reputation_pipeline(ids))
+    totals = {doc["_id"]: doc for doc in await cursor.to_list(length=len(ids))}
+    return {poster_id: reputation_fields(totals.get(poster_id)) for poster_id in ids}
+
+
+async def recompute_poster_reputation(poster_id: str) -> dict:
+    """
+    Rebuild one poster's reputation from their reviews, for when the
+    incrementally maintained totals can't be trusted. Returns the new fields.
+    """
+    fields = (await compute_reputations([poster_id]))[poster_id]
+    await db.database.users.update_one({"_id": poster_id}, {"$set": fields}, upsert=True)
+    return fields
+
+
+def reputation_drift(user: dict, expected: dict) -> dict:
+    """Stored fields that differ from the recomputed ones, as {field: (stored, expected)}"""
+    stored = dict(user, rating_histogram=full_histogram(user.get("rating_histogram")))
+    return {
+        field: (stored.get(field), value)
+        for field, value in expected.items()
+        if stored.get(field) != value
+    }
+
+
+async def reconcile_users(users: List[dict], write: bool = True) -> dict:
+    """
+    Compare a batch of user documents with their recomputed reputation and,
+    when write is set, correct the drifted ones with one bulk_write.
+    
+    Each correction only applies if the user's review_count is still the
+    one that was read, so a review arriving meanwhile is never overwritten;
+    such users are counted as skipped and picked up by the next run.
+    """
+    expected = await compute_reputations(user["_id"] for user in users)
+    
+    drifted = []
+    writes = []
+    for user in users:
+        drift = reputation_drift(user, expected[user["_id"]])
+        if not drift:
+            continue
+        drifted.append({"user_id": user["_id"], "drift": drift})
+        writes.append(UpdateOne(
+            {"_id": user["_id"], "review_count": user.get("review_count")},
+            {"$set": expected[user["_id"]]}
+        ))
+    
+    updated = 0
+    if write and writes:
+        result = await db.database.users.bulk_write(writes, ordered=False)
+        updated = result.matched_count
+    
+    return {
+        "checked": len(users),
+        "drifted": drifted,
+        "updated": updated,
+        "skipped": len(writes) - updated if write else 0
+    }
@@ -1,15 +1,155 @@
-from fastapi import APIRouter, HTTPException, Query, Depends
+from fastapi import APIRouter, HTTPException, Query, Depends, Header, Request, Response
+from fastapi.responses import StreamingResponse
 from bson import ObjectId
-from pydantic import BaseModel
+from pymongo import ReturnDocument, DeleteOne, UpdateOne
+from pymongo.errors import BulkWriteError, PyMongoError
+from pydantic import BaseModel, ValidationError
 from typing import List, Optional
-from datetime import datetime
-from db import get_posts_collection
-from models import Post, CreatePostRequest, UpdatePostRequest
+from datetime import datetime, timedelta
+import os
+from db import get_posts_collection, get_posts_archive_collection, get_db_client
+from events import EventBroker
+from claims import ClaimQueue, ClaimantIneligible
+from cache import (
+    TTLCache, collection_versions, make_etag, etag_matches, cache_headers, not_modified
+)
+from models import (
+    Post, ArchivedPost, PartialPost, PostFacets, Coordinates, CreatePostRequest, UpdatePostRequest,
+    BulkCreatePostsRequest, BulkPostResult, BulkCreatePostsResponse,
+    PostBatchRequest, PostBatchResult, PostBatchResponse
+)
+from geo import resolve_location, to_geojson, parse_point
 from auth import get_current_user
-from utils import post_doc_to_model
+from routes.users import get_users_by_ids
+from utils import (
+    post_doc_to_model, post_doc_to_partial, archived_post_doc_to_model, fields_to_projection,
+    encode_cursor, keyset_filter, encode_offset_cursor, decode_offset_cursor
+)
 
 router = APIRouter(prefix="/posts", tags=["posts"])
 
+# Page size bounds for listing endpoints
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 100
+
+# Sort order used for keyset pagination, newest first
+POSTS_SORT = [("created_at", -1), ("_id", -1)]
+
+# Sort order of the post archive, most recently archived first
+ARCHIVE_SORT = [("archived_at", -1), ("_id", -1)]
+
+# Documents fetched per round trip when streaming NDJSON
+STREAM_BATCH_SIZE = 200
+NDJSON_MEDIA_TYPE = "application/x-ndjson"
+
+# Search radius bounds for GET /posts?near=
+DEFAULT_RADIUS_KM = 10.0
+MAX_RADIUS_KM = 100.0
+
+# Related data that can be embedded in post listings with include=
+INCLUDE_OPTIONS = {"owner_reputation"}
+
+# Post fields that are not stored, and the query option that fills them in
+COMPUTED_FIELDS = {
+    "distance_km": "near=",
+    "owner_reputation": "include=owner_reputation",
+    "owner_review_count": "include=owner_reputation"
+}
+
+# Cached GET /posts pages and GET /posts/{id} responses. Entries are dropped
+# by post_changed() whenever a write could affect them.
+posts_cache = TTLCache(
+    maxsize=int(os.getenv("POSTS_CACHE_SIZE", "512")),
+    ttl=float(os.getenv("POSTS_CACHE_TTL", "30"))
+)
+
+
+# Fields counted by GET /posts/facets
+FACET_FIELDS = ("category", "status", "condition")
+
+# Cached GET /posts/facets results, kept current by post_changed()
+facets_cache = TTLCache(
+    maxsize=128,
+    ttl=float(os.getenv("FACETS_CACHE_TTL", "60"))
+)
+
+
+def matches_filters(filters: tuple, post: dict) -> bool:
+    """Whether a post satisfies the (field, value) filters of a cache key"""
+    return all(post.get(field) == value for field, value in filters)
+
+
+def facet_value(value) -> str:
+    return "none" if value is None else str(value)
+
+
+def adjust_facets(post: dict, delta: int):
+    """Apply one post entering (+1) or leaving (-1) to the cached facet counts"""
+    for key, counts in facets_cache.entries_where(lambda key: matches_filters(key[1], post)):
+        counts["total"] += delta
+        for field in FACET_FIELDS:
+            value = facet_value(post.get(field))
+            counts[field][value] = counts[field].get(value, 0) + delta
+            if counts[field][value] <= 0:
+                del counts[field][value]
+
+
+# Live feed of catalog changes served by GET /posts/stream
+post_events = EventBroker()
+
+# Optional claim windows for contended posts, off unless CLAIM_WINDOW_SECONDS is set
+claim_queue = ClaimQueue(
+    window_seconds=float(os.getenv("CLAIM_WINDOW_SECONDS", "0")),
+    mode=os.getenv("CLAIM_WINDOW_MODE", "fifo")
+)
+
+# Claims older than this are released by release_stale_claims()
+CLAIM_EXPIRY_HOURS = float(os.getenv("CLAIM_EXPIRY_HOURS", "72"))
+
+
+def post_changed(event: str, before: Optional[dict] = None, after: Optional[dict] = None):
+    """
+    Called after every posts write with the post as it was before and/or
+    after the change. Invalidates affected cached reads, updates cached
+    facet counts, moves the posts ETag on and publishes the change to live
+    feed subscribers.
+    """
+    collection_versions.bump("posts")
+    
+    for post in (before, after):
+        if not post:
+            continue
+        posts_cache.invalidate(("post", str(post["_id"])))
+        posts_cache.invalidate_where(
+            lambda key: key[0] == "list" and matches_filters(key[1], post)
+        )
+    
+    # Facet counts are cheap to patch, so they are updated instead of dropped
+    if before:
+        adjust_facets(before, -1)
+    if after:
+        adjust_facets(after, 1)
+    
+    current = after or before
+    if after is None:
+        claim_queue.forget(str(current["_id"]))
+    post_events.publish(
+        {
+            "type": event,
+            "post_id": str(current["_id"]),
+            "status": after.get("status") if after else None,
+            "post": post_doc_to_model(after).model_dump(mode="json") if after else None
+        },
+        categories={post.get("category") for post in (before, after) if post}
+    )
+
+
+def parse_post_id(post_id: str) -> ObjectId:
+    """Convert a post ID path parameter to an ObjectId, or fail with 400"""
+    if not ObjectId.is_valid(post_id):
+        raise HTTPException(status_code=400, detail="Invalid post ID")
+    return ObjectId(post_id)
+
 
 async def get_post_by_id(post_id: str):
     """Helper function to get a post by ID with validation"""
@@ -25,6 +165,87 @@ async def get_post_by_id(post_id: str):
     return post
 
 
+def parse_include(include: Optional[str]) -> set:
+    """Parse the include= parameter of post listings"""
+    if not include:
+        return set()
+    options = {option.strip() for option in include.split(",") if option.strip()}
+    unknown = options - INCLUDE_OPTIONS
+    if unknown:
+        raise HTTPException(status_code=400, detail=f"Unknown include: {', '.join(sorted(unknown))}")
+    return options
+
+
+async def convert_posts(post_docs: list, field_names: Optional[List[str]] = None, include: set = frozenset()) -> list:
+    """
+    Convert post documents to response models, embedding owner reputation
+    with one batched users query when requested.
+    """
+    if field_names is not None:
+        models = [post_doc_to_partial(post, field_names) for post in post_docs]
+    else:
+        models = [post_doc_to_model(post) for post in post_docs]
+    
+    for model, post in zip(models, post_docs):
+        if "distance_km" in post:
+            model.distance_km = round(post["distance_km"], 3)
+    
+    if "owner_reputation" in include:
+        owners = await get_users_by_ids(post["owner_id"] for post in post_docs)
+        for model, post in zip(models, post_docs):
+            owner = owners.get(post["owner_id"], {})
+            model.owner_reputation = owner.get("reputation", 0.0)
+            model.owner_review_count = owner.get("review_count", 0)
+    
+    return models
+
+
+async def stream_posts(db_cursor, field_names: Optional[List[str]] = None, include: set = frozenset()):
+    """Yield posts from a cursor as NDJSON lines, one batch in memory at a time"""
+    batch = []
+    async for post in db_cursor:
+        batch.append(post)
+        if len(batch) < STREAM_BATCH_SIZE:
+            continue
+        for model in await convert_posts(batch, field_names, include):
+            yield model.model_dump_json(exclude_unset=True) + "\n"
+        batch = []
+    
+    for model in await convert_posts(batch, field_names, include):
+        yield model.model_dump_json(exclude_unset=True) + "\n"
+
+
+def near_pipeline(point: tuple, radius_km: float, query: dict, projection: Optional[dict]) -> list:
+    """Aggregation stages returning posts within radius_km of point, nearest first"""
+    lat, lng = point
+    pipeline = [{
+        "$geoNear": {
+            "near": to_geojson(lat, lng),
+            "distanceField": "distance_km",
+            "distanceMultiplier": 0.001,
+            "maxDistance": radius_km * 1000,
+            "query": query,
+            "spherical": True
+        }
+    }]
+    if projection is not None:
+        pipeline.append({"$project": dict(aggregation_projection(projection), distance_km=1)})
+    return pipeline
+
+
+def aggregation_projection(projection: dict) -> dict:
+    """
+    Rewrite a find() projection for a $project stage, where $slice is the
+    aggregation expression and needs the array as its first argument.
+    """
+    stage = {}
+    for name, value in projection.items():
+        if isinstance(value, dict) and "$slice" in value:
+            value = {"$slice": [f"${name}", *value["$slice"]]}
+        stage[name] = value
+    return stage
+
+
 # Request models
 class CreatePostRequest(BaseModel):
     item_title: str 
@@ -33,6 +254,7 @@ class CreatePostRequest(BaseModel):
     category: Optional[str] = "Other"
     condition: str = "Used"
     location: str
+    coordinates: Optional[Coordinates] = None
 
 class UpdatePostRequest(BaseModel):
     item_title: Optional[str] = None
@@ -41,87 +263,499 @@ class UpdatePostRequest(BaseModel):
     category: Optional[str] = None
     condition: Optional[str] = None
     location: Optional[str] = None
+    coordinates: Optional[Coordinates] = None
 
 
-@router.get("", response_model=List[Post])
+@router.get("", response_model=List[PartialPost], response_model_exclude_unset=True)
 async def get_all_posts(
+    request: Request,
+    response: Response,
     category: Optional[str] = Query(None),
-    status: Optional[str] = Query(None)
+    status: Optional[str] = Query(None),
+    owner_id: Optional[str] = Query(None),
+    claimed_by: Optional[str] = Query(None),
+    limit: Optional[int] = Query(None, ge=1, le=MAX_PAGE_SIZE),
+    cursor: Optional[str] = Query(None),
+    fields: Optional[str] = Query(None, description="e.g. id,item_title,images[0],status"),
+    include: Optional[str] = Query(None, description="owner_reputation"),
+    near: Optional[str] = Query(None, description="lat,lng"),
+    radius_km: float = Query(DEFAULT_RADIUS_KM, gt=0, le=MAX_RADIUS_KM),
+    accept: Optional[str] = Header(None)
 ):
-    """Get all posts with optional filters"""
+    """
+    Get posts with optional filters, newest first.
+    Results are paginated; when more posts are available the cursor for the
+    next page is returned in the X-Next-Cursor response header.
+    With fields, only the listed fields of each post are fetched and returned;
+    distance_km and the owner fields come with near= and include= instead.
+    With include=owner_reputation, each post carries its owner's reputation
+    and review count.
+    With near=lat,lng, only posts within radius_km are returned, nearest
+    first, each with its distance_km.
+    
+    Clients sending Accept: application/x-ndjson get every matching post
+    (or at most limit posts) streamed one JSON object per line instead.
+    
+    Responses carry an ETag; a matching If-None-Match gets a 304.
+    """
     posts = get_posts_collection()
     
-    query = {}
+    projection = None
+    field_names = None
+    if fields:
+        try:
+            projection, field_names = fields_to_projection(
+                fields, Post, array_fields=("images",), computed_fields=COMPUTED_FIELDS
+            )
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+        # The sort key is always needed to build the next cursor
+        projection["created_at"] = 1
+    
+    includes = parse_include(include)
+    if projection is not None and includes:
+        projection["owner_id"] = 1
+    
+    filters = {}
+    if category and category != "All":
+        filters["category"] = category
+    if status:
+        filters["status"] = status
+    if owner_id:
+        filters["owner_id"] = owner_id
+    if claimed_by:
+        filters["claimed_by"] = claimed_by
+    
+    point = None
+    if near:
+        try:
+            point = parse_point(near)
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+    
+    # Distance-ordered results are paginated by offset, the rest by keyset
+    query = dict(filters)
+    offset = 0
+    if cursor:
+        try:
+            if point:
+                offset = decode_offset_cursor(cursor)
+            else:
+                query.update(keyset_filter(cursor))
+        except ValueError:
+            raise HTTPException(status_code=400, detail="Invalid cursor")
+    
+    # Embedded owner reputations change with every new review
+    dependencies = ("reviews",) if includes else ()
+    version = collection_versions.snapshot("posts", *dependencies)
+    etag = make_etag("posts", request, *dependencies)
+    if etag_matches(request, etag):
+        return not_modified(etag)
+    
+    if accept and NDJSON_MEDIA_TYPE in accept:
+        if point:
+            pipeline = near_pipeline(point, radius_km, query, projection) + [{"$skip": offset}]
+            if limit:
+                pipeline.append({"$limit": limit})
+            db_cursor = posts.aggregate(pipeline, batchSize=STREAM_BATCH_SIZE)
+        else:
+            db_cursor = posts.find(query, projection).sort(POSTS_SORT).batch_size(STREAM_BATCH_SIZE)
+            if limit:
+                db_cursor = db_cursor.limit(limit)
+        return StreamingResponse(
+            stream_posts(db_cursor, field_names, includes),
+            media_type=NDJSON_MEDIA_TYPE,
+            headers=cache_headers(etag)
+        )
+    
+    response.headers.update(cache_headers(etag))
+    
+    limit = limit or DEFAULT_PAGE_SIZE
+    
+    cache_key = (
+        "list", tuple(sorted(filters.items())), limit, cursor,
+        tuple(field_names) if field_names else None, tuple(sorted(includes)),
+        (point, radius_km) if point else None
+    )
+    cached = posts_cache.get(cache_key)
+    if cached is not None:
+        models, next_cursor = cached
+        if next_cursor:
+            response.headers["X-Next-Cursor"] = next_cursor
+        return models
+    
+    # Fetch one extra document to know whether another page exists
+    if point:
+        pipeline = near_pipeline(point, radius_km, query, projection)
+        pipeline += [{"$skip": offset}, {"$limit": limit + 1}]
+        db_cursor = posts.aggregate(pipeline)
+    else:
+        db_cursor = posts.find(query, projection).sort(POSTS_SORT).limit(limit + 1)
+    posts_list = await db_cursor.to_list(length=limit + 1)
+    
+    next_cursor = None
+    if len(posts_list) > limit:
+        posts_list = posts_list[:limit]
+        if point:
+            next_cursor = encode_offset_cursor(offset + limit)
+        else:
+            next_cursor = encode_cursor(posts_list[-1])
+        response.headers["X-Next-Cursor"] = next_cursor
+    
+    models = await convert_posts(posts_list, field_names, includes)
+    # A write during the read already ran post_changed(), so this page may
+    # be stale; caching it would pair the old body with the new ETag
+    if collection_versions.snapshot("posts", *dependencies) == version:
+        posts_cache.set(cache_key, (models, next_cursor))
+    return models
+
+
+@router.get("/cache/stats")
+async def get_cache_stats():
+    """Hit, miss and eviction counters of the posts read cache"""
+    return posts_cache.stats()
+
+
+@router.get("/claims/stats")
+async def get_claim_stats():
+    """Claim window settings and counters"""
+    return claim_queue.stats()
+
+
+@router.get("/search", response_model=List[Post])
+async def search_posts(
+    response: Response,
+    q: str = Query(..., min_length=1, max_length=200),
+    category: Optional[str] = Query(None),
+    status: Optional[str] = Query(None),
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    cursor: Optional[str] = Query(None)
+):
+    """
+    Full-text search over post title, description and category.
+    Results are ranked by relevance and paginated like GET /posts.
+    """
+    posts = get_posts_collection()
+    
+    query = {"$text": {"$search": q}}
     if category and category != "All":
         query["category"] = category
     if status:
         query["status"] = status
     
-    cursor = posts.find(query).sort("created_at", -1)
-    posts_list = await cursor.to_list(length=None)
+    offset = 0
+    if cursor:
+        try:
+            offset = decode_offset_cursor(cursor)
+        except ValueError:
+            raise HTTPException(status_code=400, detail="Invalid cursor")
+    
+    score = {"score": {"$meta": "textScore"}}
+    db_cursor = (
+        posts.find(query, score)
+        .sort([("score", {"$meta": "textScore"}), ("_id", -1)])
+        .skip(offset)
+        .limit(limit + 1)
+    )
+    posts_list = await db_cursor.to_list(length=limit + 1)
+    
+    if len(posts_list) > limit:
+        posts_list = posts_list[:limit]
+        response.headers["X-Next-Cursor"] = encode_offset_cursor(offset + limit)
     
     return [post_doc_to_model(post) for post in posts_list]
 
 
-@router.post("", response_model=Post, status_code=201)
-async def create_post(
-    post: CreatePostRequest,
-    current_user: dict = Depends(get_current_user)
+@router.get("/facets", response_model=PostFacets)
+async def get_post_facets(
+    category: Optional[str] = Query(None),
+    status: Optional[str] = Query(None),
+    owner_id: Optional[str] = Query(None),
+    claimed_by: Optional[str] = Query(None)
 ):
-    """Create a new post (requires authentication)"""
-    posts = get_posts_collection()
+    """
+    Count posts per category, status and condition for the given filters,
+    with a single $facet aggregation.
+    """
+    filters = {}
+    if category and category != "All":
+        filters["category"] = category
+    if status:
+        filters["status"] = status
+    if owner_id:
+        filters["owner_id"] = owner_id
+    if claimed_by:
+        filters["claimed_by"] = claimed_by
+    
+    cache_key = ("facets", tuple(sorted(filters.items())))
+    counts = facets_cache.get(cache_key)
+    if counts is None:
+        version = collection_versions.snapshot("posts")
+        posts = get_posts_collection()
+        pipeline = [
+            {"$match": filters},
+            {"$facet": {
+                field: [{"$group": {"_id": f"${field}", "count": {"$sum": 1}}}]
+                for field in FACET_FIELDS
+            }}
+        ]
+        result = (await posts.aggregate(pipeline).to_list(length=1))[0]
+        counts = {
+            field: {facet_value(group["_id"]): group["count"] for group in result[field]}
+            for field in FACET_FIELDS
+        }
+        counts["total"] = sum(counts["status"].values())
+        # A write during the aggregation may be missing from the counts, and
+        # post_changed() had no entry to patch yet, so they are not cached
+        if collection_versions.snapshot("posts") == version:
+            facets_cache.set(cache_key, counts)
+    
+    return PostFacets(**counts)
 
+
+@router.get("/stream")
+async def stream_post_events(
+    category: Optional[str] = Query(None, description="Comma-separated categories to follow")
+):
+    """
+    Server-Sent Events feed of catalog changes (created, claimed, unclaimed,
+    updated, picked_up, missing, deleted). Without category, every change
+    is sent. Clients that fall too far behind receive an "evicted" event
+    and should reconnect.
+    """
+    categories = [c.strip() for c in category.split(",") if c.strip()] if category else None
+    subscription = post_events.subscribe(categories)
+    return StreamingResponse(
+        post_events.sse_stream(subscription),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+
+def build_post_doc(post: CreatePostRequest, owner_id: str) -> dict:
+    """Build the document for a new post"""
     post_doc = {
         "item_title": post.item_title,
         "description": post.description,
-        "owner_id": current_user["id"],  # Use authenticated user ID
+        "owner_id": owner_id,
         "created_at": datetime.utcnow(),
         "images": post.images if post.images else [],
         "category": post.category,
         "condition": post.condition,
         "location": post.location,
         "claimed_by": None,
-        "status": "available"
+        "status": "available",
+        "version": 1
     }
 
+    # Place the post on the map, falling back to the offline gazetteer
+    if post.coordinates:
+        post_doc["coordinates"] = to_geojson(post.coordinates.lat, post.coordinates.lng)
+    else:
+        point = resolve_location(post.location)
+        if point:
+            post_doc["coordinates"] = to_geojson(*point)
+
+    return post_doc
+
+
+@router.get("/archive", response_model=List[ArchivedPost])
+async def get_archived_posts(
+    response: Response,
+    role: str = Query("any", pattern="^(owner|claimer|any)$"),
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    cursor: Optional[str] = Query(None),
+    current_user: dict = Depends(get_current_user)
+):
+    """
+    History of the current user's finished posts, most recently archived
+    first (requires authentication). role selects posts the user owned,
+    claimed, or either. Paginated like GET /posts, with the next cursor in
+    the X-Next-Cursor response header.
+    """
+    archive = get_posts_archive_collection()
+    
+    user_id = current_user["id"]
+    if role == "owner":
+        query = {"owner_id": user_id}
+    elif role == "claimer":
+        query = {"claimed_by": user_id}
+    else:
+        query = {"$or": [{"owner_id": user_id}, {"claimed_by": user_id}]}
+    
+    if cursor:
+        try:
+            query = {"$and": [query, keyset_filter(cursor, "archived_at")]}
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+    
+    db_cursor = archive.find(query).sort(ARCHIVE_SORT).limit(limit + 1)
+    archived = await db_cursor.to_list(length=limit + 1)
+    
+    if len(archived) > limit:
+        archived = archived[:limit]
+        response.headers["X-Next-Cursor"] = encode_cursor(archived[-1], "archived_at")
+    
+    return [archived_post_doc_to_model(post) for post in archived]
+
+
+@router.post("", response_model=Post, status_code=201)
+async def create_post(
+    post: CreatePostRequest,
+    current_user: dict = Depends(get_current_user)
+):
+    """Create a new post (requires authentication)"""
+    posts = get_posts_collection()
+
+    post_doc = build_post_doc(post, current_user["id"])  # Use authenticated user ID
     result = await posts.insert_one(post_doc)
     post_doc["_id"] = result.inserted_id
+    post_changed("created", after=post_doc)
 
     return post_doc_to_model(post_doc)
 
 
-@router.get("/{post_id}", response_model=Post)
-async def get_post(post_id: str):
-    """Get a single post by ID"""
-    post = await get_post_by_id(post_id)
-    return post_doc_to_model(post)
+def first_validation_error(error: ValidationError) -> str:
+    """Describe the first problem of an invalid item in a bulk request"""
+    detail = error.errors()[0]
+    field = ".".join(str(part) for part in detail["loc"])
+    return f"{field}: {detail['msg']}" if field else detail["msg"]
 
 
-@router.post("/{post_id}/claim", response_model=Post)
-async def claim_post(
-    post_id: str,
+@router.post("/bulk", response_model=BulkCreatePostsResponse)
+async def create_posts_bulk(
+    request: BulkCreatePostsRequest,
     current_user: dict = Depends(get_current_user)
 ):
-    """Claim a post (requires authentication)"""
-    post = await get_post_by_id(post_id)
+    """
+    Create several posts in one request (requires authentication).
+    Every item is validated on its own and the valid ones are written with
+    one unordered insert_many, so a bad item does not stop the others.
+    Results come back per item in request order.
+    """
     posts = get_posts_collection()
+    results = [BulkPostResult(index=index) for index in range(len(request.posts))]
+    
+    post_docs = []
+    doc_indexes = []  # request index of each document in post_docs
+    for index, item in enumerate(request.posts):
+        try:
+            post = CreatePostRequest.model_validate(item)
+        except ValidationError as e:
+            results[index].error = first_validation_error(e)
+            continue
+        post_docs.append(build_post_doc(post, current_user["id"]))
+        doc_indexes.append(index)
     
-    # Prevent users from claiming their own posts
-    if post["owner_id"] == current_user["id"]:
-        raise HTTPException(status_code=400, detail="You cannot claim your own post")
+    failed_docs = {}
+    if post_docs:
+        try:
+            # insert_many assigns each document its _id before sending
+            await posts.insert_many(post_docs, ordered=False)
+        except BulkWriteError as e:
+            for write_error in e.details.get("writeErrors", []):
+                failed_docs[write_error["index"]] = write_error.get("errmsg", "Failed to create post")
     
-    if post["status"] == "claimed":
-        raise HTTPException(status_code=400, detail="Post already claimed")
+    for position, post_doc in enumerate(post_docs):
+        result = results[doc_indexes[position]]
+        if position in failed_docs:
+            result.error = failed_docs[position]
+            continue
+        post_changed("created", after=post_doc)
+        result.post = post_doc_to_model(post_doc)
     
-    result = await posts.update_one(
-        {"_id": ObjectId(post_id)},
-        {"$set": {"claimed_by": current_user["id"], "status": "claimed"}}
+    created = sum(1 for result in results if result.post is not None)
+    return BulkCreatePostsResponse(created=created, failed=len(results) - created, results=results)
+
+
+def post_etag(version: int) -> str:
+    """ETag of a single post: its version, so it can be sent back in If-Match"""
+    return f'"{version}"'
+
+
+@router.get("/{post_id}", response_model=Post)
+async def get_post(post_id: str, request: Request, response: Response):
+    """
+    Get a single post by ID.
+    The ETag is the post's version; send it in If-None-Match to get a 304,
+    or in If-Match on PUT /posts/{id} for a conditional update.
+    """
+    # post_changed() invalidates by the canonical lowercase ID
+    post_id = str(parse_post_id(post_id))
+    model = posts_cache.get(("post", post_id))
+    if model is None:
+        version = collection_versions.get("posts")
+        post = await get_post_by_id(post_id)
+        model = post_doc_to_model(post)
+        # Not cached if a write ran while the post was being read
+        if collection_versions.get("posts") == version:
+            posts_cache.set(("post", post_id), model)
+    
+    etag = post_etag(model.version)
+    if etag_matches(request, etag):
+        return not_modified(etag)
+    response.headers.update(cache_headers(etag))
+    return model
+
+
+async def write_claim(object_id: ObjectId, user_id: str) -> dict:
+    """
+    Claim a post for a user in one conditional write, so concurrent
+    claimers cannot both win. Returns the claimed post.
+    """
+    posts = get_posts_collection()
+    updated_post = await posts.find_one_and_update(
+        {
+            "_id": object_id,
+            "status": "available",
+            "claimed_by": None,
+            "owner_id": {"$ne": user_id}
+        },
+        {
+            "$set": {"claimed_by": user_id, "status": "claimed", "claimed_at": datetime.utcnow()},
+            "$inc": {"version": 1}
+        },
+        return_document=ReturnDocument.AFTER
     )
     
-    if result.modified_count == 0:
-        raise HTTPException(status_code=500, detail="Failed to claim post")
+    if updated_post is None:
+        # Only read the post to explain why the claim was rejected
+        post = await get_post_by_id(str(object_id))
+        if post["owner_id"] == user_id:
+            raise ClaimantIneligible(
+                HTTPException(status_code=400, detail="You cannot claim your own post")
+            )
+        if post["status"] == "claimed":
+            raise HTTPException(status_code=400, detail="Post already claimed")
+        raise HTTPException(status_code=400, detail="Post is not available to claim")
+    
+    previous = dict(updated_post, status="available", claimed_by=None, claimed_at=None)
+    post_changed("claimed", previous, updated_post)
+    return updated_post
+
+
+@router.post("/{post_id}/claim", response_model=Post)
+async def claim_post(
+    post_id: str,
+    current_user: dict = Depends(get_current_user)
+):
+    """
+    Claim a post (requires authentication).
+    With claim windows enabled, the response waits until the post's window
+    closes and a winner is picked.
+    """
+    object_id = parse_post_id(post_id)
+    
+    try:
+        if claim_queue.enabled:
+            updated_post = await claim_queue.claim(
+                post_id, current_user["id"], lambda user_id: write_claim(object_id, user_id)
+            )
+        else:
+            updated_post = await write_claim(object_id, current_user["id"])
+    except ClaimantIneligible as e:
+        raise e.error
     
-    updated_post = await posts.find_one({"_id": ObjectId(post_id)})
     return post_doc_to_model(updated_post)
 
 
@@ -131,46 +765,101 @@ async def unclaim_post(
     current_user: dict = Depends(get_current_user)
 ):
     """Unclaim a post (requires authentication, only claimer can unclaim)"""
-    post = await get_post_by_id(post_id)
+    object_id = parse_post_id(post_id)
     posts = get_posts_collection()
     
-    # Only the claimer can unclaim the post
-    if post.get("claimed_by") != current_user["id"]:
-        raise HTTPException(status_code=403, detail="Only the claimer can unclaim this post")
+    updated_post = await posts.find_one_and_update(
+        {"_id": object_id, "status": "claimed", "claimed_by": current_user["id"]},
+        {"$set": {"claimed_by": None, "claimed_at": None, "status": "available"}, "$inc": {"version": 1}},
+        return_document=ReturnDocument.AFTER
+    )
     
-    if post["status"] != "claimed":
+    if updated_post is None:
+        # Only read the post to explain why the unclaim was rejected
+        post = await get_post_by_id(post_id)
+        if post.get("claimed_by") != current_user["id"]:
+            raise HTTPException(status_code=403, detail="Only the claimer can unclaim this post")
         raise HTTPException(status_code=400, detail="Only claimed items can be unclaimed")
     
-    result = await posts.update_one(
-        {"_id": ObjectId(post_id)},
-        {"$set": {"claimed_by": None, "status": "available"}}
+    previous = dict(updated_post, status="claimed", claimed_by=current_user["id"])
+    post_changed("unclaimed", previous, updated_post)
+    
+    # Hand the post to the next claimant waiting from its claim window
+    promoted = await claim_queue.promote(post_id, lambda user_id: write_claim(object_id, user_id))
+    return post_doc_to_model(promoted or updated_post)
+
+
+async def release_stale_claims(max_age_hours: float = CLAIM_EXPIRY_HOURS) -> int:
+    """
+    Release claims older than max_age_hours so abandoned items become
+    available again. Run periodically by the scheduler started in main.py.
+    Each sweep is a single update_many served by the posts_claimed_at
+    partial index, and returns the number of posts released.
+    """
+    posts = get_posts_collection()
+    cutoff = datetime.utcnow() - timedelta(hours=max_age_hours)
+    
+    result = await posts.update_many(
+        {"status": "claimed", "claimed_at": {"$lt": cutoff}},
+        {"$set": {"claimed_by": None, "claimed_at": None, "status": "available"}, "$inc": {"version": 1}}
     )
     
-    if result.modified_count == 0:
-        raise HTTPException(status_code=500, detail="Failed to unclaim post")
+    if result.modified_count:
+        # The released posts are not known individually, so drop every
+        # cached read and standby list instead of patching them
+        collection_versions.bump("posts")
+        posts_cache.clear()
+        facets_cache.clear()
+        claim_queue.forget_all()
+        post_events.publish({"type": "claims_expired", "count": result.modified_count})
+        print(f"Released {result.modified_count} stale claims")
     
-    updated_post = await posts.find_one({"_id": ObjectId(post_id)})
-    return post_doc_to_model(updated_post)
+    return result.modified_count
 
 
-@router.put("/{post_id}", response_model=Post)
-async def update_post(
-    post_id: str,
-    update_data: UpdatePostRequest,
-    current_user: dict = Depends(get_current_user)
-):
-    """Update a post (requires authentication, only owner can edit)"""
-    post = await get_post_by_id(post_id)
+async def start_legacy_claim_clocks() -> int:
+    """
+    Give claims made before claimed_at was recorded a claim time of now, so
+    release_stale_claims() expires them like any other claim. Run at
+    startup; once every claim has claimed_at this matches nothing. Returns
+    the number of posts updated.
+    """
     posts = get_posts_collection()
     
-    # Only the owner can edit their post
-    if post["owner_id"] != current_user["id"]:
-        raise HTTPException(status_code=403, detail="You can only edit your own posts")
+    # Served by the posts_claimed_at partial index; null also matches a missing field
+    result = await posts.update_many(
+        {"status": "claimed", "claimed_at": None},
+        {"$currentDate": {"claimed_at": True}, "$inc": {"version": 1}}
+    )
     
-    # Cannot edit claimed posts
-    if post["status"] == "claimed":
-        raise HTTPException(status_code=400, detail="Cannot edit a claimed post")
+    if result.modified_count:
+        collection_versions.bump("posts")
+        posts_cache.clear()
+        print(f"Started the expiry clock of {result.modified_count} older claims")
     
+    return result.modified_count
+
+
+def parse_if_match(if_match: str) -> Optional[int]:
+    """
+    Parse an If-Match header holding the ETag of GET /posts/{id}, e.g. "3".
+    A bare version number is accepted too. Returns None for "*", which
+    matches any version. Any other tag can never match, so it fails with 412.
+    """
+    value = if_match.strip()
+    if value == "*":
+        return None
+    value = value.removeprefix("W/").strip('"')
+    if not value.isdigit():
+        raise HTTPException(status_code=412, detail="If-Match does not match the post's ETag")
+    return int(value)
+
+
+def build_post_update(update_data: UpdatePostRequest) -> dict:
+    """
+    Build the update document for an edit, or an empty dict when there is
+    nothing to change. Every edit moves the post's version on.
+    """
     # Build update dictionary with only provided fields
     update_fields = {}
     if update_data.item_title is not None:
@@ -186,43 +875,150 @@ async def update_post(
     if update_data.location is not None:
         update_fields["location"] = update_data.location
     
+    # Keep coordinates in step with the location text
+    unset_fields = {}
+    if update_data.coordinates is not None:
+        update_fields["coordinates"] = to_geojson(update_data.coordinates.lat, update_data.coordinates.lng)
+    elif update_data.location is not None:
+        point = resolve_location(update_data.location)
+        if point:
+            update_fields["coordinates"] = to_geojson(*point)
+        else:
+            unset_fields["coordinates"] = ""
+    
     if not update_fields:
+        return {}
+    
+    update = {"$set": update_fields, "$inc": {"version": 1}}
+    if unset_fields:
+        update["$unset"] = unset_fields
+    return update
+
+
+def owner_update_filter(object_id: ObjectId, owner_id: str, expected_version: Optional[int] = None) -> dict:
+    """Only the owner can edit, and claimed posts cannot be edited"""
+    update_filter = {
+        "_id": object_id,
+        "owner_id": owner_id,
+        "status": {"$ne": "claimed"}
+    }
+    if expected_version is not None:
+        # Posts created before versioning have no version field
+        update_filter["version"] = expected_version if expected_version else {"$in": [0, None]}
+    return update_filter
+
+
+def apply_post_update(post: dict, update: dict) -> dict:
+    """The post as it is after an update built by build_post_update"""
+    # The applied update is known, so the new version needs no extra read
+    updated_post = dict(post, **update["$set"], version=post.get("version", 0) + 1)
+    for field in update.get("$unset", {}):
+        updated_post.pop(field, None)
+    return updated_post
+
+
+@router.put("/{post_id}", response_model=Post)
+async def update_post(
+    post_id: str,
+    update_data: UpdatePostRequest,
+    response: Response,
+    current_user: dict = Depends(get_current_user),
+    if_match: Optional[str] = Header(None)
+):
+    """
+    Update a post (requires authentication, only owner can edit).
+    Send the ETag from GET /posts/{id} in If-Match to only apply the update
+    if nobody else changed the post since it was read; a mismatch returns
+    412. The response carries the updated post's ETag.
+    """
+    object_id = parse_post_id(post_id)
+    posts = get_posts_collection()
+    
+    update = build_post_update(update_data)
+    if not update:
         raise HTTPException(status_code=400, detail="No fields to update")
     
-    result = await posts.update_one(
-        {"_id": ObjectId(post_id)},
-        {"$set": update_fields}
+    expected_version = parse_if_match(if_match) if if_match else None
+    post = await posts.find_one_and_update(
+        owner_update_filter(object_id, current_user["id"], expected_version),
+        update,
+        return_document=ReturnDocument.BEFORE
     )
     
-    updated_post = await posts.find_one({"_id": ObjectId(post_id)})
+    if post is None:
+        # Only read the post to explain why the update was rejected
+        post = await get_post_by_id(post_id)
+        if post["owner_id"] != current_user["id"]:
+            raise HTTPException(status_code=403, detail="You can only edit your own posts")
+        if post["status"] == "claimed":
+            raise HTTPException(status_code=400, detail="Cannot edit a claimed post")
+        raise HTTPException(
+            status_code=412,
+            detail=f"Post has changed, current version is {post.get('version', 0)}"
+        )
+    
+    updated_post = apply_post_update(post, update)
+    post_changed("updated", post, updated_post)
+    response.headers["ETag"] = post_etag(updated_post["version"])
     return post_doc_to_model(updated_post)
 
 
+def archived_doc(post: dict, reason: str) -> dict:
+    return dict(post, archived_at=datetime.utcnow(), archive_reason=reason)
+
+
+async def archive_post(post_filter: dict, reason: str) -> Optional[dict]:
+    """
+    Move the post matching post_filter into posts_archive, in one
+    transaction so it is never in both collections or in neither. Returns
+    the post as it was, or None when nothing matched the filter.
+    """
+    posts = get_posts_collection()
+    archive = get_posts_archive_collection()
+    
+    async def move(session):
+        post = await posts.find_one_and_delete(post_filter, session=session)
+        if post is not None:
+            await archive.insert_one(archived_doc(post, reason), session=session)
+        return post
+    
+    # with_transaction retries write conflicts, e.g. a pickup racing a
+    # delete; the retry then finds the post gone and returns None
+    async with await get_db_client().start_session() as session:
+        return await session.with_transaction(move)
+
+
 @router.post("/{post_id}/pickup", status_code=200)
 async def confirm_pickup(
     post_id: str,
     current_user: dict = Depends(get_current_user)
 ):
     """
-    Confirm item pickup and delete the post (requires authentication).
+    Confirm item pickup and archive the post (requires authentication).
     Can be confirmed by either the poster (owner) or the claimer.
     """
-    post = await get_post_by_id(post_id)
-    posts = get_posts_collection()
+    object_id = parse_post_id(post_id)
     
-    # Only claimed posts can be marked as picked up
-    if post["status"] != "claimed":
-        raise HTTPException(status_code=400, detail="Only claimed items can be marked as picked up")
-    
-    # Only the poster or claimer can confirm pickup
-    if current_user["id"] != post["owner_id"] and current_user["id"] != post.get("claimed_by"):
-        raise HTTPException(status_code=403, detail="Only the poster or claimer can confirm pickup")
+    # Only claimed posts, and only the poster or claimer
+    post = await archive_post(
+        {
+            "_id": object_id,
+            "status": "claimed",
+            "$or": [{"owner_id": current_user["id"]}, {"claimed_by": current_user["id"]}]
+        },
+        "picked_up"
+    )
     
-    # Delete the post
-    result = await posts.delete_one({"_id": ObjectId(post_id)})
+    if post is None:
+        # Only read the post to explain why the pickup was rejected
+        post = await get_post_by_id(post_id)
+        if post["status"] != "claimed":
+            raise HTTPException(status_code=400, detail="Only claimed items can be marked as picked up")
+        if current_user["id"] != post["owner_id"] and current_user["id"] != post.get("claimed_by"):
+            raise HTTPException(status_code=403, detail="Only the poster or claimer can confirm pickup")
+        raise HTTPException(status_code=409, detail="Post changed, please try again")
     
-    if result.deleted_count == 0:
-        raise HTTPException(status_code=500, detail="Failed to delete post")
+    post_changed("picked_up", post)
     
     return {"message": "Item picked up successfully", "post_id": post_id}
 
@@ -232,28 +1028,29 @@ async def report_missing(
     current_user: dict = Depends(get_current_user),
 ):
     """
-    Report item as missing and delete the post (requires authentication).
+    Report item as missing and archive the post (requires authentication).
     Only the claimant can report an item as missing.
     """
-    post = await get_post_by_id(post_id)
-    posts = get_posts_collection()
-    
-    if post.get("status") != "claimed":
-        raise HTTPException(status_code=400, detail="Only claimed items can be reported as missing")
+    object_id = parse_post_id(post_id)
     
     # Only the person who claims can report
-    claimed_by = post.get("claimed_by")
-    if not claimed_by:
-        raise HTTPException(status_code=400, detail="Post is claimed but missing claimed_by")
-
-    if claimed_by != current_user["id"]:
-        raise HTTPException(status_code=403, detail="Only the claimant can report this item missing")
-
-    # Delete the post (same behavior as pickup)
-    result = await posts.delete_one({"_id": ObjectId(post_id)})
+    post = await archive_post(
+        {"_id": object_id, "status": "claimed", "claimed_by": current_user["id"]},
+        "missing"
+    )
+    
+    if post is None:
+        # Only read the post to explain why the report was rejected
+        post = await get_post_by_id(post_id)
+        if post.get("status") != "claimed":
+            raise HTTPException(status_code=400, detail="Only claimed items can be reported as missing")
+        if not post.get("claimed_by"):
+            raise HTTPException(status_code=400, detail="Post is claimed but missing claimed_by")
+        if post["claimed_by"] != current_user["id"]:
+            raise HTTPException(status_code=403, detail="Only the claimant can report this item missing")
+        raise HTTPException(status_code=409, detail="Post changed, please try again")
     
-    if result.deleted_count == 0:
-        raise HTTPException(status_code=500, detail="Failed to delete post")
+    post_changed("missing", post)
     
     return {"message": "Item reported as missing and removed", "post_id": post_id}
 
@@ -263,17 +1060,179 @@ async def delete_post(
     post_id: str,
     current_user: dict = Depends(get_current_user)
 ):
-    """Delete a post (requires authentication, only owner can delete)"""
-    post = await get_post_by_id(post_id)
-    posts = get_posts_collection()
+    """Delete a post (requires authentication, only owner can delete). The post is archived."""
+    object_id = parse_post_id(post_id)
     
     # Only the owner can delete their post
-    if post["owner_id"] != current_user["id"]:
-        raise HTTPException(status_code=403, detail="You can only delete your own posts")
+    post = await archive_post({"_id": object_id, "owner_id": current_user["id"]}, "deleted")
     
-    result = await posts.delete_one({"_id": ObjectId(post_id)})
+    if post is None:
+        # Only read the post to explain why the delete was rejected
+        post = await get_post_by_id(post_id)
+        if post["owner_id"] != current_user["id"]:
+            raise HTTPException(status_code=403, detail="You can only delete your own posts")
+        raise HTTPException(status_code=409, detail="Post changed, please try again")
     
-    if result.deleted_count == 0:
-        raise HTTPException(status_code=500, detail="Failed to delete post")
+    post_changed("deleted", post)
     
     return None
+
+
+async def find_unapplied_writes(
+    posts, archive, request: PostBatchRequest, write_indexes: list, before: dict, batch_id: ObjectId, session
+) -> dict:
+    """
+    Positions of batch writes that matched nothing, mapped to their error.
+    An update applied if the post carries this batch's ID. A delete applied
+    if the post is gone and was not archived by someone else, because this
+    batch's archive copies are only inserted after this check.
+    """
+    object_ids = [before[request.operations[index].post_id]["_id"] for index in write_indexes]
+    cursor = posts.find({"_id": {"$in": object_ids}}, {"last_batch_id": 1}, session=session)
+    current = {str(doc["_id"]): doc for doc in await cursor.to_list(length=len(object_ids))}
+    
+    deleted_ids = [
+        before[request.operations[index].post_id]["_id"] for index in write_indexes
+        if request.operations[index].op == "delete"
+        and request.operations[index].post_id not in current
+    ]
+    archived_elsewhere = set()
+    if deleted_ids:
+        cursor = archive.find({"_id": {"$in": deleted_ids}}, {"_id": 1}, session=session)
+        archived_elsewhere = {str(doc["_id"]) for doc in await cursor.to_list(length=len(deleted_ids))}
+    
+    failed_writes = {}
+    for position, index in enumerate(write_indexes):
+        operation = request.operations[index]
+        post = current.get(operation.post_id)
+        if operation.op == "delete":
+            not_applied = post is not None or operation.post_id in archived_elsewhere
+        else:
+            not_applied = post is None or post.get("last_batch_id") != batch_id
+        if not_applied:
+            failed_writes[position] = "Post changed before the operation was applied"
+    return failed_writes
+
+
+@router.post("/batch", response_model=PostBatchResponse)
+async def batch_update_posts(
+    request: PostBatchRequest,
+    current_user: dict = Depends(get_current_user)
+):
+    """
+    Apply several deletes and updates to the current user's posts in one
+    request (requires authentication). The posts are read once for the
+    whole batch, then every write goes out in one unordered bulk_write whose
+    filters repeat the ownership, claimed-status and version checks, so a
+    post changed in between is left alone. Deleted posts are archived in
+    the same transaction. Results come back per operation in request order.
+    """
+    posts = get_posts_collection()
+    results = [
+        PostBatchResult(index=index, op=operation.op, post_id=operation.post_id)
+        for index, operation in enumerate(request.operations)
+    ]
+    
+    # Validate each operation on its own
+    updates = {}  # request index -> update document
+    seen = set()
+    for index, operation in enumerate(request.operations):
+        result = results[index]
+        if not ObjectId.is_valid(operation.post_id):
+            result.error = "Invalid post ID"
+        elif operation.post_id in seen:
+            result.error = "Only one operation per post is allowed in a batch"
+        elif operation.op == "update":
+            try:
+                updates[index] = build_post_update(UpdatePostRequest.model_validate(operation.fields or {}))
+            except ValidationError as e:
+                result.error = first_validation_error(e)
+                continue
+            if not updates[index]:
+                result.error = "No fields to update"
+        seen.add(operation.post_id)
+    
+    pending = [index for index, result in enumerate(results) if result.error is None]
+    object_ids = [ObjectId(results[index].post_id) for index in pending]
+    before = {}
+    if object_ids:
+        cursor = posts.find({"_id": {"$in": object_ids}})
+        before = {str(doc["_id"]): doc for doc in await cursor.to_list(length=len(object_ids))}
+    
+    # Reject what is already known to fail, and build the writes for the rest.
+    # Updates also record this batch's ID, so it can tell its own writes
+    # from concurrent ones if some filters stop matching.
+    batch_id = ObjectId()
+    writes = []
+    write_indexes = []  # request index of each write
+    for index in pending:
+        operation, result = request.operations[index], results[index]
+        post = before.get(operation.post_id)
+        if post is None:
+            result.error = "Post not found"
+        elif post["owner_id"] != current_user["id"]:
+            result.error = f"You can only {'delete' if operation.op == 'delete' else 'edit'} your own posts"
+        elif operation.op == "update" and post["status"] == "claimed":
+            result.error = "Cannot edit a claimed post"
+        elif operation.version is not None and post.get("version", 0) != operation.version:
+            result.error = f"Post has changed, current version is {post.get('version', 0)}"
+        else:
+            # Pinning the version read above makes the write apply only to
+            # that exact post, so the copy archived for a delete is current
+            write_filter = owner_update_filter(post["_id"], current_user["id"], post.get("version", 0))
+            if operation.op == "delete":
+                # Owners may delete claimed posts, as with DELETE /posts/{id}
+                del write_filter["status"]
+                writes.append(DeleteOne(write_filter))
+            else:
+                update = dict(updates[index], **{"$set": dict(updates[index]["$set"], last_batch_id=batch_id)})
+                writes.append(UpdateOne(write_filter, update))
+            write_indexes.append(index)
+    
+    failed_writes = {}
+    if writes:
+        archive = get_posts_archive_collection()
+        
+        # Deleted posts are archived in the same transaction as the writes
+        async def apply_writes(session):
+            unapplied = {}
+            write_result = await posts.bulk_write(writes, ordered=False, session=session)
+            if write_result.deleted_count + write_result.matched_count < len(writes):
+                # Some filters stopped matching since the read; a second
+                # read tells which writes did not apply
+                unapplied = await find_unapplied_writes(
+                    posts, archive, request, write_indexes, before, batch_id, session
+                )
+            deleted = [
+                archived_doc(before[request.operations[index].post_id], "deleted")
+                for position, index in enumerate(write_indexes)
+                if request.operations[index].op == "delete" and position not in unapplied
+            ]
+            if deleted:
+                await archive.insert_many(deleted, session=session)
+            return unapplied
+        
+        try:
+            # with_transaction retries write conflicts with concurrent writes
+            async with await get_db_client().start_session() as session:
+                failed_writes = await session.with_transaction(apply_writes)
+        except PyMongoError as e:
+            # The transaction was aborted, so none of the writes applied
+            failed_writes = {position: f"Batch could not be applied: {e}" for position in range(len(writes))}
+    
+    for position, index in enumerate(write_indexes):
+        operation, result = request.operations[index], results[index]
+        if position in failed_writes:
+            result.error = failed_writes[position]
+            continue
+        post = before[operation.post_id]
+        result.ok = True
+        if operation.op == "delete":
+            post_changed("deleted", post)
+        else:
+            updated_post = apply_post_update(post, updates[index])
+            post_changed("updated", post, updated_post)
+            result.post = post_doc_to_model(updated_post)
+    
+    succeeded = sum(1 for result in results if result.ok)
+    return PostBatchResponse(succeeded=succeeded, failed=len(results) - succeeded, results=results)
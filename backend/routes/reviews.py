@@ -1,14 +1,27 @@
-from fastapi import APIRouter, HTTPException, Depends
+from fastapi import APIRouter, HTTPException, Depends, Query, Request, Response
 from bson import ObjectId
-from typing import List
+from pymongo.errors import DuplicateKeyError
+from typing import List, Optional
 from datetime import datetime
 import db
-from models import Review, CreateReviewRequest
-from utils import review_doc_to_model
+from models import Review, PartialReview, CreateReviewRequest
+from utils import (
+    review_doc_to_model, review_doc_to_partial, fields_to_projection, encode_cursor, keyset_filter
+)
 from auth import get_current_user
+from reputation import reputation_update
+from cache import collection_versions, make_etag, etag_matches, cache_headers, not_modified
+from routes.posts import posts_cache
 
 router = APIRouter(prefix="/reviews", tags=["reviews"])
 
+# Page size bounds for GET /reviews/poster/{poster_id}
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 100
+
+# Sort order used for keyset pagination, newest first
+REVIEWS_SORT = [("created_at", -1), ("_id", -1)]
+
 
 @router.post("", response_model=Review, status_code=201)
 async def create_review(
@@ -19,6 +32,9 @@ async def create_review(
         raise HTTPException(status_code=400, detail="Invalid post ID")
     
     post = await db.database.posts.find_one({"_id": ObjectId(review.post_id)})
+    if not post:
+        # Picked up posts are reviewed after they move to the archive
+        post = await db.database.posts_archive.find_one({"_id": ObjectId(review.post_id)})
     if not post:
         raise HTTPException(status_code=404, detail="Post not found")
     
@@ -34,16 +50,6 @@ async def create_review(
             detail="Poster ID does not match post owner"
         )
     
-    existing_review = await db.database.reviews.find_one({
-        "reviewer_id": current_user["id"],
-        "post_id": review.post_id
-    })
-    if existing_review:
-        raise HTTPException(
-            status_code=400,
-            detail="You have already reviewed this post"
-        )
-    
     review_doc = {
         "reviewer_id": current_user["id"],
         "poster_id": review.poster_id,
@@ -53,10 +59,29 @@ async def create_review(
         "created_at": datetime.utcnow()
     }
     
-    result = await db.database.reviews.insert_one(review_doc)
-    review_doc["_id"] = result.inserted_id
+    # The unique reviews_reviewer_post index allows one review per reviewer
+    # and post, even when two submissions race. The review and the poster's
+    # reputation totals are written in one transaction, so the histogram,
+    # sum and count never miss a stored review.
+    async def write_review(session):
+        result = await db.database.reviews.insert_one(dict(review_doc), session=session)
+        await update_poster_reputation(review.poster_id, review.rating, session=session)
+        return result
     
-    await update_poster_reputation(review.poster_id)
+    # with_transaction retries write conflicts, e.g. two reviews of one
+    # poster at once; a retried duplicate then fails with DuplicateKeyError
+    try:
+        async with await db.get_db_client().start_session() as session:
+            result = await session.with_transaction(write_review)
+    except DuplicateKeyError:
+        raise HTTPException(
+            status_code=400,
+            detail="You have already reviewed this post"
+        )
+    review_doc["_id"] = result.inserted_id
+    collection_versions.bump("reviews")
+    # Post listings with include= embed the poster's reputation
+    posts_cache.invalidate_where(lambda key: key[0] == "list" and key[5])
     
     return review_doc_to_model(review_doc)
 
@@ -74,33 +99,60 @@ async def get_review(review_id: str):
     return review_doc_to_model(review)
 
 
-@router.get("/poster/{poster_id}", response_model=List[Review])
-async def get_poster_reviews(poster_id: str, limit: int = 50):
-    cursor = db.database.reviews.find({"poster_id": poster_id}).limit(limit).sort("created_at", -1)
-    reviews = await cursor.to_list(length=limit)
+@router.get("/poster/{poster_id}", response_model=List[PartialReview], response_model_exclude_unset=True)
+async def get_poster_reviews(
+    poster_id: str,
+    request: Request,
+    response: Response,
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    cursor: Optional[str] = Query(None),
+    fields: Optional[str] = Query(None, description="e.g. id,rating,created_at")
+):
+    """
+    Get the reviews a poster received, newest first.
+    Results are paginated; when more reviews are available the cursor for
+    the next page is returned in the X-Next-Cursor response header.
+    """
+    etag = make_etag("reviews", request)
+    if etag_matches(request, etag):
+        return not_modified(etag)
+    response.headers.update(cache_headers(etag))
+    
+    projection = None
+    if fields:
+        try:
+            projection, field_names = fields_to_projection(fields, Review)
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+        # The sort key is always needed to build the next cursor
+        projection["created_at"] = 1
     
+    query = {"poster_id": poster_id}
+    if cursor:
+        try:
+            query.update(keyset_filter(cursor))
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+    
+    # Served by the reviews_poster_created index; fetch one extra review to
+    # know whether another page exists
+    db_cursor = db.database.reviews.find(query, projection).sort(REVIEWS_SORT).limit(limit + 1)
+    reviews = await db_cursor.to_list(length=limit + 1)
+    
+    if len(reviews) > limit:
+        reviews = reviews[:limit]
+        response.headers["X-Next-Cursor"] = encode_cursor(reviews[-1])
+    
+    if projection is not None:
+        return [review_doc_to_partial(review, field_names) for review in reviews]
     return [review_doc_to_model(review) for review in reviews]
 
 
-async def update_poster_reputation(poster_id: str):
-    cursor = db.database.reviews.find({"poster_id": poster_id})
-    reviews = await cursor.to_list(length=None)
-    
-    if not reviews:
-        avg_rating = 0.0
-        review_count = 0
-    else:
-        total_rating = sum(review["rating"] for review in reviews)
-        avg_rating = total_rating / len(reviews)
-        review_count = len(reviews)
-    
+async def update_poster_reputation(poster_id: str, rating: float, session=None):
+    """Add a new review's rating to the poster's reputation in one atomic write"""
     await db.database.users.update_one(
         {"_id": poster_id},
-        {
-            "$set": {
-                "reputation": round(avg_rating, 2),
-                "review_count": review_count
-            }
-        },
-        upsert=True
+        reputation_update(rating),
+        upsert=True,
+        session=session
     )
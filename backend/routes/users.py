@@ -1,13 +1,40 @@
 """
 Users routes for user profile and reputation.
 """
-from fastapi import APIRouter, HTTPException
+from fastapi import APIRouter, HTTPException, Query
+from typing import Dict, Iterable, List
 import db
-from models import User
-from utils import user_doc_to_model
+from models import User, UserIdsRequest
+from utils import user_doc_to_model, full_histogram
 
 router = APIRouter(prefix="/users", tags=["users"])
 
+# Most IDs accepted in the query string of GET /users/reputation
+MAX_QUERY_IDS = 100
+
+
+def default_user(user_id: str) -> User:
+    """Placeholder returned for users who haven't received reviews yet"""
+    return User(
+        id=user_id,
+        username="Unknown User",
+        email="",
+        reputation=0.0,
+        review_count=0,
+        rating_histogram=full_histogram()
+    )
+
+
+async def get_users_by_ids(user_ids: Iterable[str]) -> Dict[str, dict]:
+    """Fetch many user documents with a single $in query, keyed by user ID"""
+    ids = list(dict.fromkeys(user_ids))
+    if not ids:
+        return {}
+    
+    cursor = db.database.users.find({"_id": {"$in": ids}})
+    users = await cursor.to_list(length=len(ids))
+    return {user["_id"]: user for user in users}
+
 
 @router.get("/{user_id}/reputation", response_model=User)
 async def get_user_reputation(user_id: str):
@@ -21,13 +48,41 @@ async def get_user_reputation(user_id: str):
     
     if not user:
         # Return default values for users who haven't received reviews yet
-        return User(
-            id=user_id,
-            username="Unknown User",
-            email="",
-            reputation=0.0,
-            review_count=0
-        )
+        return default_user(user_id)
     
     return user_doc_to_model(user)
 
+
+async def get_reputations(user_ids: List[str]) -> List[User]:
+    """Resolve users with one query, deduplicated and in the order given"""
+    ids = list(dict.fromkeys(user_id.strip() for user_id in user_ids if user_id.strip()))
+    if not ids:
+        raise HTTPException(status_code=400, detail="No user IDs provided")
+    
+    users = await get_users_by_ids(ids)
+    return [
+        user_doc_to_model(users[user_id]) if user_id in users else default_user(user_id)
+        for user_id in ids
+    ]
+
+
+@router.get("/reputation", response_model=List[User])
+async def get_users_reputation(ids: str = Query(..., description="Comma-separated user IDs")):
+    """
+    Get reputation for several users at once, in the order requested.
+    Unknown users get the same default values as the single-user endpoint.
+    """
+    user_ids = ids.split(",")
+    if len(user_ids) > MAX_QUERY_IDS:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Too many user IDs, use POST /users/reputation for more than {MAX_QUERY_IDS}"
+        )
+    return await get_reputations(user_ids)
+
+
+@router.post("/reputation", response_model=List[User])
+async def post_users_reputation(request: UserIdsRequest):
+    """Same as GET /users/reputation, for lists too long for a query string"""
+    return await get_reputations(request.ids)
+
@@ -0,0 +1,44 @@
+"""
+Periodic background jobs run inside the API process.
+"""
+import asyncio
+from typing import Awaitable, Callable
+
+
+class PeriodicJob:
+    """
+    Runs an async job every interval seconds until stopped.
+    A failing run is logged and retried on the next interval.
+    """
+
+    def __init__(self, name: str, interval: float, job: Callable[[], Awaitable]):
+        self.name = name
+        self.interval = interval
+        self.job = job
+        self.runs = 0
+        self.failures = 0
+        self._task = None
+
+    def start(self):
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task is None:
+            return
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+
+    async def _run(self):
+        while True:
+            await asyncio.sleep(self.interval)
+            try:
+                await self.job()
+                self.runs += 1
+            except Exception as e:
+                self.failures += 1
+                print(f"Background job {self.name} failed: {e}")
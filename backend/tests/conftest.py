@@ -2,9 +2,11 @@ import pytest
 import asyncio
 from httpx import AsyncClient
 from unittest.mock import AsyncMock, MagicMock, patch
+from pymongo.errors import PyMongoError
 from main import app
 import db
 from auth import get_current_user
+from routes.posts import posts_cache, facets_cache
 
 
 @pytest.fixture(scope="session")
@@ -14,6 +16,46 @@ def event_loop():
     loop.close()
 
 
+@pytest.fixture(autouse=True)
+def clear_post_caches():
+    # Cached responses must not leak between tests that mock different data
+    posts_cache.clear()
+    facets_cache.clear()
+    yield
+    posts_cache.clear()
+    facets_cache.clear()
+
+
+def mock_db_client():
+    """
+    Database client whose sessions and transactions are no-ops, so
+    transactional writes run against the collection mocks.
+    """
+    transaction = MagicMock()
+    transaction.__aenter__ = AsyncMock(return_value=transaction)
+    transaction.__aexit__ = AsyncMock(return_value=False)
+    
+    session = MagicMock()
+    session.__aenter__ = AsyncMock(return_value=session)
+    session.__aexit__ = AsyncMock(return_value=False)
+    session.start_transaction = MagicMock(return_value=transaction)
+    
+    async def with_transaction(callback, **kwargs):
+        # Like the driver, rerun the callback while it fails with a transient error
+        while True:
+            try:
+                return await callback(session)
+            except PyMongoError as e:
+                if not e.has_error_label("TransientTransactionError"):
+                    raise
+    
+    session.with_transaction = with_transaction
+    
+    client = MagicMock()
+    client.start_session = AsyncMock(return_value=session)
+    return client
+
+
 @pytest.fixture
 async def mock_db():
     mock_database = MagicMock()
@@ -30,10 +72,26 @@ async def mock_db():
     with patch.object(db, 'database', mock_database), \
          patch('db.get_posts_collection', return_value=mock_posts_collection), \
          patch('db.get_reviews_collection', return_value=mock_reviews_collection), \
-         patch('db.get_users_collection', return_value=mock_users_collection):
+         patch('db.get_users_collection', return_value=mock_users_collection), \
+         patch('db.get_db_client', return_value=mock_db_client()):
         yield mock_database
 
 
+@pytest.fixture
+def mock_archive():
+    """
+    Archive collection mock, with a client whose sessions and transactions
+    are no-ops so archive moves run against the collection mocks.
+    """
+    archive = MagicMock()
+    archive.insert_one = AsyncMock()
+    archive.insert_many = AsyncMock()
+    
+    with patch('routes.posts.get_db_client', return_value=mock_db_client()), \
+         patch('routes.posts.get_posts_archive_collection', return_value=archive):
+        yield archive
+
+
 @pytest.fixture
 def mock_auth():
     async def override_get_current_user():
@@ -0,0 +1,102 @@
+"""
+Test cases for the in-process TTL cache.
+"""
+import pytest
+from unittest.mock import patch
+from starlette.requests import Request
+from cache import TTLCache, CollectionVersions, etag_matches
+
+
+class TestTTLCache:
+    
+    def test_get_and_set(self):
+        """Test that cached values are returned and counted as hits"""
+        cache = TTLCache(maxsize=2, ttl=30)
+        cache.set("a", 1)
+        
+        assert cache.get("a") == 1
+        assert cache.get("b") is None
+        assert cache.stats()["hits"] == 1
+        assert cache.stats()["misses"] == 1
+    
+    
+    def test_lru_eviction(self):
+        """Test that the least recently used entry is evicted when full"""
+        cache = TTLCache(maxsize=2, ttl=30)
+        cache.set("a", 1)
+        cache.set("b", 2)
+        cache.get("a")
+        cache.set("c", 3)
+        
+        assert cache.get("b") is None
+        assert cache.get("a") == 1
+        assert cache.get("c") == 3
+        assert cache.stats()["evictions"] == 1
+    
+    
+    def test_ttl_expiry(self):
+        """Test that entries expire after the TTL"""
+        cache = TTLCache(maxsize=2, ttl=10)
+        with patch("cache.time.monotonic", return_value=100.0):
+            cache.set("a", 1)
+        with patch("cache.time.monotonic", return_value=111.0):
+            assert cache.get("a") is None
+        
+        assert cache.stats()["size"] == 0
+        assert cache.stats()["evictions"] == 1
+    
+    
+    def test_invalidate_where(self):
+        """Test invalidating entries by key predicate"""
+        cache = TTLCache(maxsize=10, ttl=30)
+        cache.set(("list", "a"), 1)
+        cache.set(("list", "b"), 2)
+        cache.set(("post", "a"), 3)
+        
+        assert cache.invalidate_where(lambda key: key[0] == "list") == 2
+        assert cache.invalidate(("post", "a")) is True
+        assert cache.invalidate(("post", "a")) is False
+        assert cache.stats()["size"] == 0
+        assert cache.stats()["invalidations"] == 3
+
+    
+    
+    def test_entries_where(self):
+        """Test listing live entries for in-place updates without counting hits"""
+        cache = TTLCache(maxsize=10, ttl=30)
+        cache.set(("facets", "a"), {"total": 1})
+        cache.set(("list", "a"), [])
+        
+        entries = cache.entries_where(lambda key: key[0] == "facets")
+        entries[0][1]["total"] += 1
+        
+        assert cache.get(("facets", "a")) == {"total": 2}
+        assert cache.stats()["hits"] == 1
+
+
+class TestConditionalHelpers:
+    
+    @staticmethod
+    def make_request(if_none_match):
+        headers = [(b"if-none-match", if_none_match.encode())] if if_none_match else []
+        return Request({"type": "http", "method": "GET", "path": "/", "headers": headers, "query_string": b""})
+    
+    
+    def test_etag_matches(self):
+        """Test If-None-Match parsing with lists, weak tags and wildcards"""
+        assert etag_matches(self.make_request('"a", W/"b"'), '"b"')
+        assert etag_matches(self.make_request("*"), '"b"')
+        assert not etag_matches(self.make_request('"a"'), '"b"')
+        assert not etag_matches(self.make_request(None), '"b"')
+    
+    
+    def test_collection_versions(self):
+        """Test that bumping one collection leaves the others unchanged"""
+        versions = CollectionVersions()
+        posts_before = versions.get("posts")
+        reviews_before = versions.get("reviews")
+        
+        versions.bump("posts")
+        
+        assert versions.get("posts") != posts_before
+        assert versions.get("reviews") == reviews_before
@@ -0,0 +1,201 @@
+"""
+Test cases for claim windows on contended posts.
+"""
+import asyncio
+import pytest
+from httpx import AsyncClient
+from datetime import datetime
+from unittest.mock import AsyncMock, MagicMock, patch
+from bson import ObjectId
+from fastapi import HTTPException
+from claims import ClaimQueue, ClaimantIneligible, LOTTERY
+
+
+def recording_attempt(owner_id="owner"):
+    """A claim attempt that succeeds once and records who it was called for"""
+    calls = []
+    winners = []
+
+    async def attempt(user_id):
+        calls.append(user_id)
+        if user_id == owner_id:
+            raise ClaimantIneligible(HTTPException(status_code=400, detail="You cannot claim your own post"))
+        if winners:
+            raise HTTPException(status_code=400, detail="Post already claimed")
+        winners.append(user_id)
+        return {"claimed_by": user_id}
+
+    return attempt, calls
+
+
+class TestClaimQueue:
+
+    @pytest.mark.asyncio
+    async def test_fifo_winner_single_write(self):
+        """Test that the first claimant wins and losers never reach the database"""
+        queue = ClaimQueue(window_seconds=0.01)
+        attempt, calls = recording_attempt()
+
+        results = await asyncio.gather(
+            *(queue.claim("post1", f"user{i}", attempt) for i in range(5)),
+            return_exceptions=True
+        )
+
+        assert results[0] == {"claimed_by": "user0"}
+        assert all(isinstance(r, HTTPException) and r.status_code == 400 for r in results[1:])
+        assert calls == ["user0"]
+        assert queue.rejected_in_memory == 4
+
+
+    @pytest.mark.asyncio
+    async def test_lottery_picks_one_winner(self):
+        """Test that lottery mode picks exactly one claimant"""
+        queue = ClaimQueue(window_seconds=0.01, mode=LOTTERY)
+        attempt, calls = recording_attempt()
+
+        results = await asyncio.gather(
+            *(queue.claim("post1", f"user{i}", attempt) for i in range(10)),
+            return_exceptions=True
+        )
+
+        winners = [r for r in results if isinstance(r, dict)]
+        assert len(winners) == 1
+        assert calls == [winners[0]["claimed_by"]]
+
+
+    @pytest.mark.asyncio
+    async def test_ineligible_claimant_skipped(self):
+        """Test that the owner's claim is rejected and the next claimant wins"""
+        queue = ClaimQueue(window_seconds=0.01)
+        attempt, calls = recording_attempt(owner_id="owner")
+
+        results = await asyncio.gather(
+            queue.claim("post1", "owner", attempt),
+            queue.claim("post1", "user1", attempt),
+            return_exceptions=True
+        )
+
+        assert results[0].detail == "You cannot claim your own post"
+        assert results[1] == {"claimed_by": "user1"}
+
+
+    @pytest.mark.asyncio
+    async def test_late_claim_rejected_in_memory(self):
+        """Test that claims after the window closes join the standby list"""
+        queue = ClaimQueue(window_seconds=0.01)
+        attempt, calls = recording_attempt()
+        await queue.claim("post1", "user0", attempt)
+
+        with pytest.raises(HTTPException):
+            await queue.claim("post1", "late", attempt)
+
+        assert calls == ["user0"]
+
+        promote_attempt = AsyncMock(return_value={"claimed_by": "late"})
+        promoted = await queue.promote("post1", promote_attempt)
+        assert promoted == {"claimed_by": "late"}
+        promote_attempt.assert_awaited_once_with("late")
+
+
+    @pytest.mark.asyncio
+    async def test_promote_in_order(self):
+        """Test that standby claimants are promoted in pick order"""
+        queue = ClaimQueue(window_seconds=0.01)
+        attempt, _ = recording_attempt()
+        await asyncio.gather(
+            *(queue.claim("post1", f"user{i}", attempt) for i in range(3)),
+            return_exceptions=True
+        )
+
+        first = await queue.promote("post1", AsyncMock(side_effect=lambda user_id: {"claimed_by": user_id}))
+        second = await queue.promote("post1", AsyncMock(side_effect=lambda user_id: {"claimed_by": user_id}))
+        third = await queue.promote("post1", AsyncMock())
+
+        assert first["claimed_by"] == "user1"
+        assert second["claimed_by"] == "user2"
+        assert third is None
+        assert queue.promotions == 2
+
+
+    @pytest.mark.asyncio
+    async def test_forget_drops_standby(self):
+        """Test that a removed post no longer rejects claims in memory"""
+        queue = ClaimQueue(window_seconds=0.01)
+        attempt, calls = recording_attempt()
+        await queue.claim("post1", "user0", attempt)
+
+        queue.forget("post1")
+
+        assert await queue.promote("post1", AsyncMock()) is None
+        assert queue.stats()["standby_posts"] == 0
+
+
+    def test_invalid_mode(self):
+        """Test that unknown modes are rejected"""
+        with pytest.raises(ValueError):
+            ClaimQueue(window_seconds=1, mode="random")
+
+
+class TestClaimWindowRoutes:
+
+    @pytest.mark.asyncio
+    async def test_claim_through_window(self, client: AsyncClient, mock_db, mock_auth):
+        """Test that claims go through the queue when windows are enabled"""
+        post_id = str(ObjectId())
+        claimed_post = {
+            "_id": ObjectId(post_id),
+            "item_title": "Sofa",
+            "owner_id": "other_user",
+            "claimed_by": mock_auth["id"],
+            "status": "claimed",
+            "created_at": datetime.utcnow(),
+            "condition": "used",
+            "location": "Boston",
+            "images": []
+        }
+        mock_collection = MagicMock()
+        mock_collection.find_one_and_update = AsyncMock(return_value=claimed_post)
+
+        with patch('routes.posts.get_posts_collection', return_value=mock_collection), \
+             patch('routes.posts.claim_queue', ClaimQueue(window_seconds=0.01)) as queue:
+            response = await client.post(f"/posts/{post_id}/claim")
+            late = await client.post(f"/posts/{post_id}/claim")
+
+        assert response.status_code == 200
+        assert response.json()["claimed_by"] == mock_auth["id"]
+        assert late.status_code == 400
+        assert mock_collection.find_one_and_update.await_count == 1
+        assert queue.rejected_in_memory == 1
+
+
+    @pytest.mark.asyncio
+    async def test_unclaim_promotes_standby(self, client: AsyncClient, mock_db, mock_auth):
+        """Test that unclaiming hands the post to the next waiting claimant"""
+        post_id = str(ObjectId())
+        released_post = {
+            "_id": ObjectId(post_id),
+            "item_title": "Sofa",
+            "owner_id": "other_user",
+            "claimed_by": None,
+            "status": "available",
+            "created_at": datetime.utcnow(),
+            "condition": "used",
+            "location": "Boston",
+            "images": []
+        }
+        promoted_post = dict(released_post, claimed_by="next_user", status="claimed")
+        mock_collection = MagicMock()
+        mock_collection.find_one_and_update = AsyncMock(side_effect=[released_post, promoted_post])
+
+        queue = ClaimQueue(window_seconds=0.01)
+        queue._standby.set(post_id, ["next_user"])
+
+        with patch('routes.posts.get_posts_collection', return_value=mock_collection), \
+             patch('routes.posts.claim_queue', queue):
+            response = await client.post(f"/posts/{post_id}/unclaim")
+
+        assert response.status_code == 200
+        assert response.json()["claimed_by"] == "next_user"
+        promote_filter, promote_update = mock_collection.find_one_and_update.call_args[0]
+        assert promote_filter["status"] == "available"
+        assert promote_update["$set"]["claimed_by"] == "next_user"
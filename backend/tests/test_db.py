@@ -0,0 +1,199 @@
+"""
+Test cases for database index bootstrap.
+"""
+import pytest
+from unittest.mock import AsyncMock, MagicMock, patch
+import db
+
+
+def make_database(existing=None):
+    """Build a fake database whose collections report the given indexes"""
+    existing = existing or {}
+    collections = {}
+    for name in db.INDEXES:
+        collection = MagicMock()
+        collection.index_information = AsyncMock(return_value=existing.get(name, {"_id_": {"key": [("_id", 1)]}}))
+        collection.create_index = AsyncMock()
+        collections[name] = collection
+    return collections
+
+
+class TestEnsureIndexes:
+    
+    @pytest.mark.asyncio
+    async def test_creates_missing_indexes(self):
+        """Test that every declared index is created on an empty database"""
+        database = make_database()
+        
+        with patch.object(db, 'database', database):
+            report = await db.ensure_indexes()
+        
+        assert all(entry["action"] == "created" for entry in report)
+        assert len(report) == sum(len(specs) for specs in db.INDEXES.values())
+        database["reviews"].create_index.assert_any_call(
+            [("reviewer_id", 1), ("post_id", 1)], name="reviews_reviewer_post", unique=True
+        )
+    
+    
+    @pytest.mark.asyncio
+    async def test_dry_run_creates_nothing(self):
+        """Test that report mode only lists missing indexes"""
+        database = make_database()
+        
+        with patch.object(db, 'database', database):
+            report = await db.ensure_indexes(dry_run=True)
+        
+        assert all(entry["action"] == "missing" for entry in report)
+        database["posts"].create_index.assert_not_called()
+    
+    
+    @pytest.mark.asyncio
+    async def test_existing_and_conflicting_indexes(self):
+        """Test that existing indexes are skipped and mismatched ones reported"""
+        database = make_database({
+            "reviews": {
+                "reviews_poster_created": {"key": [("poster_id", 1), ("created_at", -1), ("_id", -1)]},
+                "reviews_reviewer_post": {"key": [("reviewer_id", 1)]},
+            }
+        })
+        
+        with patch.object(db, 'database', database):
+            report = await db.ensure_indexes()
+        
+        actions = {entry["name"]: entry["action"] for entry in report}
+        assert actions["reviews_poster_created"] == "exists"
+        assert actions["reviews_reviewer_post"] == "conflict"
+        database["reviews"].create_index.assert_not_called()
+    
+    
+    @pytest.mark.asyncio
+    async def test_failed_index_does_not_abort(self):
+        """Test that one failing index is reported and the rest still applied"""
+        database = make_database()
+        database["reviews"].create_index = AsyncMock(side_effect=Exception("duplicate key"))
+        
+        with patch.object(db, 'database', database):
+            report = await db.ensure_indexes()
+        
+        failed = [entry for entry in report if entry["action"] == "failed"]
+        assert {entry["collection"] for entry in failed} == {"reviews"}
+        assert "duplicate key" in failed[0]["error"]
+        assert database["posts"].create_index.await_count == len(db.INDEXES["posts"])
+    
+    
+    @pytest.mark.asyncio
+    async def test_non_unique_index_is_conflict(self):
+        """Test that an index with the right keys but no unique flag is reported"""
+        database = make_database({
+            "reviews": {"reviews_reviewer_post": {"key": [("reviewer_id", 1), ("post_id", 1)]}}
+        })
+        
+        with patch.object(db, 'database', database):
+            report = await db.ensure_indexes()
+        
+        actions = {entry["name"]: entry["action"] for entry in report}
+        assert actions["reviews_reviewer_post"] == "conflict"
+
+    
+    @staticmethod
+    def archive_ttl_database(expire_after_seconds):
+        collections = make_database({
+            "posts_archive": {
+                "posts_archive_ttl": {"key": [("archived_at", 1)], "expireAfterSeconds": expire_after_seconds}
+            }
+        })
+        database = MagicMock()
+        database.__getitem__.side_effect = collections.__getitem__
+        database.command = AsyncMock()
+        return database
+    
+    
+    @pytest.mark.asyncio
+    async def test_changed_ttl_applied_with_coll_mod(self):
+        """Test that a new retention period is applied to the existing TTL index"""
+        database = self.archive_ttl_database(86400)
+        expected = db.INDEXES["posts_archive"][0]["expireAfterSeconds"]
+        
+        with patch.object(db, 'database', database):
+            report = await db.ensure_indexes()
+        
+        actions = {entry["name"]: entry["action"] for entry in report}
+        assert actions["posts_archive_ttl"] == "updated"
+        database.command.assert_awaited_once_with(
+            "collMod", "posts_archive",
+            index={"name": "posts_archive_ttl", "expireAfterSeconds": expected}
+        )
+    
+    
+    @pytest.mark.asyncio
+    async def test_changed_ttl_dry_run(self):
+        """Test that report mode lists a changed TTL without applying it"""
+        database = self.archive_ttl_database(86400)
+        
+        with patch.object(db, 'database', database):
+            report = await db.ensure_indexes(dry_run=True)
+        
+        entry = next(entry for entry in report if entry["name"] == "posts_archive_ttl")
+        assert entry["action"] == "conflict"
+        assert "expireAfterSeconds" in entry["error"]
+        database.command.assert_not_called()
+    
+    
+    @pytest.mark.asyncio
+    async def test_changed_options_are_conflicts(self):
+        """Test that partial filters and text weights are compared too"""
+        database = make_database({
+            "posts": {
+                "posts_claimed_at": {"key": [("claimed_at", 1)], "partialFilterExpression": {"status": "available"}},
+                "posts_text": {
+                    "key": [("_fts", "text"), ("_ftsx", 1)],
+                    "weights": {"item_title": 1, "category": 1, "description": 1}
+                },
+            }
+        })
+        
+        with patch.object(db, 'database', database):
+            report = await db.ensure_indexes()
+        
+        entries = {entry["name"]: entry for entry in report}
+        assert entries["posts_claimed_at"]["action"] == "conflict"
+        assert "partialFilterExpression" in entries["posts_claimed_at"]["error"]
+        assert entries["posts_text"]["action"] == "conflict"
+        assert "weights" in entries["posts_text"]["error"]
+
+
+class TestUniqueIndexCheck:
+    
+    @staticmethod
+    def make_report(action):
+        return [
+            {"collection": "posts", "name": "posts_created", "action": "missing"},
+            {"collection": "reviews", "name": "reviews_reviewer_post", "action": action}
+        ]
+    
+    
+    def test_unique_index_in_place(self):
+        """Test that only unique indexes are required"""
+        db.check_unique_indexes(self.make_report("exists"))
+        db.check_unique_indexes(self.make_report("created"))
+    
+    
+    @pytest.mark.parametrize("action", ["missing", "failed", "conflict"])
+    def test_unique_index_not_in_place(self, action):
+        """Test that a missing, failed or conflicting unique index stops startup"""
+        with pytest.raises(Exception, match="reviews.reviews_reviewer_post"):
+            db.check_unique_indexes(self.make_report(action))
+
+
+class TestTransactionsCheck:
+    
+    def test_replica_set_and_mongos_accepted(self):
+        """Test that replica set members and mongos routers support transactions"""
+        db.check_transactions_supported({"setName": "rs0", "isWritablePrimary": True})
+        db.check_transactions_supported({"msg": "isdbgrid"})
+    
+    
+    def test_standalone_rejected(self):
+        """Test that a standalone server stops startup with a clear message"""
+        with pytest.raises(Exception, match="replica set"):
+            db.check_transactions_supported({"isWritablePrimary": True})
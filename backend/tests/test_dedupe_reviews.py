@@ -0,0 +1,50 @@
+"""
+Test cases for the duplicate review cleanup command.
+"""
+import pytest
+from unittest.mock import AsyncMock, MagicMock, patch
+from dedupe_reviews import dedupe
+
+
+def mock_duplicates(mock_db, groups):
+    cursor = MagicMock()
+    cursor.to_list = AsyncMock(return_value=groups)
+    mock_db.reviews.aggregate = MagicMock(return_value=cursor)
+
+
+GROUPS = [
+    {"_id": {"reviewer_id": "r1", "post_id": "p1"}, "poster_id": "poster1", "review_ids": ["a", "b", "c"]},
+    {"_id": {"reviewer_id": "r2", "post_id": "p2"}, "poster_id": "poster2", "review_ids": ["d", "e"]}
+]
+
+
+class TestDedupeReviews:
+
+    @pytest.mark.asyncio
+    async def test_keeps_oldest_review(self, mock_db):
+        """Test that all but the oldest review of each group are deleted"""
+        mock_duplicates(mock_db, GROUPS)
+        mock_db.reviews.delete_many = AsyncMock(return_value=MagicMock(deleted_count=3))
+        recompute = AsyncMock()
+
+        with patch('dedupe_reviews.recompute_poster_reputation', recompute):
+            totals = await dedupe(write=True)
+
+        assert totals == {"duplicate_groups": 2, "duplicates": 3, "removed": 3}
+        mock_db.reviews.delete_many.assert_awaited_once_with({"_id": {"$in": ["b", "c", "e"]}})
+        assert [call[0][0] for call in recompute.await_args_list] == ["poster1", "poster2"]
+        pipeline = mock_db.reviews.aggregate.call_args[0][0]
+        assert pipeline[0] == {"$sort": {"created_at": 1, "_id": 1}}
+
+
+    @pytest.mark.asyncio
+    async def test_report_only(self, mock_db):
+        """Test that report mode deletes nothing"""
+        mock_duplicates(mock_db, GROUPS)
+        mock_db.reviews.delete_many = AsyncMock()
+
+        totals = await dedupe(write=False)
+
+        assert totals["duplicates"] == 3
+        assert totals["removed"] == 0
+        mock_db.reviews.delete_many.assert_not_called()
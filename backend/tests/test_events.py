@@ -0,0 +1,124 @@
+"""
+Test cases for the live catalog event broker.
+"""
+import json
+import pytest
+from httpx import AsyncClient
+from datetime import datetime
+from unittest.mock import AsyncMock, MagicMock, patch
+from bson import ObjectId
+from events import EventBroker
+from routes.posts import post_events
+
+
+class TestEventBroker:
+    
+    def test_category_subscriptions(self):
+        """Test that subscribers only receive events for their categories"""
+        broker = EventBroker()
+        books = broker.subscribe(["Books"])
+        everything = broker.subscribe()
+        
+        broker.publish({"type": "created"}, categories={"Furniture"})
+        broker.publish({"type": "claimed"}, categories={"Books"})
+        
+        assert books.queue.qsize() == 1
+        assert books.queue.get_nowait()["type"] == "claimed"
+        assert everything.queue.qsize() == 2
+    
+    
+    def test_slow_consumer_evicted(self):
+        """Test that a full queue evicts the subscriber instead of blocking"""
+        broker = EventBroker(queue_size=2)
+        slow = broker.subscribe()
+        
+        for _ in range(3):
+            broker.publish({"type": "created"}, categories={"Books"})
+        
+        assert slow.evicted
+        assert slow.queue.get_nowait() is None
+        assert broker.evictions == 1
+        assert broker.subscriber_count == 0
+    
+    
+    def test_unsubscribe(self):
+        """Test that unsubscribed clients no longer receive events"""
+        broker = EventBroker()
+        subscription = broker.subscribe(["Books", "Other"])
+        broker.unsubscribe(subscription)
+        
+        broker.publish({"type": "created"}, categories={"Books"})
+        
+        assert subscription.queue.empty()
+        assert broker.subscriber_count == 0
+    
+    
+    @pytest.mark.asyncio
+    async def test_sse_stream_format(self):
+        """Test that events are written in SSE format and eviction ends the stream"""
+        broker = EventBroker()
+        subscription = broker.subscribe()
+        broker.publish({"type": "claimed", "post_id": "abc"})
+        # End-of-stream marker left behind by an eviction
+        subscription.queue.put_nowait(None)
+        
+        chunks = [chunk async for chunk in broker.sse_stream(subscription, heartbeat=1)]
+        
+        assert chunks[0].startswith("retry:")
+        assert chunks[1].startswith("event: claimed\ndata: ")
+        assert json.loads(chunks[1].split("data: ", 1)[1])["post_id"] == "abc"
+        assert chunks[2].startswith("event: evicted")
+    
+    
+    @pytest.mark.asyncio
+    async def test_sse_stream_heartbeat(self):
+        """Test that idle streams send keep-alive comments"""
+        broker = EventBroker()
+        subscription = broker.subscribe()
+        stream = broker.sse_stream(subscription, heartbeat=0.01)
+        
+        assert (await stream.__anext__()).startswith("retry:")
+        assert await stream.__anext__() == ": keep-alive\n\n"
+        await stream.aclose()
+        
+        assert broker.subscriber_count == 0
+
+
+class TestPostEventsPublishing:
+    
+    @pytest.mark.asyncio
+    async def test_claim_publishes_event(self, client: AsyncClient, mock_db, mock_auth):
+        """Test that claiming a post publishes to subscribers of its category"""
+        post_id = ObjectId()
+        post = {
+            "_id": post_id,
+            "item_title": "Bookshelf",
+            "owner_id": "other_user",
+            "status": "available",
+            "claimed_by": None,
+            "category": "Furniture",
+            "created_at": datetime.utcnow(),
+            "condition": "used",
+            "location": "Boston",
+            "images": []
+        }
+        claimed = dict(post, status="claimed", claimed_by=mock_auth["id"])
+        
+        mock_collection = MagicMock()
+        mock_collection.find_one_and_update = AsyncMock(return_value=claimed)
+        
+        furniture = post_events.subscribe(["Furniture"])
+        books = post_events.subscribe(["Books"])
+        try:
+            with patch('routes.posts.get_posts_collection', return_value=mock_collection):
+                response = await client.post(f"/posts/{post_id}/claim")
+            
+            assert response.status_code == 200
+            event = furniture.queue.get_nowait()
+            assert event["type"] == "claimed"
+            assert event["post_id"] == str(post_id)
+            assert event["post"]["claimed_by"] == mock_auth["id"]
+            assert books.queue.empty()
+        finally:
+            post_events.unsubscribe(furniture)
+            post_events.unsubscribe(books)
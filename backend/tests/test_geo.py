@@ -0,0 +1,37 @@
+"""
+Test cases for offline location resolution.
+"""
+import pytest
+from geo import resolve_location, parse_point, to_geojson, load_gazetteer
+
+
+class TestGeo:
+    
+    def test_resolve_exact_place(self):
+        """Test resolving a place name from the gazetteer"""
+        assert resolve_location("Boston") == load_gazetteer()["boston"]
+    
+    
+    def test_resolve_address_part(self):
+        """Test resolving the town part of a full address"""
+        assert resolve_location("12 Main St, Cambridge, Massachusetts, 02139") == load_gazetteer()["cambridge"]
+    
+    
+    def test_resolve_unknown_place(self):
+        """Test that unknown places resolve to None"""
+        assert resolve_location("Atlantis") is None
+        assert resolve_location("") is None
+    
+    
+    def test_parse_point(self):
+        """Test parsing and validating a lat,lng parameter"""
+        assert parse_point("42.36, -71.05") == (42.36, -71.05)
+        with pytest.raises(ValueError):
+            parse_point("42.36")
+        with pytest.raises(ValueError):
+            parse_point("95,10")
+    
+    
+    def test_to_geojson_longitude_first(self):
+        """Test that GeoJSON points store longitude first"""
+        assert to_geojson(42.0, -71.0) == {"type": "Point", "coordinates": [-71.0, 42.0]}
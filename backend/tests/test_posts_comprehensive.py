@@ -1,11 +1,16 @@
 """
 Comprehensive test cases for posts endpoints.
 """
+import json
 import pytest
 from httpx import AsyncClient
 from datetime import datetime
 from unittest.mock import AsyncMock, MagicMock, patch
 from bson import ObjectId
+from pymongo.errors import OperationFailure
+from utils import encode_cursor, encode_offset_cursor
+from routes.posts import posts_cache, release_stale_claims, start_legacy_claim_clocks
+from cache import collection_versions
 
 
 class TestPostsCRUD:
@@ -45,6 +50,7 @@ class TestPostsCRUD:
         mock_cursor = AsyncMock()
         mock_cursor.to_list = AsyncMock(return_value=mock_posts)
         mock_cursor.sort = MagicMock(return_value=mock_cursor)
+        mock_cursor.limit = MagicMock(return_value=mock_cursor)
         
         mock_collection = MagicMock()
         mock_collection.find = MagicMock(return_value=mock_cursor)
@@ -152,15 +158,9 @@ class TestPostsCRUD:
             "images": []
         }
         
-        updated_post = mock_post.copy()
-        updated_post["item_title"] = "New Title"
-        
-        mock_result = MagicMock()
-        mock_result.modified_count = 1
-        
         mock_collection = MagicMock()
-        mock_collection.find_one = AsyncMock(side_effect=[mock_post, updated_post])
-        mock_collection.update_one = AsyncMock(return_value=mock_result)
+        mock_collection.find_one_and_update = AsyncMock(return_value=mock_post)
+        mock_collection.find_one = AsyncMock()
         
         update_data = {"item_title": "New Title"}
         
@@ -169,6 +169,8 @@ class TestPostsCRUD:
         
         assert response.status_code == 200
         assert response.json()["item_title"] == "New Title"
+        assert response.json()["version"] == 1
+        mock_collection.find_one.assert_not_called()
     
     
     @pytest.mark.asyncio
@@ -188,6 +190,7 @@ class TestPostsCRUD:
         }
         
         mock_collection = MagicMock()
+        mock_collection.find_one_and_update = AsyncMock(return_value=None)
         mock_collection.find_one = AsyncMock(return_value=mock_post)
         
         update_data = {"item_title": "New Title"}
@@ -199,7 +202,7 @@ class TestPostsCRUD:
     
     
     @pytest.mark.asyncio
-    async def test_delete_post_success(self, client: AsyncClient, mock_db, mock_auth):
+    async def test_delete_post_success(self, client: AsyncClient, mock_db, mock_auth, mock_archive):
         """Test successfully deleting a post"""
         post_id = str(ObjectId())
         
@@ -214,17 +217,16 @@ class TestPostsCRUD:
             "images": []
         }
         
-        mock_result = MagicMock()
-        mock_result.deleted_count = 1
-        
         mock_collection = MagicMock()
-        mock_collection.find_one = AsyncMock(return_value=mock_post)
-        mock_collection.delete_one = AsyncMock(return_value=mock_result)
+        mock_collection.find_one_and_delete = AsyncMock(return_value=mock_post)
         
         with patch('routes.posts.get_posts_collection', return_value=mock_collection):
             response = await client.delete(f"/posts/{post_id}")
         
         assert response.status_code == 204
+        archived = mock_archive.insert_one.call_args[0][0]
+        assert archived["_id"] == ObjectId(post_id)
+        assert isinstance(archived["archived_at"], datetime)
 
 
 class TestPostsClaim:
@@ -250,18 +252,26 @@ class TestPostsClaim:
         updated_post["claimed_by"] = mock_auth["id"]
         updated_post["status"] = "claimed"
         
-        mock_result = MagicMock()
-        mock_result.modified_count = 1
-        
         mock_collection = MagicMock()
-        mock_collection.find_one = AsyncMock(side_effect=[mock_post, updated_post])
-        mock_collection.update_one = AsyncMock(return_value=mock_result)
+        mock_collection.find_one_and_update = AsyncMock(return_value=updated_post)
+        mock_collection.find_one = AsyncMock()
         
         with patch('routes.posts.get_posts_collection', return_value=mock_collection):
             response = await client.post(f"/posts/{post_id}/claim")
         
         assert response.status_code == 200
         assert response.json()["status"] == "claimed"
+        # A successful claim is a single conditional write
+        mock_collection.find_one.assert_not_called()
+        claim_filter = mock_collection.find_one_and_update.call_args[0][0]
+        assert claim_filter == {
+            "_id": ObjectId(post_id),
+            "status": "available",
+            "claimed_by": None,
+            "owner_id": {"$ne": mock_auth["id"]}
+        }
+        claim_update = mock_collection.find_one_and_update.call_args[0][1]
+        assert isinstance(claim_update["$set"]["claimed_at"], datetime)
     
     
     @pytest.mark.asyncio
@@ -282,18 +292,184 @@ class TestPostsClaim:
         }
         
         mock_collection = MagicMock()
+        mock_collection.find_one_and_update = AsyncMock(return_value=None)
+        mock_collection.find_one = AsyncMock(return_value=mock_post)
+        
+        with patch('routes.posts.get_posts_collection', return_value=mock_collection):
+            response = await client.post(f"/posts/{post_id}/claim")
+        
+        assert response.status_code == 400
+
+
+    @pytest.mark.asyncio
+    async def test_claim_unavailable_post(self, client: AsyncClient, mock_db, mock_auth):
+        """Test that posts in any other state cannot be claimed"""
+        post_id = str(ObjectId())
+        
+        mock_post = {
+            "_id": ObjectId(post_id),
+            "item_title": "Item",
+            "owner_id": "other_user",
+            "status": "removed",
+            "claimed_by": None,
+            "created_at": datetime.utcnow(),
+            "condition": "used",
+            "location": "Boston",
+            "images": []
+        }
+        
+        mock_collection = MagicMock()
+        mock_collection.find_one_and_update = AsyncMock(return_value=None)
         mock_collection.find_one = AsyncMock(return_value=mock_post)
         
         with patch('routes.posts.get_posts_collection', return_value=mock_collection):
             response = await client.post(f"/posts/{post_id}/claim")
         
         assert response.status_code == 400
+        assert "not available" in response.json()["detail"]
+    
+    
+    @pytest.mark.asyncio
+    async def test_unclaim_post_success(self, client: AsyncClient, mock_db, mock_auth):
+        """Test that the claimer can unclaim with a single conditional write"""
+        post_id = str(ObjectId())
+        
+        updated_post = {
+            "_id": ObjectId(post_id),
+            "item_title": "Free Item",
+            "owner_id": "other_user",
+            "status": "available",
+            "claimed_by": None,
+            "created_at": datetime.utcnow(),
+            "condition": "used",
+            "location": "Boston",
+            "images": []
+        }
+        
+        mock_collection = MagicMock()
+        mock_collection.find_one_and_update = AsyncMock(return_value=updated_post)
+        mock_collection.find_one = AsyncMock()
+        
+        with patch('routes.posts.get_posts_collection', return_value=mock_collection):
+            response = await client.post(f"/posts/{post_id}/unclaim")
+        
+        assert response.status_code == 200
+        assert response.json()["status"] == "available"
+        mock_collection.find_one.assert_not_called()
+        unclaim_filter = mock_collection.find_one_and_update.call_args[0][0]
+        assert unclaim_filter == {"_id": ObjectId(post_id), "status": "claimed", "claimed_by": mock_auth["id"]}
+    
+    
+    @pytest.mark.asyncio
+    async def test_unclaim_post_not_claimer(self, client: AsyncClient, mock_db, mock_auth):
+        """Test that only the claimer can unclaim"""
+        post_id = str(ObjectId())
+        
+        mock_post = {
+            "_id": ObjectId(post_id),
+            "item_title": "Item",
+            "owner_id": "other_user",
+            "status": "claimed",
+            "claimed_by": "someone_else",
+            "created_at": datetime.utcnow(),
+            "condition": "used",
+            "location": "Boston",
+            "images": []
+        }
+        
+        mock_collection = MagicMock()
+        mock_collection.find_one_and_update = AsyncMock(return_value=None)
+        mock_collection.find_one = AsyncMock(return_value=mock_post)
+        
+        with patch('routes.posts.get_posts_collection', return_value=mock_collection):
+            response = await client.post(f"/posts/{post_id}/unclaim")
+        
+        assert response.status_code == 403
+
+
+class TestClaimExpiry:
+    
+    @pytest.mark.asyncio
+    async def test_release_stale_claims(self, mock_db):
+        """Test that a sweep releases old claims with one update_many"""
+        mock_result = MagicMock()
+        mock_result.modified_count = 3
+        mock_collection = MagicMock()
+        mock_collection.update_many = AsyncMock(return_value=mock_result)
+        posts_cache.set(("post", "cached"), "stale")
+        
+        with patch('routes.posts.get_posts_collection', return_value=mock_collection):
+            released = await release_stale_claims(max_age_hours=24)
+        
+        assert released == 3
+        mock_collection.update_many.assert_awaited_once()
+        sweep_filter, sweep_update = mock_collection.update_many.call_args[0]
+        assert sweep_filter["status"] == "claimed"
+        assert (datetime.utcnow() - sweep_filter["claimed_at"]["$lt"]).total_seconds() >= 24 * 3600
+        assert sweep_update["$set"] == {"claimed_by": None, "claimed_at": None, "status": "available"}
+        assert sweep_update["$inc"] == {"version": 1}
+        assert posts_cache.get(("post", "cached")) is None
+    
+    
+    @pytest.mark.asyncio
+    async def test_release_nothing_keeps_cache(self, mock_db):
+        """Test that an empty sweep leaves cached reads alone"""
+        mock_result = MagicMock()
+        mock_result.modified_count = 0
+        mock_collection = MagicMock()
+        mock_collection.update_many = AsyncMock(return_value=mock_result)
+        posts_cache.set(("post", "cached"), "fresh")
+        
+        with patch('routes.posts.get_posts_collection', return_value=mock_collection):
+            released = await release_stale_claims()
+        
+        assert released == 0
+        assert posts_cache.get(("post", "cached")) == "fresh"
+    
+    
+    @pytest.mark.asyncio
+    async def test_legacy_claims_get_claimed_at(self, mock_db):
+        """Test that claims without claimed_at start their expiry clock"""
+        mock_collection = MagicMock()
+        mock_collection.update_many = AsyncMock(return_value=MagicMock(modified_count=2))
+        posts_cache.set(("post", "cached"), "stale")
+        
+        with patch('routes.posts.get_posts_collection', return_value=mock_collection):
+            started = await start_legacy_claim_clocks()
+        
+        assert started == 2
+        mock_collection.update_many.assert_awaited_once_with(
+            {"status": "claimed", "claimed_at": None},
+            {"$currentDate": {"claimed_at": True}, "$inc": {"version": 1}}
+        )
+        assert posts_cache.get(("post", "cached")) is None
 
 
 class TestPostsPickup:
     
     @pytest.mark.asyncio
-    async def test_confirm_pickup_by_owner(self, client: AsyncClient, mock_db, mock_auth):
+    async def test_archive_retries_write_conflict(self, client: AsyncClient, mock_db, mock_auth, mock_archive):
+        """Test that a delete racing another write is retried and then rejected with 409"""
+        post = TestPostsPagination.make_posts(1)[0]
+        post["owner_id"] = mock_auth["id"]
+        write_conflict = OperationFailure(
+            "WriteConflict", code=112, details={"errorLabels": ["TransientTransactionError"]}
+        )
+        mock_collection = MagicMock()
+        # The retry no longer matches, because the racing write changed the post
+        mock_collection.find_one_and_delete = AsyncMock(side_effect=[write_conflict, None])
+        mock_collection.find_one = AsyncMock(return_value=post)
+        
+        with patch('routes.posts.get_posts_collection', return_value=mock_collection):
+            response = await client.delete(f"/posts/{post['_id']}")
+        
+        assert response.status_code == 409
+        assert mock_collection.find_one_and_delete.await_count == 2
+        mock_archive.insert_one.assert_not_called()
+    
+    
+    @pytest.mark.asyncio
+    async def test_confirm_pickup_by_owner(self, client: AsyncClient, mock_db, mock_auth, mock_archive):
         """Test that post owner can confirm pickup"""
         post_id = str(ObjectId())
         
@@ -309,21 +485,20 @@ class TestPostsPickup:
             "images": []
         }
         
-        mock_result = MagicMock()
-        mock_result.deleted_count = 1
-        
         mock_collection = MagicMock()
-        mock_collection.find_one = AsyncMock(return_value=mock_post)
-        mock_collection.delete_one = AsyncMock(return_value=mock_result)
+        mock_collection.find_one_and_delete = AsyncMock(return_value=mock_post)
         
         with patch('routes.posts.get_posts_collection', return_value=mock_collection):
             response = await client.post(f"/posts/{post_id}/pickup")
         
         assert response.status_code == 200
+        archived = mock_archive.insert_one.call_args[0][0]
+        assert archived["_id"] == ObjectId(post_id)
+        assert isinstance(archived["archived_at"], datetime)
     
     
     @pytest.mark.asyncio
-    async def test_confirm_pickup_by_claimer(self, client: AsyncClient, mock_db, mock_auth):
+    async def test_confirm_pickup_by_claimer(self, client: AsyncClient, mock_db, mock_auth, mock_archive):
         """Test that claimer can confirm pickup"""
         post_id = str(ObjectId())
         
@@ -339,21 +514,20 @@ class TestPostsPickup:
             "images": []
         }
         
-        mock_result = MagicMock()
-        mock_result.deleted_count = 1
-        
         mock_collection = MagicMock()
-        mock_collection.find_one = AsyncMock(return_value=mock_post)
-        mock_collection.delete_one = AsyncMock(return_value=mock_result)
+        mock_collection.find_one_and_delete = AsyncMock(return_value=mock_post)
         
         with patch('routes.posts.get_posts_collection', return_value=mock_collection):
             response = await client.post(f"/posts/{post_id}/pickup")
         
         assert response.status_code == 200
+        archived = mock_archive.insert_one.call_args[0][0]
+        assert archived["_id"] == ObjectId(post_id)
+        assert isinstance(archived["archived_at"], datetime)
     
     
     @pytest.mark.asyncio
-    async def test_confirm_pickup_not_claimed(self, client: AsyncClient, mock_db, mock_auth):
+    async def test_confirm_pickup_not_claimed(self, client: AsyncClient, mock_db, mock_auth, mock_archive):
         """Test that pickup cannot be confirmed for unclaimed items"""
         post_id = str(ObjectId())
         
@@ -370,6 +544,7 @@ class TestPostsPickup:
         }
         
         mock_collection = MagicMock()
+        mock_collection.find_one_and_delete = AsyncMock(return_value=None)
         mock_collection.find_one = AsyncMock(return_value=mock_post)
         
         with patch('routes.posts.get_posts_collection', return_value=mock_collection):
@@ -379,7 +554,7 @@ class TestPostsPickup:
     
     
     @pytest.mark.asyncio
-    async def test_confirm_pickup_unauthorized(self, client: AsyncClient, mock_db, mock_auth):
+    async def test_confirm_pickup_unauthorized(self, client: AsyncClient, mock_db, mock_auth, mock_archive):
         """Test that unauthorized users cannot confirm pickup"""
         post_id = str(ObjectId())
         
@@ -396,6 +571,7 @@ class TestPostsPickup:
         }
         
         mock_collection = MagicMock()
+        mock_collection.find_one_and_delete = AsyncMock(return_value=None)
         mock_collection.find_one = AsyncMock(return_value=mock_post)
         
         with patch('routes.posts.get_posts_collection', return_value=mock_collection):
@@ -405,11 +581,12 @@ class TestPostsPickup:
     
     
     @pytest.mark.asyncio
-    async def test_confirm_pickup_not_found(self, client: AsyncClient, mock_db, mock_auth):
+    async def test_confirm_pickup_not_found(self, client: AsyncClient, mock_db, mock_auth, mock_archive):
         """Test confirming pickup for non-existent post"""
         post_id = str(ObjectId())
         
         mock_collection = MagicMock()
+        mock_collection.find_one_and_delete = AsyncMock(return_value=None)
         mock_collection.find_one = AsyncMock(return_value=None)
         
         with patch('routes.posts.get_posts_collection', return_value=mock_collection):
@@ -418,6 +595,435 @@ class TestPostsPickup:
         assert response.status_code == 404
 
 
+class TestPostsArchive:
+    
+    @pytest.mark.asyncio
+    async def test_report_missing_archives(self, client: AsyncClient, mock_db, mock_auth, mock_archive):
+        """Test that reporting missing moves the post in one conditional delete"""
+        post = TestPostsPagination.make_posts(1)[0]
+        post.update(status="claimed", claimed_by=mock_auth["id"])
+        mock_collection = MagicMock()
+        mock_collection.find_one_and_delete = AsyncMock(return_value=post)
+        mock_collection.find_one = AsyncMock()
+        
+        with patch('routes.posts.get_posts_collection', return_value=mock_collection):
+            response = await client.patch(f"/posts/{post['_id']}/missing")
+        
+        assert response.status_code == 200
+        delete_filter = mock_collection.find_one_and_delete.call_args[0][0]
+        assert delete_filter == {"_id": post["_id"], "status": "claimed", "claimed_by": mock_auth["id"]}
+        assert "session" in mock_collection.find_one_and_delete.call_args[1]
+        mock_collection.find_one.assert_not_called()
+        assert mock_archive.insert_one.call_args[0][0]["archive_reason"] == "missing"
+    
+    
+    @pytest.mark.asyncio
+    async def test_get_archived_posts(self, client: AsyncClient, mock_db, mock_auth, mock_archive):
+        """Test that archive history is paginated by archive time"""
+        docs = TestPostsPagination.make_posts(3)
+        for doc in docs:
+            doc.update(owner_id=mock_auth["id"], archived_at=datetime.utcnow(), archive_reason="picked_up")
+        mock_cursor = MagicMock()
+        mock_cursor.sort = MagicMock(return_value=mock_cursor)
+        mock_cursor.limit = MagicMock(return_value=mock_cursor)
+        mock_cursor.to_list = AsyncMock(return_value=docs)
+        mock_archive.find = MagicMock(return_value=mock_cursor)
+        
+        response = await client.get("/posts/archive?role=owner&limit=2")
+        
+        assert response.status_code == 200
+        data = response.json()
+        assert len(data) == 2
+        assert data[0]["archive_reason"] == "picked_up"
+        assert mock_archive.find.call_args[0][0] == {"owner_id": mock_auth["id"]}
+        mock_cursor.sort.assert_called_with([("archived_at", -1), ("_id", -1)])
+        
+        cursor = response.headers["X-Next-Cursor"]
+        await client.get(f"/posts/archive?role=owner&limit=2&cursor={cursor}")
+        query = mock_archive.find.call_args[0][0]
+        assert query["$and"][0] == {"owner_id": mock_auth["id"]}
+        assert query["$and"][1]["$or"][0] == {"archived_at": {"$lt": docs[1]["archived_at"]}}
+    
+    
+    @pytest.mark.asyncio
+    async def test_get_archived_posts_invalid_role(self, client: AsyncClient, mock_db, mock_auth, mock_archive):
+        """Test that role must be owner, claimer or any"""
+        response = await client.get("/posts/archive?role=everyone")
+        
+        assert response.status_code == 422
+
+
+class TestPostsVersioning:
+    
+    @staticmethod
+    def make_post(owner_id, version=3):
+        return {
+            "_id": ObjectId(),
+            "item_title": "Item",
+            "owner_id": owner_id,
+            "status": "available",
+            "created_at": datetime.utcnow(),
+            "condition": "used",
+            "location": "Boston",
+            "images": [],
+            "version": version
+        }
+    
+    
+    @pytest.mark.asyncio
+    async def test_update_with_matching_version(self, client: AsyncClient, mock_db, mock_auth):
+        """Test that If-Match becomes a version condition on the write"""
+        post = self.make_post(mock_auth["id"])
+        mock_collection = MagicMock()
+        mock_collection.find_one_and_update = AsyncMock(return_value=post)
+        
+        with patch('routes.posts.get_posts_collection', return_value=mock_collection):
+            response = await client.put(
+                f"/posts/{post['_id']}",
+                json={"description": "Updated"},
+                headers={"If-Match": '"3"'}
+            )
+        
+        assert response.status_code == 200
+        assert response.json()["version"] == 4
+        update_filter, update = mock_collection.find_one_and_update.call_args[0]
+        assert update_filter["version"] == 3
+        assert update_filter["owner_id"] == mock_auth["id"]
+        assert update["$inc"] == {"version": 1}
+    
+    
+    @pytest.mark.asyncio
+    async def test_update_with_stale_version(self, client: AsyncClient, mock_db, mock_auth):
+        """Test that a version mismatch returns 412"""
+        post = self.make_post(mock_auth["id"], version=5)
+        mock_collection = MagicMock()
+        mock_collection.find_one_and_update = AsyncMock(return_value=None)
+        mock_collection.find_one = AsyncMock(return_value=post)
+        
+        with patch('routes.posts.get_posts_collection', return_value=mock_collection):
+            response = await client.put(
+                f"/posts/{post['_id']}",
+                json={"description": "Updated"},
+                headers={"If-Match": "3"}
+            )
+        
+        assert response.status_code == 412
+        assert "5" in response.json()["detail"]
+    
+    
+    @pytest.mark.asyncio
+    async def test_update_with_invalid_if_match(self, client: AsyncClient, mock_db, mock_auth):
+        """Test that an If-Match tag that is not a post version never matches"""
+        response = await client.put(
+            f"/posts/{ObjectId()}",
+            json={"description": "Updated"},
+            headers={"If-Match": '"5d41402abc4b2a76b9719d911017c592"'}
+        )
+        
+        assert response.status_code == 412
+    
+    
+    @pytest.mark.asyncio
+    async def test_update_unversioned_post(self, client: AsyncClient, mock_db, mock_auth):
+        """Test that version 0 matches posts created before versioning"""
+        post = self.make_post(mock_auth["id"])
+        del post["version"]
+        mock_collection = MagicMock()
+        mock_collection.find_one_and_update = AsyncMock(return_value=post)
+        
+        with patch('routes.posts.get_posts_collection', return_value=mock_collection):
+            response = await client.put(
+                f"/posts/{post['_id']}",
+                json={"description": "Updated"},
+                headers={"If-Match": "0"}
+            )
+        
+        assert response.status_code == 200
+        assert response.json()["version"] == 1
+        update_filter = mock_collection.find_one_and_update.call_args[0][0]
+        assert update_filter["version"] == {"$in": [0, None]}
+
+
+class TestPostsBulkCreate:
+    
+    @staticmethod
+    def assign_ids(docs, ordered=True):
+        # insert_many gives every document an _id before writing
+        for doc in docs:
+            doc["_id"] = ObjectId()
+        return MagicMock(inserted_ids=[doc["_id"] for doc in docs])
+    
+    
+    @pytest.mark.asyncio
+    async def test_bulk_create_single_insert(self, client: AsyncClient, mock_db, mock_auth):
+        """Test that valid items are written with one unordered insert_many"""
+        items = [
+            {"item_title": f"Item {i}", "condition": "used", "location": "Boston"}
+            for i in range(3)
+        ]
+        mock_collection = MagicMock()
+        mock_collection.insert_many = AsyncMock(side_effect=self.assign_ids)
+        
+        with patch('routes.posts.get_posts_collection', return_value=mock_collection):
+            response = await client.post("/posts/bulk", json={"posts": items})
+        
+        assert response.status_code == 200
+        data = response.json()
+        assert data["created"] == 3
+        assert data["failed"] == 0
+        assert [r["post"]["item_title"] for r in data["results"]] == ["Item 0", "Item 1", "Item 2"]
+        assert all(r["post"]["owner_id"] == mock_auth["id"] for r in data["results"])
+        mock_collection.insert_many.assert_awaited_once()
+        assert mock_collection.insert_many.call_args[1]["ordered"] is False
+    
+    
+    @pytest.mark.asyncio
+    async def test_bulk_create_invalid_item(self, client: AsyncClient, mock_db, mock_auth):
+        """Test that an invalid item fails alone"""
+        items = [
+            {"item_title": "Good", "condition": "used", "location": "Boston"},
+            {"item_title": "No location", "condition": "used"},
+            {"item_title": "Also good", "condition": "used", "location": "Cambridge"}
+        ]
+        mock_collection = MagicMock()
+        mock_collection.insert_many = AsyncMock(side_effect=self.assign_ids)
+        
+        with patch('routes.posts.get_posts_collection', return_value=mock_collection):
+            response = await client.post("/posts/bulk", json={"posts": items})
+        
+        data = response.json()
+        assert data["created"] == 2
+        assert data["failed"] == 1
+        assert data["results"][1]["post"] is None
+        assert "location" in data["results"][1]["error"]
+        assert len(mock_collection.insert_many.call_args[0][0]) == 2
+    
+    
+    @pytest.mark.asyncio
+    async def test_bulk_create_write_error(self, client: AsyncClient, mock_db, mock_auth):
+        """Test that a failed write is reported against the right item"""
+        from pymongo.errors import BulkWriteError
+        
+        items = [
+            {"item_title": "Invalid", "condition": "used"},
+            {"item_title": "Rejected", "condition": "used", "location": "Boston"},
+            {"item_title": "Written", "condition": "used", "location": "Boston"}
+        ]
+        
+        def fail_first(docs, ordered=True):
+            self.assign_ids(docs)
+            raise BulkWriteError({"writeErrors": [{"index": 0, "errmsg": "write failed"}]})
+        
+        mock_collection = MagicMock()
+        mock_collection.insert_many = AsyncMock(side_effect=fail_first)
+        
+        with patch('routes.posts.get_posts_collection', return_value=mock_collection):
+            response = await client.post("/posts/bulk", json={"posts": items})
+        
+        results = response.json()["results"]
+        assert results[0]["error"] is not None
+        assert results[1]["error"] == "write failed"
+        assert results[2]["post"]["item_title"] == "Written"
+    
+    
+    @pytest.mark.asyncio
+    async def test_bulk_create_too_many(self, client: AsyncClient, mock_db, mock_auth):
+        """Test that the batch size is capped"""
+        items = [{"item_title": "Item", "condition": "used", "location": "Boston"}] * 51
+        
+        response = await client.post("/posts/bulk", json={"posts": items})
+        
+        assert response.status_code == 422
+
+
+class TestPostsBatch:
+    
+    @staticmethod
+    def make_post(owner_id, **overrides):
+        post = {
+            "_id": ObjectId(),
+            "item_title": "Item",
+            "owner_id": owner_id,
+            "status": "available",
+            "claimed_by": None,
+            "created_at": datetime.utcnow(),
+            "condition": "used",
+            "location": "Boston",
+            "images": [],
+            "version": 2
+        }
+        post.update(overrides)
+        return post
+    
+    
+    @staticmethod
+    def make_collection(read_posts, write_result=None):
+        mock_cursor = MagicMock()
+        mock_cursor.to_list = AsyncMock(return_value=read_posts)
+        mock_collection = MagicMock()
+        mock_collection.find = MagicMock(return_value=mock_cursor)
+        mock_collection.bulk_write = AsyncMock(return_value=write_result)
+        return mock_collection
+    
+    
+    @pytest.mark.asyncio
+    async def test_batch_single_bulk_write(self, client: AsyncClient, mock_db, mock_auth, mock_archive):
+        """Test that deletes and updates go out in one bulk_write with guarded filters"""
+        to_delete = self.make_post(mock_auth["id"])
+        to_update = self.make_post(mock_auth["id"])
+        write_result = MagicMock(deleted_count=1, matched_count=1)
+        mock_collection = self.make_collection([to_delete, to_update], write_result)
+        
+        operations = [
+            {"op": "delete", "post_id": str(to_delete["_id"])},
+            {"op": "update", "post_id": str(to_update["_id"]), "fields": {"item_title": "Renamed"}, "version": 2}
+        ]
+        with patch('routes.posts.get_posts_collection', return_value=mock_collection):
+            response = await client.post("/posts/batch", json={"operations": operations})
+        
+        assert response.status_code == 200
+        data = response.json()
+        assert data["succeeded"] == 2
+        assert data["results"][1]["post"]["item_title"] == "Renamed"
+        assert data["results"][1]["post"]["version"] == 3
+        
+        mock_collection.bulk_write.assert_awaited_once()
+        writes = mock_collection.bulk_write.call_args[0][0]
+        assert writes[0]._filter == {"_id": to_delete["_id"], "owner_id": mock_auth["id"], "version": 2}
+        assert writes[1]._filter == {
+            "_id": to_update["_id"],
+            "owner_id": mock_auth["id"],
+            "status": {"$ne": "claimed"},
+            "version": 2
+        }
+        assert mock_collection.bulk_write.call_args[1]["ordered"] is False
+        # All writes applied, so the posts are read only once
+        assert mock_collection.find.call_count == 1
+        # The deleted post is archived in the same transaction
+        archived = mock_archive.insert_many.call_args[0][0]
+        assert [post["_id"] for post in archived] == [to_delete["_id"]]
+        assert archived[0]["archive_reason"] == "deleted"
+    
+    
+    @pytest.mark.asyncio
+    async def test_batch_rejects_without_writing(self, client: AsyncClient, mock_db, mock_auth, mock_archive):
+        """Test that operations known to fail are reported and not written"""
+        not_mine = self.make_post("someone_else")
+        claimed = self.make_post(mock_auth["id"], status="claimed", claimed_by="claimer")
+        mock_collection = self.make_collection([not_mine, claimed])
+        
+        operations = [
+            {"op": "delete", "post_id": str(not_mine["_id"])},
+            {"op": "update", "post_id": str(claimed["_id"]), "fields": {"description": "New"}},
+            {"op": "delete", "post_id": str(ObjectId())},
+            {"op": "delete", "post_id": "invalid"},
+            {"op": "update", "post_id": str(ObjectId()), "fields": {}}
+        ]
+        with patch('routes.posts.get_posts_collection', return_value=mock_collection):
+            response = await client.post("/posts/batch", json={"operations": operations})
+        
+        results = response.json()["results"]
+        assert [r["error"] for r in results] == [
+            "You can only delete your own posts",
+            "Cannot edit a claimed post",
+            "Post not found",
+            "Invalid post ID",
+            "No fields to update"
+        ]
+        mock_collection.bulk_write.assert_not_called()
+    
+    
+    @pytest.mark.asyncio
+    async def test_batch_detects_concurrent_change(self, client: AsyncClient, mock_db, mock_auth, mock_archive):
+        """Test that a write whose filter stopped matching is reported as failed"""
+        first = self.make_post(mock_auth["id"])
+        second = self.make_post(mock_auth["id"])
+        third = self.make_post(mock_auth["id"])
+        write_result = MagicMock(deleted_count=0, matched_count=1)
+        mock_collection = self.make_collection([first, second, third], write_result)
+        
+        def batch_id():
+            return mock_collection.bulk_write.call_args[0][0][1]._doc["$set"]["last_batch_id"]
+        
+        async def recheck(length):
+            # first was not deleted; second carries this batch's ID; third's
+            # version moved on through a concurrent write only
+            return [
+                {"_id": first["_id"]},
+                {"_id": second["_id"], "last_batch_id": batch_id()},
+                {"_id": third["_id"], "last_batch_id": ObjectId()}
+            ]
+        
+        recheck_cursor = MagicMock()
+        recheck_cursor.to_list = AsyncMock(side_effect=recheck)
+        mock_collection.find = MagicMock(side_effect=[
+            mock_collection.find.return_value, recheck_cursor
+        ])
+        
+        operations = [
+            {"op": "delete", "post_id": str(first["_id"])},
+            {"op": "update", "post_id": str(second["_id"]), "fields": {"description": "New"}},
+            {"op": "update", "post_id": str(third["_id"]), "fields": {"description": "New"}}
+        ]
+        with patch('routes.posts.get_posts_collection', return_value=mock_collection):
+            response = await client.post("/posts/batch", json={"operations": operations})
+        
+        results = response.json()["results"]
+        assert results[0]["ok"] is False
+        assert results[0]["error"] == "Post changed before the operation was applied"
+        assert results[1]["ok"] is True
+        assert results[2]["ok"] is False
+        mock_archive.insert_many.assert_not_called()
+    
+    
+    @pytest.mark.asyncio
+    async def test_batch_delete_archived_concurrently(self, client: AsyncClient, mock_db, mock_auth, mock_archive):
+        """Test that a delete of a post archived by someone else is not counted as applied"""
+        taken = self.make_post(mock_auth["id"])
+        mine = self.make_post(mock_auth["id"])
+        mock_collection = self.make_collection([taken, mine], MagicMock(deleted_count=1, matched_count=0))
+        recheck_cursor = MagicMock()
+        recheck_cursor.to_list = AsyncMock(return_value=[])
+        mock_collection.find = MagicMock(side_effect=[
+            mock_collection.find.return_value, recheck_cursor
+        ])
+        archive_cursor = MagicMock()
+        archive_cursor.to_list = AsyncMock(return_value=[{"_id": taken["_id"]}])
+        mock_archive.find = MagicMock(return_value=archive_cursor)
+        
+        operations = [
+            {"op": "delete", "post_id": str(taken["_id"])},
+            {"op": "delete", "post_id": str(mine["_id"])}
+        ]
+        with patch('routes.posts.get_posts_collection', return_value=mock_collection):
+            response = await client.post("/posts/batch", json={"operations": operations})
+        
+        results = response.json()["results"]
+        assert results[0]["error"] == "Post changed before the operation was applied"
+        assert results[1]["ok"] is True
+        # Only this batch's delete is archived, so no duplicate _id aborts it
+        archived = mock_archive.insert_many.call_args[0][0]
+        assert [post["_id"] for post in archived] == [mine["_id"]]
+    
+    
+    @pytest.mark.asyncio
+    async def test_batch_duplicate_post(self, client: AsyncClient, mock_db, mock_auth, mock_archive):
+        """Test that a post can only be targeted once per batch"""
+        post = self.make_post(mock_auth["id"])
+        mock_collection = self.make_collection([post], MagicMock(deleted_count=1, matched_count=0))
+        
+        operations = [
+            {"op": "delete", "post_id": str(post["_id"])},
+            {"op": "update", "post_id": str(post["_id"]), "fields": {"description": "New"}}
+        ]
+        with patch('routes.posts.get_posts_collection', return_value=mock_collection):
+            response = await client.post("/posts/batch", json={"operations": operations})
+        
+        data = response.json()
+        assert data["results"][0]["ok"] is True
+        assert "one operation per post" in data["results"][1]["error"]
+
+
 class TestPostsEdgeCases:
     
     @pytest.mark.asyncio
@@ -441,6 +1047,7 @@ class TestPostsEdgeCases:
         mock_cursor = AsyncMock()
         mock_cursor.to_list = AsyncMock(return_value=mock_posts)
         mock_cursor.sort = MagicMock(return_value=mock_cursor)
+        mock_cursor.limit = MagicMock(return_value=mock_cursor)
         
         mock_collection = MagicMock()
         mock_collection.find = MagicMock(return_value=mock_cursor)
@@ -457,6 +1064,7 @@ class TestPostsEdgeCases:
         mock_cursor = AsyncMock()
         mock_cursor.to_list = AsyncMock(return_value=[])
         mock_cursor.sort = MagicMock(return_value=mock_cursor)
+        mock_cursor.limit = MagicMock(return_value=mock_cursor)
         
         mock_collection = MagicMock()
         mock_collection.find = MagicMock(return_value=mock_cursor)
@@ -485,6 +1093,7 @@ class TestPostsEdgeCases:
         }
         
         mock_collection = MagicMock()
+        mock_collection.find_one_and_update = AsyncMock(return_value=None)
         mock_collection.find_one = AsyncMock(return_value=mock_post)
         
         with patch('routes.posts.get_posts_collection', return_value=mock_collection):
@@ -536,6 +1145,7 @@ class TestPostsEdgeCases:
         }
         
         mock_collection = MagicMock()
+        mock_collection.find_one_and_update = AsyncMock(return_value=None)
         mock_collection.find_one = AsyncMock(return_value=mock_post)
         
         with patch('routes.posts.get_posts_collection', return_value=mock_collection):
@@ -550,6 +1160,7 @@ class TestPostsEdgeCases:
         post_id = str(ObjectId())
         
         mock_collection = MagicMock()
+        mock_collection.find_one_and_update = AsyncMock(return_value=None)
         mock_collection.find_one = AsyncMock(return_value=None)
         
         with patch('routes.posts.get_posts_collection', return_value=mock_collection):
@@ -559,7 +1170,7 @@ class TestPostsEdgeCases:
     
     
     @pytest.mark.asyncio
-    async def test_delete_post_not_owner(self, client: AsyncClient, mock_db, mock_auth):
+    async def test_delete_post_not_owner(self, client: AsyncClient, mock_db, mock_auth, mock_archive):
         """Test deleting a post you don't own"""
         post_id = str(ObjectId())
         
@@ -575,6 +1186,7 @@ class TestPostsEdgeCases:
         }
         
         mock_collection = MagicMock()
+        mock_collection.find_one_and_delete = AsyncMock(return_value=None)
         mock_collection.find_one = AsyncMock(return_value=mock_post)
         
         with patch('routes.posts.get_posts_collection', return_value=mock_collection):
@@ -584,11 +1196,12 @@ class TestPostsEdgeCases:
     
     
     @pytest.mark.asyncio
-    async def test_delete_post_not_found(self, client: AsyncClient, mock_db, mock_auth):
+    async def test_delete_post_not_found(self, client: AsyncClient, mock_db, mock_auth, mock_archive):
         """Test deleting a non-existent post"""
         post_id = str(ObjectId())
         
         mock_collection = MagicMock()
+        mock_collection.find_one_and_delete = AsyncMock(return_value=None)
         mock_collection.find_one = AsyncMock(return_value=None)
         
         with patch('routes.posts.get_posts_collection', return_value=mock_collection):
@@ -625,6 +1238,7 @@ class TestPostsEdgeCases:
         post_id = str(ObjectId())
         
         mock_collection = MagicMock()
+        mock_collection.find_one_and_update = AsyncMock(return_value=None)
         mock_collection.find_one = AsyncMock(return_value=None)
         
         with patch('routes.posts.get_posts_collection', return_value=mock_collection):
@@ -650,20 +1264,8 @@ class TestPostsEdgeCases:
             "images": []
         }
         
-        updated_post = mock_post.copy()
-        updated_post["item_title"] = "New"
-        updated_post["description"] = "New desc"
-        updated_post["condition"] = "new"
-        updated_post["location"] = "Cambridge"
-        updated_post["category"] = "Electronics"
-        updated_post["images"] = ["new.jpg"]
-        
-        mock_result = MagicMock()
-        mock_result.modified_count = 1
-        
         mock_collection = MagicMock()
-        mock_collection.find_one = AsyncMock(side_effect=[mock_post, updated_post])
-        mock_collection.update_one = AsyncMock(return_value=mock_result)
+        mock_collection.find_one_and_update = AsyncMock(return_value=mock_post)
         
         update_data = {
             "item_title": "New",
@@ -760,6 +1362,7 @@ class TestPostsEdgeCases:
         mock_cursor = AsyncMock()
         mock_cursor.to_list = AsyncMock(return_value=[])
         mock_cursor.sort = MagicMock(return_value=mock_cursor)
+        mock_cursor.limit = MagicMock(return_value=mock_cursor)
         
         mock_collection = MagicMock()
         mock_collection.find = MagicMock(return_value=mock_cursor)
@@ -772,3 +1375,639 @@ class TestPostsEdgeCases:
         call_args = mock_collection.find.call_args[0][0]
         assert "category" not in call_args
 
+
+class TestPostsPagination:
+    
+    @staticmethod
+    def make_posts(count):
+        return [
+            {
+                "_id": ObjectId(),
+                "item_title": f"Item {i}",
+                "owner_id": "user_1",
+                "created_at": datetime.utcnow(),
+                "images": [],
+                "category": "Other",
+                "condition": "used",
+                "location": "Boston",
+                "claimed_by": None,
+                "status": "available"
+            }
+            for i in range(count)
+        ]
+    
+    @staticmethod
+    def make_collection(docs):
+        mock_cursor = AsyncMock()
+        mock_cursor.to_list = AsyncMock(return_value=docs)
+        mock_cursor.sort = MagicMock(return_value=mock_cursor)
+        mock_cursor.limit = MagicMock(return_value=mock_cursor)
+        
+        mock_collection = MagicMock()
+        mock_collection.find = MagicMock(return_value=mock_cursor)
+        return mock_collection, mock_cursor
+    
+    
+    @pytest.mark.asyncio
+    async def test_get_posts_returns_next_cursor(self, client: AsyncClient, mock_db):
+        """Test that a full page returns the cursor of its last post"""
+        docs = self.make_posts(3)
+        mock_collection, mock_cursor = self.make_collection(docs)
+        
+        with patch('routes.posts.get_posts_collection', return_value=mock_collection):
+            response = await client.get("/posts?limit=2")
+        
+        assert response.status_code == 200
+        assert len(response.json()) == 2
+        assert response.headers["X-Next-Cursor"] == encode_cursor(docs[1])
+        mock_cursor.limit.assert_called_once_with(3)
+    
+    
+    @pytest.mark.asyncio
+    async def test_get_posts_last_page_has_no_cursor(self, client: AsyncClient, mock_db):
+        """Test that the last page does not return a cursor"""
+        mock_collection, _ = self.make_collection(self.make_posts(2))
+        
+        with patch('routes.posts.get_posts_collection', return_value=mock_collection):
+            response = await client.get("/posts?limit=2")
+        
+        assert response.status_code == 200
+        assert "X-Next-Cursor" not in response.headers
+    
+    
+    @pytest.mark.asyncio
+    async def test_get_posts_with_cursor(self, client: AsyncClient, mock_db):
+        """Test that the cursor is turned into a keyset filter"""
+        last = self.make_posts(1)[0]
+        mock_collection, _ = self.make_collection([])
+        
+        with patch('routes.posts.get_posts_collection', return_value=mock_collection):
+            response = await client.get(f"/posts?status=available&cursor={encode_cursor(last)}")
+        
+        assert response.status_code == 200
+        query = mock_collection.find.call_args[0][0]
+        assert query["status"] == "available"
+        assert query["$or"][1]["_id"] == {"$lt": last["_id"]}
+    
+    
+    @pytest.mark.asyncio
+    async def test_get_posts_by_owner_and_claimer(self, client: AsyncClient, mock_db):
+        """Test filtering posts by owner and claimer"""
+        mock_collection, _ = self.make_collection([])
+        
+        with patch('routes.posts.get_posts_collection', return_value=mock_collection):
+            response = await client.get("/posts?owner_id=user_1&claimed_by=user_2")
+        
+        assert response.status_code == 200
+        query = mock_collection.find.call_args[0][0]
+        assert query == {"owner_id": "user_1", "claimed_by": "user_2"}
+    
+    
+    @pytest.mark.asyncio
+    async def test_get_posts_sparse_fields(self, client: AsyncClient, mock_db):
+        """Test that fields= becomes a projection and trims the response"""
+        doc = self.make_posts(1)[0]
+        projected = {
+            "_id": doc["_id"],
+            "item_title": doc["item_title"],
+            "images": ["first.jpg"],
+            "status": doc["status"],
+            "created_at": doc["created_at"]
+        }
+        mock_collection, _ = self.make_collection([projected])
+        
+        with patch('routes.posts.get_posts_collection', return_value=mock_collection):
+            response = await client.get("/posts?fields=id,item_title,images[0],status")
+        
+        assert response.status_code == 200
+        assert response.json() == [{
+            "id": str(doc["_id"]),
+            "item_title": doc["item_title"],
+            "images": ["first.jpg"],
+            "status": "available"
+        }]
+        projection = mock_collection.find.call_args[0][1]
+        assert projection == {
+            "item_title": 1,
+            "images": {"$slice": [0, 1]},
+            "status": 1,
+            "created_at": 1
+        }
+    
+    
+    @pytest.mark.asyncio
+    async def test_get_posts_unknown_field(self, client: AsyncClient, mock_db):
+        """Test that unknown sparse fields are rejected"""
+        response = await client.get("/posts?fields=id,password")
+        
+        assert response.status_code == 400
+    
+    
+    @pytest.mark.asyncio
+    async def test_get_posts_computed_field(self, client: AsyncClient, mock_db):
+        """Test that computed fields in fields= point to the option that fills them"""
+        for field, option in (("distance_km", "near="), ("owner_review_count", "include=owner_reputation")):
+            response = await client.get(f"/posts?fields=id,{field}")
+            
+            assert response.status_code == 400
+            assert option in response.json()["detail"]
+    
+    
+    @pytest.mark.asyncio
+    async def test_get_posts_ndjson_stream(self, client: AsyncClient, mock_db):
+        """Test that NDJSON clients get every post streamed line by line"""
+        docs = self.make_posts(3)
+        mock_cursor = MagicMock()
+        mock_cursor.sort = MagicMock(return_value=mock_cursor)
+        mock_cursor.batch_size = MagicMock(return_value=mock_cursor)
+        mock_cursor.limit = MagicMock(return_value=mock_cursor)
+        mock_cursor.__aiter__.return_value = docs
+        
+        mock_collection = MagicMock()
+        mock_collection.find = MagicMock(return_value=mock_cursor)
+        
+        with patch('routes.posts.get_posts_collection', return_value=mock_collection):
+            response = await client.get("/posts", headers={"Accept": "application/x-ndjson"})
+        
+        assert response.status_code == 200
+        assert response.headers["content-type"].startswith("application/x-ndjson")
+        lines = [json.loads(line) for line in response.text.splitlines()]
+        assert [line["id"] for line in lines] == [str(doc["_id"]) for doc in docs]
+        mock_cursor.limit.assert_not_called()
+    
+    
+    @pytest.mark.asyncio
+    async def test_get_posts_include_owner_reputation(self, client: AsyncClient, mock_db):
+        """Test that owner reputation is joined with one batched users query"""
+        docs = self.make_posts(2)
+        docs[1]["owner_id"] = "user_2"
+        mock_collection, _ = self.make_collection(docs)
+        
+        users_cursor = AsyncMock()
+        users_cursor.to_list = AsyncMock(return_value=[
+            {"_id": "user_1", "reputation": 4.5, "review_count": 8}
+        ])
+        mock_db.users.find = MagicMock(return_value=users_cursor)
+        
+        with patch('routes.posts.get_posts_collection', return_value=mock_collection):
+            response = await client.get("/posts?include=owner_reputation")
+        
+        assert response.status_code == 200
+        data = response.json()
+        assert data[0]["owner_reputation"] == 4.5
+        assert data[0]["owner_review_count"] == 8
+        assert data[1]["owner_reputation"] == 0.0
+        assert data[1]["owner_review_count"] == 0
+        mock_db.users.find.assert_called_once_with({"_id": {"$in": ["user_1", "user_2"]}})
+    
+    
+    @pytest.mark.asyncio
+    async def test_get_posts_unknown_include(self, client: AsyncClient, mock_db):
+        """Test that unknown include options are rejected"""
+        response = await client.get("/posts?include=comments")
+        
+        assert response.status_code == 400
+    
+    
+    @pytest.mark.asyncio
+    async def test_get_posts_invalid_cursor(self, client: AsyncClient, mock_db):
+        """Test that a malformed cursor is rejected"""
+        mock_collection, _ = self.make_collection([])
+        
+        with patch('routes.posts.get_posts_collection', return_value=mock_collection):
+            response = await client.get("/posts?cursor=garbage")
+        
+        assert response.status_code == 400
+    
+    
+    @pytest.mark.asyncio
+    async def test_get_posts_limit_above_max(self, client: AsyncClient, mock_db):
+        """Test that page sizes above the server maximum are rejected"""
+        response = await client.get("/posts?limit=1000")
+        
+        assert response.status_code == 422
+
+
+class TestPostsSearch:
+    
+    @staticmethod
+    def make_collection(docs):
+        mock_cursor = AsyncMock()
+        mock_cursor.to_list = AsyncMock(return_value=docs)
+        mock_cursor.sort = MagicMock(return_value=mock_cursor)
+        mock_cursor.skip = MagicMock(return_value=mock_cursor)
+        mock_cursor.limit = MagicMock(return_value=mock_cursor)
+        
+        mock_collection = MagicMock()
+        mock_collection.find = MagicMock(return_value=mock_cursor)
+        return mock_collection, mock_cursor
+    
+    
+    @pytest.mark.asyncio
+    async def test_search_posts_with_filters(self, client: AsyncClient, mock_db):
+        """Test that search combines the text query with category and status filters"""
+        docs = TestPostsPagination.make_posts(1)
+        mock_collection, mock_cursor = self.make_collection(docs)
+        
+        with patch('routes.posts.get_posts_collection', return_value=mock_collection):
+            response = await client.get("/posts/search?q=lamp&category=Furniture&status=available")
+        
+        assert response.status_code == 200
+        assert len(response.json()) == 1
+        query, projection = mock_collection.find.call_args[0]
+        assert query == {"$text": {"$search": "lamp"}, "category": "Furniture", "status": "available"}
+        assert projection == {"score": {"$meta": "textScore"}}
+        mock_cursor.skip.assert_called_once_with(0)
+    
+    
+    @pytest.mark.asyncio
+    async def test_search_posts_pagination(self, client: AsyncClient, mock_db):
+        """Test that search pages continue from the previous offset"""
+        docs = TestPostsPagination.make_posts(3)
+        mock_collection, mock_cursor = self.make_collection(docs)
+        
+        with patch('routes.posts.get_posts_collection', return_value=mock_collection):
+            response = await client.get(f"/posts/search?q=lamp&limit=2&cursor={encode_offset_cursor(4)}")
+        
+        assert response.status_code == 200
+        assert len(response.json()) == 2
+        assert response.headers["X-Next-Cursor"] == encode_offset_cursor(6)
+        mock_cursor.skip.assert_called_once_with(4)
+    
+    
+    @pytest.mark.asyncio
+    async def test_search_posts_requires_query(self, client: AsyncClient, mock_db):
+        """Test that an empty search query is rejected"""
+        response = await client.get("/posts/search?q=")
+        
+        assert response.status_code == 422
+
+
+class TestPostsCache:
+    
+    @pytest.mark.asyncio
+    async def test_list_served_from_cache(self, client: AsyncClient, mock_db):
+        """Test that a repeated listing does not hit the database"""
+        docs = TestPostsPagination.make_posts(3)
+        mock_collection, _ = TestPostsPagination.make_collection(docs)
+        
+        with patch('routes.posts.get_posts_collection', return_value=mock_collection):
+            first = await client.get("/posts?limit=2&status=available")
+            second = await client.get("/posts?status=available&limit=2")
+        
+        assert second.json() == first.json()
+        assert second.headers["X-Next-Cursor"] == first.headers["X-Next-Cursor"]
+        assert mock_collection.find.call_count == 1
+    
+    
+    @pytest.mark.asyncio
+    async def test_claim_invalidates_matching_lists(self, client: AsyncClient, mock_db, mock_auth):
+        """Test that a write drops cached pages whose filters match the post"""
+        post = TestPostsPagination.make_posts(1)[0]
+        post["owner_id"] = "other_user"
+        claimed = dict(post, status="claimed", claimed_by=mock_auth["id"])
+        
+        mock_collection, _ = TestPostsPagination.make_collection([post])
+        mock_collection.find_one_and_update = AsyncMock(return_value=claimed)
+        
+        with patch('routes.posts.get_posts_collection', return_value=mock_collection):
+            await client.get("/posts?status=available")
+            await client.get("/posts?category=Books")
+            await client.post(f"/posts/{post['_id']}/claim")
+            await client.get("/posts?status=available")
+            await client.get("/posts?category=Books")
+        
+        # Only the status=available page matched the claimed post
+        assert mock_collection.find.call_count == 3
+    
+    
+    @pytest.mark.asyncio
+    async def test_get_post_cached(self, client: AsyncClient, mock_db):
+        """Test that single post reads are cached and exposed in stats"""
+        post = TestPostsPagination.make_posts(1)[0]
+        mock_collection = MagicMock()
+        mock_collection.find_one = AsyncMock(return_value=post)
+        
+        with patch('routes.posts.get_posts_collection', return_value=mock_collection):
+            await client.get(f"/posts/{post['_id']}")
+            await client.get(f"/posts/{post['_id']}")
+            stats = await client.get("/posts/cache/stats")
+        
+        assert mock_collection.find_one.call_count == 1
+        assert stats.json()["hits"] >= 1
+    
+    
+    @pytest.mark.asyncio
+    async def test_page_read_during_write_not_cached(self, client: AsyncClient, mock_db):
+        """Test that a page whose read overlapped a write is not cached"""
+        mock_collection, mock_cursor = TestPostsPagination.make_collection(TestPostsPagination.make_posts(1))
+        docs = mock_cursor.to_list.return_value
+        
+        async def read_racing_write(length):
+            collection_versions.bump("posts")
+            return docs
+        
+        mock_cursor.to_list = AsyncMock(side_effect=read_racing_write)
+        
+        with patch('routes.posts.get_posts_collection', return_value=mock_collection):
+            await client.get("/posts?status=available")
+            await client.get("/posts?status=available")
+        
+        assert mock_collection.find.call_count == 2
+
+
+class TestPostsConditionalGet:
+    
+    @pytest.mark.asyncio
+    async def test_include_etag_changes_after_review(self, client: AsyncClient, mock_db):
+        """Test that pages embedding owner reputation move on with new reviews"""
+        mock_collection, _ = TestPostsPagination.make_collection(TestPostsPagination.make_posts(1))
+        mock_db.users.find = MagicMock(return_value=MagicMock(to_list=AsyncMock(return_value=[])))
+        
+        with patch('routes.posts.get_posts_collection', return_value=mock_collection):
+            plain = await client.get("/posts")
+            included = await client.get("/posts?include=owner_reputation")
+            collection_versions.bump("reviews")
+            plain_after = await client.get("/posts", headers={"If-None-Match": plain.headers["ETag"]})
+            included_after = await client.get(
+                "/posts?include=owner_reputation", headers={"If-None-Match": included.headers["ETag"]}
+            )
+        
+        assert plain_after.status_code == 304
+        assert included_after.status_code == 200
+        assert included_after.headers["ETag"] != included.headers["ETag"]
+    
+    
+    @pytest.mark.asyncio
+    async def test_list_not_modified(self, client: AsyncClient, mock_db):
+        """Test that a matching If-None-Match gets a 304 without querying"""
+        mock_collection, _ = TestPostsPagination.make_collection(TestPostsPagination.make_posts(1))
+        
+        with patch('routes.posts.get_posts_collection', return_value=mock_collection):
+            first = await client.get("/posts?status=available")
+            etag = first.headers["ETag"]
+            posts_cache.clear()
+            second = await client.get("/posts?status=available", headers={"If-None-Match": etag})
+        
+        assert "stale-while-revalidate" in first.headers["Cache-Control"]
+        assert second.status_code == 304
+        assert second.headers["ETag"] == etag
+        assert mock_collection.find.call_count == 1
+    
+    
+    @pytest.mark.asyncio
+    async def test_etag_changes_after_write(self, client: AsyncClient, mock_db, mock_auth):
+        """Test that a post write invalidates previously issued ETags"""
+        post = TestPostsPagination.make_posts(1)[0]
+        post["owner_id"] = mock_auth["id"]
+        post["version"] = 2
+        mock_collection = MagicMock()
+        mock_collection.find_one = AsyncMock(side_effect=[post, dict(post, version=3)])
+        mock_collection.find_one_and_update = AsyncMock(return_value=post)
+        
+        with patch('routes.posts.get_posts_collection', return_value=mock_collection):
+            first = await client.get(f"/posts/{post['_id']}")
+            await client.put(f"/posts/{post['_id']}", json={"description": "Updated"})
+            second = await client.get(f"/posts/{post['_id']}", headers={"If-None-Match": first.headers["ETag"]})
+        
+        assert first.headers["ETag"] == '"2"'
+        assert second.status_code == 200
+        assert second.headers["ETag"] == '"3"'
+    
+    
+    @pytest.mark.asyncio
+    async def test_uppercase_id_invalidated_by_write(self, client: AsyncClient, mock_db, mock_auth):
+        """Test that a post read by its uppercase hex ID is not served stale after a write"""
+        post = TestPostsPagination.make_posts(1)[0]
+        post["owner_id"] = mock_auth["id"]
+        post["version"] = 2
+        mock_collection = MagicMock()
+        mock_collection.find_one = AsyncMock(side_effect=[post, dict(post, version=3)])
+        mock_collection.find_one_and_update = AsyncMock(return_value=post)
+        upper_id = str(post["_id"]).upper()
+        
+        with patch('routes.posts.get_posts_collection', return_value=mock_collection):
+            first = await client.get(f"/posts/{upper_id}")
+            await client.put(f"/posts/{post['_id']}", json={"description": "Updated"})
+            second = await client.get(f"/posts/{upper_id}")
+        
+        assert first.headers["ETag"] == '"2"'
+        assert second.headers["ETag"] == '"3"'
+    
+    
+    @pytest.mark.asyncio
+    async def test_etag_round_trips_as_if_match(self, client: AsyncClient, mock_db, mock_auth):
+        """Test that the ETag of GET /posts/{id} works as If-Match on PUT"""
+        post = TestPostsPagination.make_posts(1)[0]
+        post["owner_id"] = mock_auth["id"]
+        post["version"] = 7
+        mock_collection = MagicMock()
+        mock_collection.find_one = AsyncMock(return_value=post)
+        mock_collection.find_one_and_update = AsyncMock(return_value=post)
+        
+        with patch('routes.posts.get_posts_collection', return_value=mock_collection):
+            read = await client.get(f"/posts/{post['_id']}")
+            write = await client.put(
+                f"/posts/{post['_id']}",
+                json={"description": "Updated"},
+                headers={"If-Match": read.headers["ETag"]}
+            )
+        
+        assert write.status_code == 200
+        assert write.headers["ETag"] == '"8"'
+        assert mock_collection.find_one_and_update.call_args[0][0]["version"] == 7
+    
+    
+    @pytest.mark.asyncio
+    async def test_etag_depends_on_query(self, client: AsyncClient, mock_db):
+        """Test that different queries get different ETags"""
+        mock_collection, _ = TestPostsPagination.make_collection([])
+        
+        with patch('routes.posts.get_posts_collection', return_value=mock_collection):
+            first = await client.get("/posts?status=available")
+            second = await client.get("/posts?status=claimed", headers={"If-None-Match": first.headers["ETag"]})
+        
+        assert second.status_code == 200
+        assert second.headers["ETag"] != first.headers["ETag"]
+
+
+class TestPostsNearby:
+    
+    @pytest.mark.asyncio
+    async def test_get_posts_near(self, client: AsyncClient, mock_db):
+        """Test that near= runs a $geoNear aggregation paginated by offset"""
+        docs = TestPostsPagination.make_posts(3)
+        for i, doc in enumerate(docs):
+            doc["coordinates"] = {"type": "Point", "coordinates": [-71.1, 42.37]}
+            doc["distance_km"] = 0.5 * i
+        
+        mock_cursor = AsyncMock()
+        mock_cursor.to_list = AsyncMock(return_value=docs)
+        mock_collection = MagicMock()
+        mock_collection.aggregate = MagicMock(return_value=mock_cursor)
+        
+        with patch('routes.posts.get_posts_collection', return_value=mock_collection):
+            response = await client.get("/posts?near=42.36,-71.06&radius_km=5&status=available&limit=2")
+        
+        assert response.status_code == 200
+        data = response.json()
+        assert [post["distance_km"] for post in data] == [0.0, 0.5]
+        assert data[0]["coordinates"] == {"lat": 42.37, "lng": -71.1}
+        assert response.headers["X-Next-Cursor"] == encode_offset_cursor(2)
+        
+        pipeline = mock_collection.aggregate.call_args[0][0]
+        geo_near = pipeline[0]["$geoNear"]
+        assert geo_near["near"] == {"type": "Point", "coordinates": [-71.06, 42.36]}
+        assert geo_near["maxDistance"] == 5000
+        assert geo_near["query"] == {"status": "available"}
+        assert pipeline[1:] == [{"$skip": 0}, {"$limit": 3}]
+    
+    
+    @pytest.mark.asyncio
+    async def test_get_posts_near_with_fields(self, client: AsyncClient, mock_db):
+        """Test that indexed fields use the aggregation $slice form inside $project"""
+        doc = TestPostsPagination.make_posts(1)[0]
+        doc["images"] = ["a.jpg"]
+        doc["distance_km"] = 1.25
+        
+        mock_cursor = AsyncMock()
+        mock_cursor.to_list = AsyncMock(return_value=[doc])
+        mock_collection = MagicMock()
+        mock_collection.aggregate = MagicMock(return_value=mock_cursor)
+        
+        with patch('routes.posts.get_posts_collection', return_value=mock_collection):
+            response = await client.get("/posts?near=42.36,-71.06&fields=id,images[0],status")
+        
+        assert response.status_code == 200
+        assert response.json()[0]["images"] == ["a.jpg"]
+        pipeline = mock_collection.aggregate.call_args[0][0]
+        assert pipeline[1] == {"$project": {
+            "images": {"$slice": ["$images", 0, 1]},
+            "status": 1,
+            "created_at": 1,
+            "distance_km": 1
+        }}
+    
+    
+    @pytest.mark.asyncio
+    async def test_get_posts_near_invalid(self, client: AsyncClient, mock_db):
+        """Test that malformed near= values are rejected"""
+        response = await client.get("/posts?near=boston")
+        
+        assert response.status_code == 400
+    
+    
+    @pytest.mark.asyncio
+    async def test_create_post_resolves_location(self, client: AsyncClient, mock_db, mock_auth):
+        """Test that text-only locations are geocoded from the gazetteer"""
+        mock_collection = MagicMock()
+        mock_collection.insert_one = AsyncMock(return_value=MagicMock(inserted_id=ObjectId()))
+        
+        with patch('routes.posts.get_posts_collection', return_value=mock_collection):
+            response = await client.post("/posts", json={
+                "item_title": "Desk",
+                "condition": "used",
+                "location": "5 Elm St, Somerville, Massachusetts"
+            })
+        
+        assert response.status_code == 201
+        assert response.json()["coordinates"] == {"lat": 42.3876, "lng": -71.0995}
+        inserted = mock_collection.insert_one.call_args[0][0]
+        assert inserted["coordinates"] == {"type": "Point", "coordinates": [-71.0995, 42.3876]}
+    
+    
+    @pytest.mark.asyncio
+    async def test_create_post_explicit_coordinates(self, client: AsyncClient, mock_db, mock_auth):
+        """Test that explicit coordinates take precedence over the location text"""
+        mock_collection = MagicMock()
+        mock_collection.insert_one = AsyncMock(return_value=MagicMock(inserted_id=ObjectId()))
+        
+        with patch('routes.posts.get_posts_collection', return_value=mock_collection):
+            response = await client.post("/posts", json={
+                "item_title": "Desk",
+                "condition": "used",
+                "location": "Boston",
+                "coordinates": {"lat": 40.0, "lng": -75.0}
+            })
+        
+        assert response.status_code == 201
+        assert response.json()["coordinates"] == {"lat": 40.0, "lng": -75.0}
+
+
+class TestPostsFacets:
+    
+    @staticmethod
+    def make_collection():
+        mock_cursor = AsyncMock()
+        mock_cursor.to_list = AsyncMock(return_value=[{
+            "category": [{"_id": "Books", "count": 2}, {"_id": None, "count": 1}],
+            "status": [{"_id": "available", "count": 3}],
+            "condition": [{"_id": "used", "count": 3}]
+        }])
+        mock_collection = MagicMock()
+        mock_collection.aggregate = MagicMock(return_value=mock_cursor)
+        return mock_collection
+    
+    
+    @pytest.mark.asyncio
+    async def test_get_facets(self, client: AsyncClient, mock_db):
+        """Test facet counts come from one $facet aggregation and are cached"""
+        mock_collection = self.make_collection()
+        
+        with patch('routes.posts.get_posts_collection', return_value=mock_collection):
+            response = await client.get("/posts/facets?status=available")
+            await client.get("/posts/facets?status=available")
+        
+        assert response.status_code == 200
+        assert response.json() == {
+            "total": 3,
+            "category": {"Books": 2, "none": 1},
+            "status": {"available": 3},
+            "condition": {"used": 3}
+        }
+        pipeline = mock_collection.aggregate.call_args[0][0]
+        assert pipeline[0] == {"$match": {"status": "available"}}
+        assert set(pipeline[1]["$facet"]) == {"category", "status", "condition"}
+        assert mock_collection.aggregate.call_count == 1
+    
+    
+    @pytest.mark.asyncio
+    async def test_facets_read_during_write_not_cached(self, client: AsyncClient, mock_db):
+        """Test that counts aggregated while a post changed are not cached"""
+        mock_collection = self.make_collection()
+        rows = mock_collection.aggregate.return_value.to_list.return_value
+        
+        async def aggregate_racing_write(length=None):
+            collection_versions.bump("posts")
+            return rows
+        
+        mock_collection.aggregate.return_value.to_list = AsyncMock(side_effect=aggregate_racing_write)
+        
+        with patch('routes.posts.get_posts_collection', return_value=mock_collection):
+            response = await client.get("/posts/facets?status=available")
+            await client.get("/posts/facets?status=available")
+        
+        assert response.status_code == 200
+        assert response.json()["total"] == 3
+        assert mock_collection.aggregate.call_count == 2
+    
+    
+    @pytest.mark.asyncio
+    async def test_facets_updated_by_writes(self, client: AsyncClient, mock_db, mock_auth):
+        """Test that a claim moves the post between cached facet counts"""
+        mock_collection = self.make_collection()
+        post = TestPostsPagination.make_posts(1)[0]
+        post.update(owner_id="other_user", category="Books")
+        claimed = dict(post, status="claimed", claimed_by=mock_auth["id"])
+        mock_collection.find_one_and_update = AsyncMock(return_value=claimed)
+        
+        with patch('routes.posts.get_posts_collection', return_value=mock_collection):
+            await client.get("/posts/facets")
+            await client.post(f"/posts/{post['_id']}/claim")
+            response = await client.get("/posts/facets")
+        
+        assert mock_collection.aggregate.call_count == 1
+        data = response.json()
+        assert data["total"] == 3
+        assert data["status"] == {"available": 2, "claimed": 1}
+        assert data["category"] == {"Books": 2, "none": 1}
@@ -0,0 +1,160 @@
+"""
+Test cases for reputation recomputes and the backfill command.
+"""
+import pytest
+from unittest.mock import AsyncMock, MagicMock
+from reputation import (
+    compute_reputations, recompute_poster_reputation, reconcile_users, rating_bucket, reputation_update
+)
+from backfill_reputation import backfill, load_checkpoint
+
+
+def mock_aggregate(mock_db, totals):
+    cursor = MagicMock()
+    cursor.to_list = AsyncMock(return_value=totals)
+    mock_db.reviews.aggregate = MagicMock(return_value=cursor)
+
+
+class TestRecompute:
+
+    @pytest.mark.asyncio
+    async def test_compute_reputations(self, mock_db):
+        """Test that totals come from one $group aggregation"""
+        mock_aggregate(mock_db, [
+            {"_id": "poster1", "rating_sum": 9.0, "review_count": 2, "rating_histogram": {"4": 1, "5": 1}}
+        ])
+
+        result = await compute_reputations(["poster1", "poster2"])
+
+        assert result["poster1"] == {
+            "rating_sum": 9.0,
+            "review_count": 2,
+            "reputation": 4.5,
+            "rating_histogram": {"1": 0, "2": 0, "3": 0, "4": 1, "5": 1}
+        }
+        # Posters without reviews are reset to zero
+        assert result["poster2"] == {
+            "rating_sum": 0,
+            "review_count": 0,
+            "reputation": 0.0,
+            "rating_histogram": {"1": 0, "2": 0, "3": 0, "4": 0, "5": 0}
+        }
+        pipeline = mock_db.reviews.aggregate.call_args[0][0]
+        assert pipeline[0] == {"$match": {"poster_id": {"$in": ["poster1", "poster2"]}}}
+        assert "$group" in pipeline[1]
+        assert pipeline[2]["$group"]["_id"] == "$_id.poster_id"
+
+
+    def test_rating_bucket(self):
+        """Test that ratings are bucketed by rounding half up"""
+        assert [rating_bucket(r) for r in (1.0, 1.4, 2.5, 3.49, 4.5, 5.0)] == ["1", "1", "3", "3", "5", "5"]
+
+
+    def test_reputation_update_histogram(self):
+        """Test that the incremental update bumps the rating's bucket"""
+        pipeline = reputation_update(4.0)
+
+        histogram = pipeline[0]["$set"]["rating_histogram"]["$mergeObjects"]
+        assert histogram[0] == {"$ifNull": ["$rating_histogram", {}]}
+        assert histogram[1] == {"4": {"$add": [{"$ifNull": ["$rating_histogram.4", 0]}, 1]}}
+
+
+    @pytest.mark.asyncio
+    async def test_recompute_poster_reputation(self, mock_db):
+        """Test that a single poster is rebuilt without loading raw reviews"""
+        mock_aggregate(mock_db, [{"_id": "poster1", "rating_sum": 10.0, "review_count": 3}])
+        mock_db.reviews.find = MagicMock()
+        mock_db.users.update_one = AsyncMock()
+
+        fields = await recompute_poster_reputation("poster1")
+
+        assert fields["reputation"] == 3.33
+        mock_db.reviews.find.assert_not_called()
+        mock_db.users.update_one.assert_awaited_once_with(
+            {"_id": "poster1"}, {"$set": fields}, upsert=True
+        )
+
+
+class TestReconcile:
+
+    @pytest.mark.asyncio
+    async def test_reconcile_fixes_drift(self, mock_db):
+        """Test that only drifted users are written, guarded by their review count"""
+        mock_aggregate(mock_db, [
+            {"_id": "ok", "rating_sum": 8.0, "review_count": 2, "rating_histogram": {"4": 2}},
+            {"_id": "drifted", "rating_sum": 12.0, "review_count": 3, "rating_histogram": {"4": 3}}
+        ])
+        mock_db.users.bulk_write = AsyncMock(return_value=MagicMock(matched_count=1))
+        users = [
+            # Buckets that were never incremented are not drift
+            {"_id": "ok", "rating_sum": 8.0, "review_count": 2, "reputation": 4.0, "rating_histogram": {"4": 2}},
+            {"_id": "drifted", "review_count": 2, "reputation": 4.5}
+        ]
+
+        report = await reconcile_users(users)
+
+        assert report["checked"] == 2
+        assert [entry["user_id"] for entry in report["drifted"]] == ["drifted"]
+        assert report["drifted"][0]["drift"]["review_count"] == (2, 3)
+        assert report["updated"] == 1
+        writes = mock_db.users.bulk_write.call_args[0][0]
+        assert len(writes) == 1
+        assert writes[0]._filter == {"_id": "drifted", "review_count": 2}
+
+
+    @pytest.mark.asyncio
+    async def test_reconcile_report_only(self, mock_db):
+        """Test that report mode changes nothing"""
+        mock_aggregate(mock_db, [])
+        mock_db.users.bulk_write = AsyncMock()
+
+        report = await reconcile_users([{"_id": "stale", "review_count": 4, "reputation": 3.0}], write=False)
+
+        assert len(report["drifted"]) == 1
+        mock_db.users.bulk_write.assert_not_called()
+
+
+class TestBackfill:
+
+    @staticmethod
+    def mock_users(mock_db, batches):
+        cursor = MagicMock()
+        cursor.sort = MagicMock(return_value=cursor)
+        cursor.limit = MagicMock(return_value=cursor)
+        cursor.to_list = AsyncMock(side_effect=batches)
+        mock_db.users.find = MagicMock(return_value=cursor)
+
+
+    @pytest.mark.asyncio
+    async def test_backfill_in_batches(self, mock_db, tmp_path):
+        """Test that users are walked in _id order batch by batch"""
+        self.mock_users(mock_db, [
+            [{"_id": "a", "review_count": 1}, {"_id": "b", "review_count": 1}],
+            [{"_id": "c", "review_count": 1}],
+            []
+        ])
+        mock_aggregate(mock_db, [])
+        mock_db.users.bulk_write = AsyncMock(return_value=MagicMock(matched_count=2))
+        state_file = str(tmp_path / "state")
+
+        totals = await backfill(2, 0, True, state_file, False)
+
+        assert totals["checked"] == 3
+        assert totals["drifted"] == 3
+        assert mock_db.users.bulk_write.await_count == 2
+        queries = [call[0][0] for call in mock_db.users.find.call_args_list]
+        assert queries == [{}, {"_id": {"$gt": "b"}}, {"_id": {"$gt": "c"}}]
+        # A finished run leaves no checkpoint behind
+        assert load_checkpoint(state_file) is None
+
+
+    @pytest.mark.asyncio
+    async def test_backfill_resume(self, mock_db, tmp_path):
+        """Test that --resume starts after the saved checkpoint"""
+        state_file = tmp_path / "state"
+        state_file.write_text('{"last_user_id": "m"}')
+        self.mock_users(mock_db, [[]])
+
+        await backfill(100, 0, True, str(state_file), True)
+
+        assert mock_db.users.find.call_args[0][0] == {"_id": {"$gt": "m"}}
@@ -3,6 +3,8 @@ from httpx import AsyncClient
 from datetime import datetime
 from unittest.mock import AsyncMock, MagicMock
 from bson import ObjectId
+from pymongo.errors import DuplicateKeyError, OperationFailure
+from routes.posts import posts_cache
 
 
 class TestReviews:
@@ -40,6 +42,11 @@ class TestReviews:
         
         mock_db.users.update_one = AsyncMock()
         
+        plain_page = ("list", (), 50, None, None, (), None)
+        included_page = ("list", (), 50, None, None, ("owner_reputation",), None)
+        posts_cache.set(plain_page, ([], None))
+        posts_cache.set(included_page, ([], None))
+        
         review_data = {
             "poster_id": poster_id,
             "post_id": post_id,
@@ -52,6 +59,9 @@ class TestReviews:
         assert response.status_code == 201
         assert response.json()["rating"] == 5.0
         assert response.json()["reviewer_id"] == mock_auth["id"]
+        # Only pages embedding owner reputation are dropped
+        assert posts_cache.get(plain_page) is not None
+        assert posts_cache.get(included_page) is None
     
     
     @pytest.mark.asyncio
@@ -106,15 +116,13 @@ class TestReviews:
             "images": []
         }
         
-        existing_review = {
-            "_id": ObjectId(),
-            "reviewer_id": mock_auth["id"],
-            "post_id": post_id,
-            "rating": 4.0
-        }
-        
         mock_db.posts.find_one = AsyncMock(return_value=mock_post)
-        mock_db.reviews.find_one = AsyncMock(return_value=existing_review)
+        mock_db.reviews.find_one = AsyncMock()
+        # The unique index rejects the second review
+        mock_db.reviews.insert_one = AsyncMock(
+            side_effect=DuplicateKeyError("E11000 duplicate key error collection: goodfinds.reviews")
+        )
+        mock_db.users.update_one = AsyncMock()
         
         review_data = {
             "poster_id": poster_id,
@@ -127,6 +135,71 @@ class TestReviews:
         
         assert response.status_code == 400
         assert "already reviewed" in response.json()["detail"].lower()
+        # No pre-read, and a rejected review does not count towards reputation
+        mock_db.reviews.find_one.assert_not_called()
+        mock_db.users.update_one.assert_not_called()
+    
+    
+    @staticmethod
+    def write_conflict():
+        return OperationFailure(
+            "WriteConflict", code=112, details={"errorLabels": ["TransientTransactionError"]}
+        )
+    
+    
+    @pytest.mark.asyncio
+    async def test_create_review_retries_write_conflict(self, client: AsyncClient, mock_db, mock_auth):
+        """
+        Test that a write conflict with a concurrent review of the same poster is retried
+        """
+        post_id = str(ObjectId())
+        mock_db.posts.find_one = AsyncMock(return_value={
+            "_id": ObjectId(post_id),
+            "owner_id": "user_poster123",
+            "claimed_by": mock_auth["id"],
+            "status": "claimed"
+        })
+        mock_db.reviews.insert_one = AsyncMock(return_value=MagicMock(inserted_id=ObjectId()))
+        mock_db.users.update_one = AsyncMock(side_effect=[self.write_conflict(), None])
+        
+        response = await client.post("/reviews", json={
+            "poster_id": "user_poster123",
+            "post_id": post_id,
+            "rating": 4.0
+        })
+        
+        assert response.status_code == 201
+        assert mock_db.reviews.insert_one.await_count == 2
+        assert mock_db.users.update_one.await_count == 2
+    
+    
+    @pytest.mark.asyncio
+    async def test_create_review_racing_duplicate(self, client: AsyncClient, mock_db, mock_auth):
+        """
+        Test that a duplicate in flight conflicts first, then is rejected with 400 on retry
+        """
+        post_id = str(ObjectId())
+        mock_db.posts.find_one = AsyncMock(return_value={
+            "_id": ObjectId(post_id),
+            "owner_id": "user_poster123",
+            "claimed_by": mock_auth["id"],
+            "status": "claimed"
+        })
+        mock_db.reviews.insert_one = AsyncMock(side_effect=[
+            self.write_conflict(),
+            DuplicateKeyError("E11000 duplicate key error collection: goodfinds.reviews")
+        ])
+        mock_db.users.update_one = AsyncMock()
+        
+        response = await client.post("/reviews", json={
+            "poster_id": "user_poster123",
+            "post_id": post_id,
+            "rating": 4.0
+        })
+        
+        assert response.status_code == 400
+        assert "already reviewed" in response.json()["detail"].lower()
+        mock_db.users.update_one.assert_not_called()
     
     
     @pytest.mark.asyncio
@@ -249,6 +322,7 @@ class TestReviews:
         post_id = str(ObjectId())
         
         mock_db.posts.find_one = AsyncMock(return_value=None)
+        mock_db.posts_archive.find_one = AsyncMock(return_value=None)
         
         review_data = {
             "poster_id": "user_poster",
@@ -263,6 +337,48 @@ class TestReviews:
         assert "post not found" in response.json()["detail"].lower()
     
     
+    @pytest.mark.asyncio
+    async def test_create_review_archived_post(self, client: AsyncClient, mock_db, mock_auth):
+        """
+        Test that picked up posts can still be reviewed from the archive
+        """
+        post_id = str(ObjectId())
+        archived_post = {
+            "_id": ObjectId(post_id),
+            "item_title": "Free Couch",
+            "owner_id": "user_poster",
+            "claimed_by": mock_auth["id"],
+            "status": "claimed",
+            "created_at": datetime.utcnow(),
+            "condition": "used",
+            "location": "Boston",
+            "images": [],
+            "archived_at": datetime.utcnow(),
+            "archive_reason": "picked_up"
+        }
+        
+        mock_db.posts.find_one = AsyncMock(return_value=None)
+        mock_db.posts_archive.find_one = AsyncMock(return_value=archived_post)
+        mock_db.reviews.find_one = AsyncMock(return_value=None)
+        mock_db.reviews.insert_one = AsyncMock(return_value=MagicMock(inserted_id=ObjectId()))
+        mock_cursor = AsyncMock()
+        mock_cursor.to_list = AsyncMock(return_value=[])
+        mock_db.reviews.find = MagicMock(return_value=mock_cursor)
+        mock_db.users.update_one = AsyncMock()
+        
+        review_data = {
+            "poster_id": "user_poster",
+            "post_id": post_id,
+            "rating": 4.0,
+            "comment": "Smooth pickup"
+        }
+        
+        response = await client.post("/reviews", json=review_data)
+        
+        assert response.status_code == 201
+        mock_db.posts_archive.find_one.assert_awaited_once_with({"_id": ObjectId(post_id)})
+    
+    
     @pytest.mark.asyncio
     async def test_create_review_wrong_poster_id(self, client: AsyncClient, mock_db, mock_auth):
         """
@@ -487,10 +603,108 @@ class TestReviews:
         assert response.json() == []
     
     
+    @pytest.mark.asyncio
+    async def test_get_poster_reviews_sparse_fields(self, client: AsyncClient, mock_db):
+        """
+        Test getting poster reviews with only selected fields
+        """
+        review_id = ObjectId()
+        
+        mock_cursor = AsyncMock()
+        mock_cursor.to_list = AsyncMock(return_value=[{"_id": review_id, "rating": 4.0}])
+        mock_cursor.limit = MagicMock(return_value=mock_cursor)
+        mock_cursor.sort = MagicMock(return_value=mock_cursor)
+        mock_db.reviews.find = MagicMock(return_value=mock_cursor)
+        
+        response = await client.get("/reviews/poster/user_poster123?fields=id,rating")
+        
+        assert response.status_code == 200
+        assert response.json() == [{"id": str(review_id), "rating": 4.0}]
+        # created_at is fetched for the next cursor but not returned
+        assert mock_db.reviews.find.call_args[0][1] == {"rating": 1, "created_at": 1}
+    
+    
+    @pytest.mark.asyncio
+    async def test_get_poster_reviews_pagination(self, client: AsyncClient, mock_db):
+        """
+        Test that poster reviews are keyset paginated on (created_at, _id)
+        """
+        poster_id = "user_poster123"
+        mock_reviews = [
+            {
+                "_id": ObjectId(),
+                "reviewer_id": f"user_{i}",
+                "poster_id": poster_id,
+                "post_id": str(ObjectId()),
+                "rating": 4.0,
+                "created_at": datetime(2025, 1, 10 - i)
+            }
+            for i in range(3)
+        ]
+        
+        mock_cursor = AsyncMock()
+        mock_cursor.to_list = AsyncMock(return_value=mock_reviews)
+        mock_cursor.limit = MagicMock(return_value=mock_cursor)
+        mock_cursor.sort = MagicMock(return_value=mock_cursor)
+        mock_db.reviews.find = MagicMock(return_value=mock_cursor)
+        
+        response = await client.get(f"/reviews/poster/{poster_id}?limit=2")
+        
+        assert response.status_code == 200
+        assert len(response.json()) == 2
+        mock_cursor.sort.assert_called_with([("created_at", -1), ("_id", -1)])
+        mock_cursor.limit.assert_called_with(3)
+        
+        next_cursor = response.headers["X-Next-Cursor"]
+        mock_cursor.to_list = AsyncMock(return_value=mock_reviews[2:])
+        response = await client.get(f"/reviews/poster/{poster_id}?limit=2&cursor={next_cursor}")
+        
+        assert len(response.json()) == 1
+        assert "X-Next-Cursor" not in response.headers
+        query = mock_db.reviews.find.call_args[0][0]
+        assert query["poster_id"] == poster_id
+        assert query["$or"] == [
+            {"created_at": {"$lt": mock_reviews[1]["created_at"]}},
+            {"created_at": mock_reviews[1]["created_at"], "_id": {"$lt": mock_reviews[1]["_id"]}}
+        ]
+    
+    
+    @pytest.mark.asyncio
+    async def test_get_poster_reviews_invalid_cursor(self, client: AsyncClient, mock_db):
+        """
+        Test that a malformed cursor is rejected
+        """
+        response = await client.get("/reviews/poster/user_poster123?cursor=not-a-cursor")
+        
+        assert response.status_code == 400
+    
+    
+    @pytest.mark.asyncio
+    async def test_get_poster_reviews_not_modified(self, client: AsyncClient, mock_db):
+        """
+        Test that poster reviews answer If-None-Match with 304
+        """
+        mock_cursor = AsyncMock()
+        mock_cursor.to_list = AsyncMock(return_value=[])
+        mock_cursor.limit = MagicMock(return_value=mock_cursor)
+        mock_cursor.sort = MagicMock(return_value=mock_cursor)
+        mock_db.reviews.find = MagicMock(return_value=mock_cursor)
+        
+        first = await client.get("/reviews/poster/user_poster123")
+        second = await client.get(
+            "/reviews/poster/user_poster123",
+            headers={"If-None-Match": first.headers["ETag"]}
+        )
+        
+        assert second.status_code == 304
+        assert mock_db.reviews.find.call_count == 1
+    
+    
     @pytest.mark.asyncio
     async def test_update_poster_reputation_with_reviews(self, client: AsyncClient, mock_db, mock_auth):
         """
-        Test that creating a review updates poster reputation correctly
+        Test that creating a review updates poster reputation in one write,
+        without reading the poster's other reviews
         """
         post_id = str(ObjectId())
         poster_id = "user_poster123"
@@ -507,35 +721,13 @@ class TestReviews:
             "images": []
         }
         
-        existing_reviews = [
-            {
-                "_id": ObjectId(),
-                "reviewer_id": "user_1",
-                "poster_id": poster_id,
-                "post_id": str(ObjectId()),
-                "rating": 5.0,
-                "created_at": datetime.utcnow()
-            },
-            {
-                "_id": ObjectId(),
-                "reviewer_id": "user_2",
-                "poster_id": poster_id,
-                "post_id": str(ObjectId()),
-                "rating": 4.0,
-                "created_at": datetime.utcnow()
-            }
-        ]
-        
         mock_db.posts.find_one = AsyncMock(return_value=mock_post)
         mock_db.reviews.find_one = AsyncMock(return_value=None)
         
         mock_insert_result = MagicMock()
         mock_insert_result.inserted_id = ObjectId()
         mock_db.reviews.insert_one = AsyncMock(return_value=mock_insert_result)
-        
-        mock_cursor = AsyncMock()
-        mock_cursor.to_list = AsyncMock(return_value=existing_reviews)
-        mock_db.reviews.find = MagicMock(return_value=mock_cursor)
+        mock_db.reviews.find = MagicMock()
         
         mock_db.users.update_one = AsyncMock()
         
@@ -549,6 +741,23 @@ class TestReviews:
         response = await client.post("/reviews", json=review_data)
         
         assert response.status_code == 201
-        # Verify that update_one was called to update reputation
+        mock_db.reviews.find.assert_not_called()
         mock_db.users.update_one.assert_called_once()
+        user_filter, pipeline = mock_db.users.update_one.call_args[0]
+        assert user_filter == {"_id": poster_id}
+        assert mock_db.users.update_one.call_args[1]["upsert"] is True
+        # The review and the reputation totals are written in one transaction
+        session = mock_db.reviews.insert_one.call_args[1]["session"]
+        assert session is not None
+        assert mock_db.users.update_one.call_args[1]["session"] is session
+        # The rating is added to the running totals and reputation derived from them
+        assert pipeline[0]["$set"]["rating_sum"]["$add"][1] == 3.0
+        assert pipeline[0]["$set"]["review_count"] == {"$add": [{"$ifNull": ["$review_count", 0]}, 1]}
+        assert pipeline[1]["$set"]["reputation"] == {
+            "$round": [{"$divide": ["$rating_sum", "$review_count"]}, 2]
+        }
+        # The star histogram is updated in the same write
+        assert pipeline[0]["$set"]["rating_histogram"]["$mergeObjects"][1] == {
+            "3": {"$add": [{"$ifNull": ["$rating_histogram.3", 0]}, 1]}
+        }
 
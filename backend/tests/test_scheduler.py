@@ -0,0 +1,39 @@
+"""
+Test cases for periodic background jobs.
+"""
+import asyncio
+import pytest
+from unittest.mock import AsyncMock
+from scheduler import PeriodicJob
+
+
+class TestPeriodicJob:
+    
+    @pytest.mark.asyncio
+    async def test_runs_until_stopped(self):
+        """Test that the job runs every interval and stops cleanly"""
+        job = AsyncMock()
+        periodic = PeriodicJob("test", 0.01, job)
+        
+        periodic.start()
+        await asyncio.sleep(0.05)
+        await periodic.stop()
+        runs = job.await_count
+        await asyncio.sleep(0.03)
+        
+        assert runs >= 2
+        assert job.await_count == runs
+    
+    
+    @pytest.mark.asyncio
+    async def test_failure_does_not_stop_job(self):
+        """Test that a failing run is retried on the next interval"""
+        job = AsyncMock(side_effect=[Exception("boom"), None, None, None, None, None])
+        periodic = PeriodicJob("test", 0.01, job)
+        
+        periodic.start()
+        await asyncio.sleep(0.05)
+        await periodic.stop()
+        
+        assert periodic.failures == 1
+        assert periodic.runs >= 1
@@ -3,7 +3,7 @@ Test cases for users endpoints.
 """
 import pytest
 from httpx import AsyncClient
-from unittest.mock import AsyncMock
+from unittest.mock import AsyncMock, MagicMock
 
 
 class TestUsersEndpoints:
@@ -49,6 +49,26 @@ class TestUsersEndpoints:
         assert data["username"] == "Unknown User"
         assert data["reputation"] == 0.0
         assert data["review_count"] == 0
+        assert data["rating_histogram"] == {"1": 0, "2": 0, "3": 0, "4": 0, "5": 0}
+    
+    
+    @pytest.mark.asyncio
+    async def test_get_user_reputation_histogram(self, client: AsyncClient, mock_db):
+        """Test that the rating histogram is returned with every bucket"""
+        mock_user = {
+            "_id": "user_123",
+            "reputation": 4.67,
+            "review_count": 3,
+            "rating_histogram": {"4": 1, "5": 2}
+        }
+        
+        mock_db.users.find_one = AsyncMock(return_value=mock_user)
+        
+        response = await client.get("/users/user_123/reputation")
+        
+        assert response.status_code == 200
+        assert response.json()["rating_histogram"] == {"1": 0, "2": 0, "3": 0, "4": 1, "5": 2}
+        mock_db.users.find_one.assert_awaited_once()
     
     
     @pytest.mark.asyncio
@@ -117,3 +137,58 @@ class TestUsersEndpoints:
         assert data["reputation"] == 0.0
         assert data["review_count"] == 0
 
+
+class TestBatchReputation:
+    
+    @staticmethod
+    def mock_users(mock_db, users):
+        mock_cursor = AsyncMock()
+        mock_cursor.to_list = AsyncMock(return_value=users)
+        mock_db.users.find = MagicMock(return_value=mock_cursor)
+    
+    
+    @pytest.mark.asyncio
+    async def test_get_batch_reputation(self, client: AsyncClient, mock_db):
+        """Test resolving several users with one query, keeping request order"""
+        self.mock_users(mock_db, [
+            {"_id": "user_b", "username": "bee", "email": "b@example.com", "reputation": 3.5, "review_count": 2}
+        ])
+        
+        response = await client.get("/users/reputation?ids=user_a,user_b,user_a")
+        
+        assert response.status_code == 200
+        data = response.json()
+        assert [user["id"] for user in data] == ["user_a", "user_b"]
+        assert data[0]["username"] == "Unknown User"
+        assert data[0]["reputation"] == 0.0
+        assert data[1]["reputation"] == 3.5
+        mock_db.users.find.assert_called_once_with({"_id": {"$in": ["user_a", "user_b"]}})
+    
+    
+    @pytest.mark.asyncio
+    async def test_post_batch_reputation(self, client: AsyncClient, mock_db):
+        """Test the POST form of the batch reputation endpoint"""
+        self.mock_users(mock_db, [])
+        
+        response = await client.post("/users/reputation", json={"ids": ["user_x"]})
+        
+        assert response.status_code == 200
+        assert response.json()[0]["id"] == "user_x"
+    
+    
+    @pytest.mark.asyncio
+    async def test_get_batch_reputation_too_many_ids(self, client: AsyncClient, mock_db):
+        """Test that long ID lists must use the POST form"""
+        ids = ",".join(f"user_{i}" for i in range(101))
+        
+        response = await client.get(f"/users/reputation?ids={ids}")
+        
+        assert response.status_code == 400
+    
+    
+    @pytest.mark.asyncio
+    async def test_get_batch_reputation_empty(self, client: AsyncClient, mock_db):
+        """Test that an empty ID list is rejected"""
+        response = await client.get("/users/reputation?ids=,")
+        
+        assert response.status_code == 400
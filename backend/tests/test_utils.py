@@ -4,7 +4,13 @@ Test cases for utility functions.
 import pytest
 from datetime import datetime
 from bson import ObjectId
-from utils import post_doc_to_model, review_doc_to_model, user_doc_to_model
+from models import Post
+from utils import (
+    post_doc_to_model, review_doc_to_model, user_doc_to_model,
+    encode_cursor, decode_cursor, keyset_filter,
+    encode_offset_cursor, decode_offset_cursor,
+    fields_to_projection, post_doc_to_partial
+)
 
 
 class TestUtilityFunctions:
@@ -271,3 +277,79 @@ class TestUtilityFunctions:
         assert isinstance(post_model.id, str)
         assert post_model.id == str(object_id)
 
+
+class TestCursorHelpers:
+    
+    def test_cursor_round_trip(self):
+        """Test that a cursor decodes back to the document sort key"""
+        doc = {"_id": ObjectId(), "created_at": datetime(2025, 1, 2, 3, 4, 5, 6000)}
+        
+        created_at, last_id = decode_cursor(encode_cursor(doc))
+        
+        assert created_at == doc["created_at"]
+        assert last_id == doc["_id"]
+    
+    
+    def test_decode_cursor_invalid(self):
+        """Test that a malformed cursor raises ValueError"""
+        with pytest.raises(ValueError):
+            decode_cursor("not-a-cursor")
+    
+    
+    def test_keyset_filter(self):
+        """Test that the keyset filter selects documents after the cursor"""
+        doc = {"_id": ObjectId(), "created_at": datetime(2025, 1, 1)}
+        
+        query = keyset_filter(encode_cursor(doc))
+        
+        assert query["$or"][0] == {"created_at": {"$lt": doc["created_at"]}}
+        assert query["$or"][1] == {"created_at": doc["created_at"], "_id": {"$lt": doc["_id"]}}
+    
+    
+    def test_offset_cursor_round_trip(self):
+        """Test that an offset cursor decodes back to its offset"""
+        assert decode_offset_cursor(encode_offset_cursor(40)) == 40
+    
+    
+    def test_decode_offset_cursor_rejects_keyset_cursor(self):
+        """Test that a keyset cursor is not accepted as an offset cursor"""
+        doc = {"_id": ObjectId(), "created_at": datetime(2025, 1, 1)}
+        
+        with pytest.raises(ValueError):
+            decode_offset_cursor(encode_cursor(doc))
+
+
+class TestSparseFields:
+    
+    def test_fields_to_projection(self):
+        """Test building a projection from a fields parameter"""
+        projection, names = fields_to_projection("id, item_title,images[2]", Post, array_fields=("images",))
+        
+        assert projection == {"item_title": 1, "images": {"$slice": [2, 1]}}
+        assert names == ["id", "item_title", "images"]
+    
+    
+    def test_fields_to_projection_rejects_unknown(self):
+        """Test that unknown fields and invalid indexing are rejected"""
+        with pytest.raises(ValueError):
+            fields_to_projection("id,secret", Post)
+        with pytest.raises(ValueError):
+            fields_to_projection("item_title[0]", Post, array_fields=("images",))
+        with pytest.raises(ValueError):
+            fields_to_projection(",", Post)
+    
+    
+    def test_fields_to_projection_rejects_computed(self):
+        """Test that fields not stored in the document are rejected with their option"""
+        computed = {"owner_reputation": "include=owner_reputation"}
+        with pytest.raises(ValueError, match="include=owner_reputation"):
+            fields_to_projection("id,owner_reputation", Post, computed_fields=computed)
+    
+    
+    def test_post_doc_to_partial(self):
+        """Test that partial posts only carry the requested fields"""
+        post_doc = {"_id": ObjectId(), "item_title": "Lamp", "created_at": datetime.utcnow()}
+        
+        partial = post_doc_to_partial(post_doc, ["id", "item_title"])
+        
+        assert partial.model_dump(exclude_unset=True) == {"id": str(post_doc["_id"]), "item_title": "Lamp"}
@@ -1,7 +1,24 @@
 """
 Helper utility functions for the backend.
 """
-from models import Post, Review, User
+import base64
+import json
+import re
+from datetime import datetime
+from bson import ObjectId
+from typing import Optional
+from models import Post, ArchivedPost, Review, User, PartialPost, PartialReview, Coordinates
+
+# Matches one entry of a fields= parameter, e.g. "item_title" or "images[0]"
+FIELD_PATTERN = re.compile(r"^([a-z_]+)(?:\[(\d+)\])?$")
+
+
+def geojson_to_coordinates(point: Optional[dict]) -> Optional[Coordinates]:
+    """Convert a stored GeoJSON point (longitude first) to Coordinates"""
+    if not point:
+        return None
+    lng, lat = point["coordinates"]
+    return Coordinates(lat=lat, lng=lng)
 
 
 def post_doc_to_model(post_doc: dict) -> Post:
@@ -20,7 +37,19 @@ def post_doc_to_model(post_doc: dict) -> Post:
         condition=post_doc["condition"],
         location=post_doc["location"],
         claimed_by=post_doc.get("claimed_by"),
-        status=post_doc["status"]
+        claimed_at=post_doc.get("claimed_at"),
+        status=post_doc["status"],
+        coordinates=geojson_to_coordinates(post_doc.get("coordinates")),
+        version=post_doc.get("version", 0)
+    )
+
+
+def archived_post_doc_to_model(post_doc: dict) -> ArchivedPost:
+    """Convert an archived post document to ArchivedPost model"""
+    return ArchivedPost(
+        **post_doc_to_model(post_doc).model_dump(),
+        archived_at=post_doc["archived_at"],
+        archive_reason=post_doc["archive_reason"]
     )
 
 
@@ -37,6 +66,16 @@ def review_doc_to_model(review_doc: dict) -> Review:
     )
 
 
+# Star ratings counted in a user's rating_histogram
+RATING_BUCKETS = ("1", "2", "3", "4", "5")
+
+
+def full_histogram(histogram: Optional[dict] = None) -> dict:
+    """A rating histogram with every bucket present, missing ones as 0"""
+    histogram = histogram or {}
+    return {bucket: histogram.get(bucket, 0) for bucket in RATING_BUCKETS}
+
+
 def user_doc_to_model(user_doc: dict) -> User:
     """Convert MongoDB document to User model"""
     return User(
@@ -44,6 +83,122 @@ def user_doc_to_model(user_doc: dict) -> User:
         username=user_doc.get("username", ""),
         email=user_doc.get("email", ""),
         reputation=user_doc.get("reputation", 0.0),
-        review_count=user_doc.get("review_count", 0)
+        review_count=user_doc.get("review_count", 0),
+        rating_histogram=full_histogram(user_doc.get("rating_histogram"))
     )
 
+
+
+def fields_to_projection(fields: str, model, array_fields=(), computed_fields=None) -> tuple:
+    """
+    Turn a sparse fieldset such as "id,item_title,images[0]" into a Mongo
+    projection and the list of requested field names.
+    Array fields may be indexed to return a single element.
+    computed_fields maps model fields that are not stored in the document
+    to the query option that fills them in.
+    Raises ValueError for unknown, computed or malformed fields.
+    """
+    computed_fields = computed_fields or {}
+    projection = {}
+    names = []
+    for entry in fields.split(","):
+        entry = entry.strip()
+        if not entry:
+            continue
+        match = FIELD_PATTERN.match(entry)
+        if not match or match.group(1) not in model.model_fields:
+            raise ValueError(f"Unknown field: {entry}")
+        name, index = match.groups()
+        if name in computed_fields:
+            raise ValueError(f"{name} is not a stored field; request it with {computed_fields[name]}")
+        if index is not None and name not in array_fields:
+            raise ValueError(f"Field cannot be indexed: {name}")
+        if name != "id":
+            projection[name] = {"$slice": [int(index), 1]} if index is not None else 1
+        names.append(name)
+    if not names:
+        raise ValueError("No fields requested")
+    return projection, names
+
+
+def post_doc_to_partial(post_doc: dict, names: list) -> PartialPost:
+    """Convert a projected post document to a PartialPost with only the requested fields"""
+    data = {name: post_doc[name] for name in names if name != "id" and name in post_doc}
+    if "coordinates" in data:
+        data["coordinates"] = geojson_to_coordinates(data["coordinates"])
+    return PartialPost(id=str(post_doc["_id"]), **data)
+
+
+def review_doc_to_partial(review_doc: dict, names: list) -> PartialReview:
+    """Convert a projected review document to a PartialReview with only the requested fields"""
+    data = {name: review_doc[name] for name in names if name != "id" and name in review_doc}
+    return PartialReview(id=str(review_doc["_id"]), **data)
+
+
+def _encode_payload(payload: dict) -> str:
+    raw = json.dumps(payload, separators=(",", ":")).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+
+def _decode_payload(cursor: str) -> dict:
+    padded = cursor + "=" * (-len(cursor) % 4)
+    return json.loads(base64.urlsafe_b64decode(padded.encode("ascii")))
+
+
+def encode_cursor(doc: dict, field: str = "created_at") -> str:
+    """
+    Build an opaque pagination cursor from the last document of a page.
+    The cursor captures the (field, _id) sort key of that document.
+    """
+    return _encode_payload({
+        field: doc[field].isoformat(),
+        "id": str(doc["_id"])
+    })
+
+
+def decode_cursor(cursor: str, field: str = "created_at") -> tuple:
+    """
+    Decode a cursor produced by encode_cursor into (datetime, ObjectId).
+    Raises ValueError if the cursor is malformed.
+    """
+    try:
+        payload = _decode_payload(cursor)
+        return datetime.fromisoformat(payload[field]), ObjectId(payload["id"])
+    except Exception as e:
+        raise ValueError("Invalid cursor") from e
+
+
+def encode_offset_cursor(offset: int) -> str:
+    """
+    Build an opaque cursor for result sets that cannot be keyset paginated,
+    such as results ranked by relevance.
+    """
+    return _encode_payload({"offset": offset})
+
+
+def decode_offset_cursor(cursor: str) -> int:
+    """
+    Decode a cursor produced by encode_offset_cursor.
+    Raises ValueError if the cursor is malformed.
+    """
+    try:
+        offset = int(_decode_payload(cursor)["offset"])
+    except Exception as e:
+        raise ValueError("Invalid cursor") from e
+    if offset < 0:
+        raise ValueError("Invalid cursor")
+    return offset
+
+
+def keyset_filter(cursor: str, field: str = "created_at") -> dict:
+    """
+    Mongo filter selecting documents that sort after the cursor position
+    when ordered by (field, _id) descending.
+    """
+    value, last_id = decode_cursor(cursor, field)
+    return {
+        "$or": [
+            {field: {"$lt": value}},
+            {field: value, "_id": {"$lt": last_id}}
+        ]
+    }
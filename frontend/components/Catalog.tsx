@@ -27,32 +27,40 @@ export default function Catalog() {
   const [currentImageIndex, setCurrentImageIndex] = useState(0);
   const [posterReputations, setPosterReputations] = useState<Map<string, User>>(new Map());
   const [viewingProfileUserId, setViewingProfileUserId] = useState<string | null>(null);
+  const [nextCursor, setNextCursor] = useState<string | null>(null);
+  const [loadingMore, setLoadingMore] = useState(false);
+
+  // The catalog only lists available items, one page at a time
+  const catalogFilters = { category, status: 'available' };
 
   useEffect(() => {
     fetchPosts();
-  }, []);
+  }, [category]);
+
+  // Fetch reputations for owners not seen on earlier pages, in one request
+  const loadReputations = async (posts: Post[], known: Map<string, User>) => {
+    const uniqueOwnerIds = [...new Set(posts.map(post => post.owner_id))].filter(ownerId => !known.has(ownerId));
+    if (uniqueOwnerIds.length === 0) return;
+    
+    const reputationMap = new Map<string, User>(known);
+    try {
+      const users = await publicUsersAPI.getReputations(uniqueOwnerIds);
+      users.forEach(userData => reputationMap.set(userData.id, userData));
+    } catch (err) {
+      console.error('Failed to fetch poster reputations:', err);
+    }
+    
+    setPosterReputations(reputationMap);
+  };
 
   const fetchPosts = async () => {
     try {
       setLoading(true);
-      const posts = await publicPostsAPI.getAll();
-      setItems(posts);
-
-      const uniqueOwnerIds = [...new Set(posts.map(post => post.owner_id))];
-      const reputationMap = new Map<string, User>();
-      
-      await Promise.all(
-        uniqueOwnerIds.map(async (ownerId) => {
-          try {
-            const userData = await publicUsersAPI.getReputation(ownerId);
-            reputationMap.set(ownerId, userData);
-          } catch (err) {
-            console.error(`Failed to fetch reputation for user ${ownerId}:`, err);
-          }
-        })
-      );
-      
-      setPosterReputations(reputationMap);
+      const page = await publicPostsAPI.getPage(catalogFilters);
+      setItems(page.items);
+      setNextCursor(page.nextCursor);
+
+      await loadReputations(page.items, posterReputations);
       setError(null);
     } catch (err) {
       const errorMessage = err instanceof Error ? err.message : 'Failed to fetch posts';
@@ -64,6 +72,23 @@ export default function Catalog() {
     }
   };
 
+  const loadMore = async () => {
+    if (!nextCursor) return;
+
+    try {
+      setLoadingMore(true);
+      const page = await publicPostsAPI.getPage(catalogFilters, nextCursor);
+      setItems(current => [...current, ...page.items]);
+      setNextCursor(page.nextCursor);
+
+      await loadReputations(page.items, posterReputations);
+    } catch (err) {
+      console.error('Error loading more posts:', err);
+    } finally {
+      setLoadingMore(false);
+    }
+  };
+
   const filtered = items.filter(p => {
     const matchesSearch = p.item_title.toLowerCase().includes(search.toLowerCase());
     const matchesCategory = category === 'All' || p.category === category;
@@ -201,12 +226,24 @@ export default function Catalog() {
         })}
       </div>
 
-      {filtered.length === 0 && (
+      {filtered.length === 0 && !nextCursor && (
         <div className="text-center py-12 text-gray-500">
           No items found. {isSignedIn && 'Create the first post!'}
         </div>
       )}
 
+      {nextCursor && (
+        <div className="flex justify-center py-8">
+          <button
+            onClick={loadMore}
+            disabled={loadingMore}
+            className="px-6 py-3 rounded-lg font-semibold bg-emerald-600 text-white hover:bg-emerald-700 transition-colors disabled:bg-gray-300 disabled:text-gray-500"
+          >
+            {loadingMore ? 'Loading...' : 'Load more'}
+          </button>
+        </div>
+      )}
+
       {selectedItem && (
         <div className="fixed inset-0 bg-black bg-opacity-50 flex items-center justify-center p-4 z-50" onClick={() => setSelectedItem(null)}>
           <div className="bg-white rounded-lg p-8 max-w-2xl w-full max-h-[90vh] overflow-y-auto" onClick={(e) => e.stopPropagation()}>
@@ -46,17 +46,12 @@ export default function ProfilePage() {
       const reputationData = await publicUsersAPI.getReputation(user.id);
       setUserReputation(reputationData);
 
-      // Load all posts to filter by user
-      const allPosts = await publicPostsAPI.getAll();
-      
-      // Filter posted items (owned by user)
-      const posted = allPosts.filter(post => post.owner_id === user.id);
+      // Load posted items (owned by user) and claimed items (claimed by user)
+      const [posted, claimed] = await Promise.all([
+        publicPostsAPI.getAll({ owner_id: user.id }),
+        publicPostsAPI.getAll({ claimed_by: user.id }),
+      ]);
       setPostedItems(posted);
-
-      // Filter claimed items (claimed by user)
-      const claimed = allPosts.filter(post => {
-        return post.claimed_by === user.id;
-      });
       setClaimedItems(claimed);
 
 
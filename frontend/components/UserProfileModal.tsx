@@ -30,9 +30,8 @@ export default function UserProfileModal({ userId, onClose }: UserProfileModalPr
       const reputationData = await publicUsersAPI.getReputation(userId);
       setUserReputation(reputationData);
 
-      // Load all posts and filter by this user
-      const allPosts = await publicPostsAPI.getAll();
-      const userPosts = allPosts.filter(post => post.owner_id === userId);
+      // Load this user's posts
+      const userPosts = await publicPostsAPI.getAll({ owner_id: userId });
       setPostedItems(userPosts);
 
       // Load reviews for this user
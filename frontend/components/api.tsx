@@ -1,4 +1,4 @@
-import { publicRequest, useAuthenticatedAPI } from '@/lib/api';
+import { publicPageRequest, publicRequest, publicRequestAllPages, useAuthenticatedAPI } from '@/lib/api';
 import { Post, Review, User } from '@/types';
 
 // Types for API requests
@@ -29,16 +29,29 @@ export interface CreateReviewData {
 
 // Public API endpoints
 export const publicPostsAPI = {
-  // Get all posts
-  getAll: async (params?: { category?: string; status?: string; location?: string; condition?: string }): Promise<Post[]> => {
+  // Get one page of posts, newest first; pass the returned nextCursor to
+  // get the following page
+  getPage: async (
+    params?: { category?: string; status?: string },
+    cursor: string | null = null
+  ): Promise<{ items: Post[]; nextCursor: string | null }> => {
     const searchParams = new URLSearchParams();
     if (params?.category && params.category !== 'All') searchParams.append('category', params.category);
     if (params?.status) searchParams.append('status', params.status);
-    if (params?.location) searchParams.append('location', params.location);
-    if (params?.condition) searchParams.append('condition', params.condition);
-    
+
     const query = searchParams.toString() ? `?${searchParams.toString()}` : '';
-    return publicRequest<Post[]>(`/posts${query}`);
+    return publicPageRequest<Post>(`/posts${query}`, cursor);
+  },
+
+  // Get every post of one owner or claimer, fetching all pages of the listing
+  getAll: async (params: { owner_id?: string; claimed_by?: string }): Promise<Post[]> => {
+    const searchParams = new URLSearchParams();
+    if (params.owner_id) searchParams.append('owner_id', params.owner_id);
+    if (params.claimed_by) searchParams.append('claimed_by', params.claimed_by);
+    // Largest page the API serves, to keep round trips down
+    searchParams.append('limit', '100');
+    
+    return publicRequestAllPages<Post>(`/posts?${searchParams.toString()}`);
   },
 
   // Get single post
@@ -53,9 +66,9 @@ export const publicReviewsAPI = {
     return publicRequest<Review>(`/reviews/${id}`);
   },
 
-  // Get reviews for a poster
+  // Get reviews for a poster, fetching every page
   getByPosterId: async (posterId: string): Promise<Review[]> => {
-    return publicRequest<Review[]>(`/reviews/poster/${posterId}`);
+    return publicRequestAllPages<Review>(`/reviews/poster/${posterId}?limit=100`);
   },
 };
 
@@ -64,6 +77,14 @@ export const publicUsersAPI = {
   getReputation: async (userId: string): Promise<User> => {
     return publicRequest<User>(`/users/${userId}/reputation`);
   },
+
+  // Get reputation for several users in one request
+  getReputations: async (userIds: string[]): Promise<User[]> => {
+    return publicRequest<User[]>('/users/reputation', {
+      method: 'POST',
+      body: JSON.stringify({ ids: userIds }),
+    });
+  },
 };
 
 // Authenticated API endpoints
@@ -27,6 +27,48 @@ export async function publicRequest<T = any>(
   return response.json();
 }
 
+// One page of a public paginated listing, with the cursor of the next page
+// from the X-Next-Cursor header (null on the last page)
+export async function publicPageRequest<T = any>(
+  endpoint: string,
+  cursor: string | null = null
+): Promise<{ items: T[]; nextCursor: string | null }> {
+  const separator = endpoint.includes('?') ? '&' : '?';
+  const page = cursor ? `${endpoint}${separator}cursor=${encodeURIComponent(cursor)}` : endpoint;
+  const response = await fetch(`${API_BASE_URL}${page}`, {
+    headers: { 'Content-Type': 'application/json' },
+  });
+
+  if (!response.ok) {
+    const error = await response.json().catch(() => ({
+      detail: response.statusText
+    }));
+    throw new Error(error.detail || 'API Request failed');
+  }
+  return {
+    items: await response.json(),
+    nextCursor: response.headers.get('X-Next-Cursor'),
+  };
+}
+
+// Public requests for paginated listings: follows the X-Next-Cursor header
+// until the last page and returns the items of every page. Only for
+// listings known to be small, such as one user's posts
+export async function publicRequestAllPages<T = any>(
+  endpoint: string
+): Promise<T[]> {
+  const items: T[] = [];
+  let cursor: string | null = null;
+
+  do {
+    const page: { items: T[]; nextCursor: string | null } = await publicPageRequest<T>(endpoint, cursor);
+    items.push(...page.items);
+    cursor = page.nextCursor;
+  } while (cursor);
+
+  return items;
+}
+
 // Custom hook for authenticated API requests
 export function useAuthenticatedAPI() {
   const { getToken } = useAuth();
@@ -16,6 +16,7 @@ export interface User {
   email: string;
   reputation: number;
   review_count: number;
+  rating_histogram?: Record<string, number>;
 }
 
 export interface Post {
@@ -30,6 +31,11 @@ export interface Post {
   location: string;
   status: 'available' | 'claimed' | 'removed';
   claimed_by?: string | null;
+  claimed_at?: string | null;
+  coordinates?: { lat: number; lng: number } | null;
+  distance_km?: number;
+  owner_reputation?: number;
+  owner_review_count?: number;
 }
 
 export const categories = [